@@ -0,0 +1,114 @@
+"""Chat store benchmark, the SQLite DocumentStore against the TinyDB file it replaced.
+
+Each store is prefilled with N chats, then the latency of single inserts,
+updates (update_chat_by_id) and chat history scans is measured at that size.
+TinyDB rewrites its whole JSON file on every write, so its write latency grows
+with N; it is skipped when tinydb is not installed. Scans are timed right after
+a write, as in the chat handler, since TinyDB caches query results until then.
+
+    python benchmarks/bench_db.py --sizes 10000 100000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# keep the import of db_manager away from the server's database and its legacy file
+os.environ.setdefault("EDGE_LLM_DB_PATH", os.path.join(tempfile.gettempdir(), "bench_edge_llm_db.sqlite3"))
+os.environ.setdefault("EDGE_LLM_LEGACY_DB_PATH", os.path.join(tempfile.gettempdir(), "bench_edge_llm_db.json"))
+from src.db_manager import DocumentStore  # noqa: E402
+
+try:
+    from tinydb import TinyDB, Query, table
+except ImportError:
+    TinyDB = None
+
+FIRST_ID = 1700000000000
+
+
+def chat(doc_id: int) -> dict:
+    return {
+        "id": doc_id,
+        "type": "chat",
+        "human": f"What does a crest factor of {doc_id % 7}.2 mean for engine knock?",
+        "bot": "...",
+    }
+
+
+def update(doc_id: int) -> dict:
+    return {
+        "bot": "A crest factor in that range points to light knock. " * 4,
+        "metrics": {"model": "qwen3:1.7b", "temperature": 0.7, "top_p": 0.9, "total_duration": doc_id,
+                    "eval_count": 120, "eval_duration": 2000000000},
+    }
+
+
+def timed(func, repeat: int, setup=None) -> list:
+    samples = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name: str, size: int, operation: str, samples: list):
+    print(f"{name:8} {size:>8} {operation:8} "
+          f"median {statistics.median(samples) * 1000:9.3f} ms   "
+          f"max {max(samples) * 1000:9.3f} ms   n={len(samples)}")
+
+
+def bench_sqlite(directory: str, size: int, repeat: int, scans: int):
+    store = DocumentStore(os.path.join(directory, f"chats_{size}.sqlite3"))
+    store.insert_many({FIRST_ID + i: chat(FIRST_ID + i) for i in range(size)})
+
+    report("sqlite", size, "insert", timed(lambda i: store.insert(chat(FIRST_ID + size + i), FIRST_ID + size + i), repeat))
+    report("sqlite", size, "update", timed(lambda i: store.upsert(update(i), FIRST_ID + size + i), repeat))
+    report("sqlite", size, "scan", timed(lambda i: store.search_type("chat"), scans,
+                                         setup=lambda i: store.upsert(update(i), FIRST_ID + i)))
+    store.close()
+
+
+def bench_tinydb(directory: str, size: int, repeat: int, scans: int):
+    path = os.path.join(directory, f"chats_{size}.json")
+    # written directly, inserting one by one would rewrite the file N times
+    with open(path, "w") as f:
+        json.dump({"_default": {str(FIRST_ID + i): chat(FIRST_ID + i) for i in range(size)}}, f)
+    db = TinyDB(path)
+
+    def insert(i):
+        doc_id = FIRST_ID + size + i
+        db.insert(table.Document(chat(doc_id), doc_id=doc_id))
+
+    report("tinydb", size, "insert", timed(insert, repeat))
+    report("tinydb", size, "update", timed(lambda i: db.upsert(table.Document(update(i), doc_id=FIRST_ID + size + i)), repeat))
+    report("tinydb", size, "scan", timed(lambda i: db.search(Query().type == "chat"), scans,
+                                         setup=lambda i: db.upsert(table.Document(update(i), doc_id=FIRST_ID + i))))
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=50, help="timed inserts and updates per size")
+    parser.add_argument("--scans", type=int, default=5, help="timed chat history scans per size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            bench_sqlite(directory, size, args.repeat, args.scans)
+            if TinyDB is not None:
+                bench_tinydb(directory, size, args.repeat, args.scans)
+            else:
+                print("tinydb is not installed, skipping the TinyDB baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Fleet analysis throughput in traces per second.
+
+Features: process_vibration_data called once per trace, against
+fleet_analysis.compute_features stacking equal-length traces into one
+windowed_features_batch pass. The end-to-end figures include moving the
+traces to the process pool. End to end: analyze_fleet against the stub
+Ollama server with every engine sent to the model (narrative), one call per
+engine against grouped prompts. The stub answers every prompt with the same
+number of tokens, so the grouped figure is an upper bound of the gain.
+
+    python benchmarks/bench_fleet.py --traces 8 32 128 --total-time 10 --sampling-freq 1000
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.stub_ollama import start_stub_server  # noqa: E402
+
+# the server module reads these on import, process pool workers import this script too and need no stub
+if __name__ == "__main__":
+    server, stub_url = start_stub_server(tokens=40, token_delay=0.005)
+    os.environ["EDGE_LLM_OLLAMA_URL"] = stub_url
+os.environ.setdefault("EDGE_LLM_DB_PATH", os.path.join("/tmp", "bench_edge_llm_db.sqlite3"))
+os.environ.setdefault("EDGE_LLM_LEGACY_DB_PATH", os.path.join("/tmp", "bench_edge_llm_db.json"))
+
+from src import api, fleet_analysis  # noqa: E402
+from src.fleet_analysis import FleetTrace  # noqa: E402
+
+RPMS = (1500, 2000, 2500, 3000, 3500)
+
+
+def make_traces(count: int, total_time: float, sampling_freq: int) -> list:
+    traces = []
+    for i in range(count):
+        params = dict(total_time=total_time, sampling_freq=sampling_freq, rpm=RPMS[i % len(RPMS)], random_seed=i)
+        df, params = api.generate_engine_vibration_data(**params)
+        traces.append(FleetTrace(f"engine-{i}", params, df["vibration"].values))
+    return traces
+
+
+def bench_features(traces: list) -> tuple:
+    start = time.perf_counter()
+    for trace in traces:
+        api.process_vibration_data(None, trace.vibration, trace.sample_rate, trace.engine_info["firing_frequency"])
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fleet_analysis.compute_features(traces)
+    batched = time.perf_counter() - start
+    return len(traces) / single, len(traces) / batched
+
+
+async def bench_end_to_end(traces: list, prompt_engines: int) -> float:
+    metrics = {}
+    parameters = {"narrative": True, "cache": False, "prompt_engines": prompt_engines}
+    async for _ in api.analyze_fleet(traces, parameters, metrics):
+        pass
+    await api.ollama.close()
+    return metrics["traces_per_second"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traces", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--total-time", type=float, default=10.0)
+    parser.add_argument("--sampling-freq", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=fleet_analysis.FLEET_LLM_CONCURRENCY)
+    args = parser.parse_args()
+    fleet_analysis.FLEET_LLM_CONCURRENCY = args.concurrency
+
+    print("traces per second")
+    print(f"{'traces':>7} {'features/trace':>15} {'features/stack':>15} {'e2e per engine':>15} {'e2e grouped':>12}")
+    for count in args.traces:
+        traces = make_traces(count, args.total_time, args.sampling_freq)
+        single, batched = bench_features(traces)
+        per_engine = asyncio.run(bench_end_to_end(traces, 1))
+        grouped = asyncio.run(bench_end_to_end(traces, fleet_analysis.FLEET_PROMPT_ENGINES))
+        print(f"{count:>7} {single:>15.1f} {batched:>15.1f} {per_engine:>15.1f} {grouped:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
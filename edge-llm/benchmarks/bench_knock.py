@@ -0,0 +1,94 @@
+"""Knock injection benchmark, vectorized add_knock_to_signal against the old loop.
+
+Sweeps signal durations from 10 s to 10 min. The per-event loop is
+O(events x samples), so it is only run up to --legacy-max seconds, where the
+exact mode is also checked to reproduce its output bit for bit.
+
+    python benchmarks/bench_knock.py --sampling-freq 20000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.vibration_sim import add_knock_to_signal  # noqa: E402
+
+
+def legacy_add_knock_to_signal(
+    vibration, time, cycle_freq, num_cylinders,
+    knock_start_time, knock_prob_start, knock_prob_end,
+    intensity_start, intensity_end,
+    knock_freq, knock_damping, sampling_freq
+):
+    """The per-event implementation add_knock_to_signal replaced, kept as the reference."""
+    num_samples = len(time)
+    knock_start_idx = np.argmax(time >= knock_start_time)
+    if knock_start_idx == 0 and time[0] < knock_start_time:
+        return vibration, []
+    firing_freq = cycle_freq * num_cylinders
+    firing_interval = 1.0 / firing_freq
+    total_time = time[-1]
+    firing_times = np.arange(0, total_time, firing_interval)
+    knock_events = []
+    for fire_time in firing_times:
+        if fire_time < knock_start_time:
+            continue
+        time_progress = (fire_time - knock_start_time) / (total_time - knock_start_time)
+        time_progress = min(max(time_progress, 0), 1)
+        knock_probability = knock_prob_start + time_progress * (knock_prob_end - knock_prob_start)
+        if np.random.random() <= knock_probability:
+            knock_intensity = intensity_start + time_progress * (intensity_end - intensity_start)
+            idx_start = np.argmax(time >= fire_time)
+            if idx_start < num_samples:
+                knock_duration_samples = int(0.010 * sampling_freq)
+                idx_end = min(idx_start + knock_duration_samples, num_samples)
+                knock_time = time[idx_start:idx_end] - time[idx_start]
+                knock_signal = knock_intensity * np.exp(-knock_damping * knock_time * 1000) * np.sin(2 * np.pi * knock_freq * knock_time)
+                vibration[idx_start:idx_end] += knock_signal
+                knock_events.append((float(fire_time), float(knock_intensity)))
+    return vibration, knock_events
+
+
+def run(func, total_time, sampling_freq, rpm, num_cylinders, seed, **kwargs):
+    time_array = np.linspace(0, total_time, int(total_time * sampling_freq))
+    vibration = np.zeros_like(time_array)
+    np.random.seed(seed)
+    start = time.perf_counter()
+    vibration, events = func(
+        vibration, time_array, rpm / 60 / 2, num_cylinders,
+        total_time * 0.3, 0.2, 0.9, 1.0, 4.0, 400, 0.05, sampling_freq, **kwargs)
+    return time.perf_counter() - start, vibration, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sampling-freq", type=int, default=20000)
+    parser.add_argument("--rpm", type=int, default=3000)
+    parser.add_argument("--cylinders", type=int, default=4)
+    parser.add_argument("--durations", type=float, nargs="+", default=[10, 60, 300, 600])
+    parser.add_argument("--legacy-max", type=float, default=10,
+                        help="longest duration (s) the per-event loop is run for")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    common = (args.sampling_freq, args.rpm, args.cylinders, args.seed)
+    print(f"{'duration':>9} {'samples':>10} {'events':>7} {'fast':>9} {'exact':>9} {'legacy':>9}  equivalent")
+    for duration in args.durations:
+        fast_time, fast, events = run(add_knock_to_signal, duration, *common)
+        exact_time, exact, _ = run(add_knock_to_signal, duration, *common, exact=True)
+        legacy_col, equivalent = "-", "-"
+        if duration <= args.legacy_max:
+            legacy_time, legacy, legacy_events = run(legacy_add_knock_to_signal, duration, *common)
+            legacy_col = f"{legacy_time:8.3f}s"
+            equivalent = str(np.array_equal(exact, legacy) and events == legacy_events
+                             and np.allclose(fast, legacy, rtol=0, atol=1e-9))
+        print(f"{duration:>8.0f}s {len(fast):>10} {len(events):>7} {fast_time:8.3f}s "
+              f"{exact_time:8.3f}s {legacy_col:>9}  {equivalent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Event loop lag while large traces are generated and analyzed, on threads against the process pool.
+
+Every run generates --traces traces, extracts their features and renders
+their plots, --concurrency at a time, the way /api/engine-vibration and
+engineAnalysis do. Meanwhile a LoopLagMonitor samples the event loop every 10 ms, a token
+stream on a WebSocket stalls for as long as the lag. 0 workers runs the work
+on threads of this process, as the server did before the process pool.
+
+    python benchmarks/bench_offload.py --workers 0 1 2 4 --traces 8 --total-time 30 --sampling-freq 20000
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import vibration_sim, vibration_features, plotting  # noqa: E402
+from src.process_pool import ProcessPool, LoopLagMonitor  # noqa: E402
+from src.fleet_analysis import engine_info_from_params  # noqa: E402
+
+LAG_INTERVAL = 0.01
+
+
+async def analyze(pool: ProcessPool, params: dict, plot: bool):
+    sample_time, vibration, params = await pool.run(vibration_sim.generate_vibration_arrays, **params)
+    firing_freq = engine_info_from_params(params)["firing_frequency"]
+    await pool.run(vibration_features.analyze_trace, vibration, params["sampling_freq"], firing_freq)
+    if plot:
+        await pool.run(plotting.render_plot, sample_time, vibration, params)
+
+
+async def bench(workers: int, traces: int, concurrency: int, total_time: float, sampling_freq: int,
+                plot: bool) -> dict:
+    pool = ProcessPool(workers)
+    start = time.perf_counter()
+    await pool.warm()
+    warm = time.perf_counter() - start
+
+    lag = LoopLagMonitor(LAG_INTERVAL)
+    lag.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(seed: int):
+        async with semaphore:
+            await analyze(pool, dict(total_time=total_time, sampling_freq=sampling_freq, random_seed=seed), plot)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(seed) for seed in range(traces)))
+    elapsed = time.perf_counter() - start
+    await lag.stop()
+    pool.close()
+    return {"warm": warm, "traces_per_second": traces / elapsed, **lag.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--traces", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--total-time", type=float, default=30.0)
+    parser.add_argument("--sampling-freq", type=int, default=20000)
+    parser.add_argument("--no-plot", action="store_true", help="skip rendering the plot of each trace")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'warm s':>7} {'traces/s':>9} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for workers in args.workers:
+        result = asyncio.run(bench(workers, args.traces, args.concurrency, args.total_time, args.sampling_freq,
+                                   not args.no_plot))
+        print(f"{workers:>7} {result['warm']:>7.2f} {result['traces_per_second']:>9.2f} "
+              f"{result['recent_lag_p50'] * 1000:>11.1f} {result['recent_lag_p99'] * 1000:>11.1f} "
+              f"{result['recent_lag_max'] * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Time-to-first-token of the Ollama client against the stub server.
+
+Compares the old per-request `requests.post(..., stream=True)` pattern with
+the shared OllamaClient, sequentially and with concurrent streams.
+
+    python benchmarks/bench_ollama_client.py --requests 50 --concurrency 8
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.stub_ollama import start_stub_server  # noqa: E402
+from src.ollama_client import OllamaClient  # noqa: E402
+
+
+def summarize(name, ttfts, totals):
+    ttfts = sorted(ttfts)
+    print(f"{name:<28} ttft p50={statistics.median(ttfts) * 1000:7.2f}ms "
+          f"p95={ttfts[int(len(ttfts) * 0.95) - 1] * 1000:7.2f}ms "
+          f"total p50={statistics.median(totals) * 1000:7.2f}ms")
+
+
+def bench_requests(base_url, count):
+    import requests
+
+    ttfts, totals = [], []
+    for _ in range(count):
+        start = time.perf_counter()
+        first = None
+        r = requests.post(f"{base_url}/api/generate", json={"model": "qwen3:1.7b", "prompt": "hi"}, stream=True)
+        for line in r.iter_lines():
+            json.loads(line)
+            if first is None:
+                first = time.perf_counter() - start
+        ttfts.append(first)
+        totals.append(time.perf_counter() - start)
+    return ttfts, totals
+
+
+async def one_stream(client, ttfts, totals):
+    start = time.perf_counter()
+    first = None
+    async for _ in client.generate({"model": "qwen3:1.7b", "prompt": "hi"}):
+        if first is None:
+            first = time.perf_counter() - start
+    ttfts.append(first)
+    totals.append(time.perf_counter() - start)
+
+
+async def bench_client(base_url, count, concurrency):
+    client = OllamaClient(base_url=base_url)
+    ttfts, totals = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await one_stream(client, ttfts, totals)
+
+    await asyncio.gather(*(limited() for _ in range(count)))
+    await client.close()
+    return ttfts, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.001)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(tokens=args.tokens, token_delay=args.token_delay)
+    try:
+        try:
+            summarize("requests (per call)", *bench_requests(base_url, args.requests))
+        except ImportError:
+            print("requests is not installed, skipping the baseline")
+        summarize("OllamaClient sequential", *asyncio.run(bench_client(base_url, args.requests, 1)))
+        summarize(f"OllamaClient x{args.concurrency}",
+                  *asyncio.run(bench_client(base_url, args.requests, args.concurrency)))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Sustained ingest rate of multi-channel sensor samples through the ring buffer.
+
+Samples arrive in blocks of --block-ms per channel. For every block:
+
+    json     the list path: tolist, json.dumps, json.loads, np.asarray, then
+             kept in a list of the window's blocks and concatenated for the
+             newest segment
+    ring     RingBuffer.write and a zero-copy view of the newest segment
+    shared   the same with the ring in shared memory, and a second process
+             attached to it following every sample with `since`
+    stream   EngineStream.ingest per channel, ring plus sliding-window features
+
+Rates are samples per second over all channels, "x rt" is how many times
+faster than real time the path keeps up.
+
+    python benchmarks/bench_ring.py --rates 10000 20000 50000 --channels 1 4 8 --seconds 10
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.ring_buffer import RingBuffer, shared_ring_name  # noqa: E402
+from src.sensor_stream import EngineStream  # noqa: E402
+
+WINDOW_SECONDS = 2.0
+SEGMENT_SECONDS = 0.1
+
+
+def make_blocks(rate: int, channels: int, block: int, count: int = 16) -> list:
+    rng = np.random.default_rng(0)
+    return [rng.normal(size=(channels, block)) for _ in range(count)]
+
+
+def bench_json(blocks: list, total: int, window: int, segment: int) -> float:
+    kept = []
+    start = time.perf_counter()
+    for i in range(total):
+        message = json.dumps({"samples": blocks[i % len(blocks)].tolist()})
+        samples = np.asarray(json.loads(message)["samples"])
+        kept.append(samples)
+        if len(kept) * samples.shape[1] > window:
+            kept.pop(0)
+        np.concatenate(kept, axis=1)[:, -segment:]
+    return time.perf_counter() - start
+
+
+def bench_ring(blocks: list, total: int, window: int, segment: int) -> float:
+    ring = RingBuffer(window, blocks[0].shape[0])
+    start = time.perf_counter()
+    for i in range(total):
+        ring.write(blocks[i % len(blocks)])
+        ring.window(min(ring.size, segment))
+    return time.perf_counter() - start
+
+
+def follow(name: str, expected: int, result):
+    """Reader process: follow the ring until `expected` samples went by."""
+    ring = RingBuffer.attach(shm_name=name)
+    position = dropped = read = 0
+    while position < expected:
+        view, position, lost = ring.since(position)
+        read += view.shape[1]
+        dropped += lost
+    del view
+    ring.close()
+    result.put((read, dropped))
+
+
+def bench_shared(blocks: list, total: int, window: int, segment: int) -> tuple:
+    channels, block = blocks[0].shape
+    ring = RingBuffer(window, channels, shm_name=shared_ring_name("bench_ring", f"{channels}x{block}"))
+    result = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=follow, args=(ring.shm.name, total * block, result))
+    reader.start()
+    try:
+        start = time.perf_counter()
+        for i in range(total):
+            ring.write(blocks[i % len(blocks)])
+            ring.window(min(ring.size, segment))
+        elapsed = time.perf_counter() - start
+        read, dropped = result.get()
+        reader.join()
+    finally:
+        ring.close()
+        ring.unlink()
+    return elapsed, dropped / (read + dropped)
+
+
+def bench_stream(blocks: list, total: int, rate: int) -> float:
+    params = {"sampling_freq": rate, "rpm": 3000, "num_cylinders": 4}
+    streams = [EngineStream(f"channel-{c}", params, WINDOW_SECONDS, SEGMENT_SECONDS) for c in range(blocks[0].shape[0])]
+    start = time.perf_counter()
+    for i in range(total):
+        block = blocks[i % len(blocks)]
+        for channel, stream in enumerate(streams):
+            stream.ingest(block[channel])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=int, nargs="+", default=[10000, 20000, 50000], help="samples per second per channel")
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10.0, help="stream time per run")
+    parser.add_argument("--block-ms", type=float, default=10.0)
+    parser.add_argument("--no-stream", action="store_true", help="skip the feature extraction column")
+    args = parser.parse_args()
+
+    print(f"{'rate':>6} {'ch':>3} {'json Msps':>10} {'x rt':>6} {'ring Msps':>10} {'x rt':>7} "
+          f"{'shared Msps':>12} {'x rt':>7} {'dropped':>8} {'stream Msps':>12} {'x rt':>6}")
+    for rate in args.rates:
+        for channels in args.channels:
+            block = max(1, int(rate * args.block_ms / 1000))
+            total = max(1, int(args.seconds * rate / block))
+            window = int(WINDOW_SECONDS * rate)
+            segment = int(SEGMENT_SECONDS * rate)
+            blocks = make_blocks(rate, channels, block)
+            samples = total * block * channels
+
+            row = f"{rate:>6} {channels:>3}"
+            for elapsed in (bench_json(blocks, total, window, segment), bench_ring(blocks, total, window, segment)):
+                row += f" {samples / elapsed / 1e6:>10.2f} {args.seconds / elapsed:>6.0f}"
+            elapsed, dropped = bench_shared(blocks, total, window, segment)
+            row += f" {samples / elapsed / 1e6:>12.2f} {args.seconds / elapsed:>7.0f} {dropped:>8.1%}"
+            if not args.no_stream:
+                elapsed = bench_stream(blocks, total, rate)
+                row += f" {samples / elapsed / 1e6:>12.2f} {args.seconds / elapsed:>6.1f}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Vibration simulator benchmark, harmonic recurrence against the per-term generator.
+
+Times generate_base_vibration, which calls np.sin once per harmonic and
+cylinder, against simulate_vibration on one channel, then simulate_vibration
+on --channels sensors in float64 and float32, reporting samples per second,
+output size and, for one channel, the largest difference from the per-term
+signal. Several channels draw their noise interleaved, so they differ.
+
+    python benchmarks/bench_sim.py --sampling-freq 20000 --channels 8
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.vibration_sim import generate_base_vibration, simulate_vibration  # noqa: E402
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sampling-freq", type=int, default=20000)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--rpm", type=int, default=3000)
+    parser.add_argument("--cylinders", type=int, default=8)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    time_array = np.linspace(0, args.duration, int(args.duration * args.sampling_freq))
+    common = (time_array, args.rpm, args.cylinders, 0.1)
+
+    def per_term():
+        np.random.seed(0)
+        return generate_base_vibration(*common)
+
+    def recurrence(channels, dtype):
+        phases = 2 * np.pi * np.arange(channels) / channels
+
+        def run():
+            np.random.seed(0)
+            return simulate_vibration(*common, phases=phases, dtype=dtype)
+        return run
+
+    reference_time, reference = timed(per_term, args.repeat)
+    runs = [
+        ("per-term, 1 channel", reference_time, reference[None]),
+        ("recurrence, 1 channel", *timed(recurrence(1, np.float64), args.repeat)),
+        (f"recurrence, {args.channels} x float64", *timed(recurrence(args.channels, np.float64), args.repeat)),
+        (f"recurrence, {args.channels} x float32", *timed(recurrence(args.channels, np.float32), args.repeat)),
+    ]
+
+    print(f"{len(time_array)} samples per channel, {args.cylinders} cylinders")
+    print(f"{'generator':<26} {'seconds':>8} {'Msamples/s':>11} {'MB':>8} {'max diff':>10}")
+    for name, seconds, vibration in runs:
+        rate = vibration.size / seconds / 1e6
+        diff = f"{np.abs(vibration[0] - reference).max():10.2e}" if len(vibration) == 1 else f"{'-':>10}"
+        print(f"{name:<26} {seconds:8.3f} {rate:11.1f} {vibration.nbytes / 2**20:8.1f} {diff}")
+
+
+if __name__ == "__main__":
+    main()
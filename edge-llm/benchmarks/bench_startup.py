@@ -0,0 +1,119 @@
+"""Cold start of the server: import time of src.api and time until it is live and ready.
+
+Import: `python -X importtime -c "import src.api"` in a fresh interpreter,
+--runs times. Prints the median total and the self time summed per top-level
+package, the libraries that dominate the import graph.
+
+Serve: uvicorn started as main.py does, polled until /api/health/live
+answers (the port is bound) and until /api/health reports the background
+warm-up done.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ENV = {
+    **os.environ,
+    "EDGE_LLM_DB_PATH": os.path.join("/tmp", "bench_edge_llm_db.sqlite3"),
+    "EDGE_LLM_LEGACY_DB_PATH": os.path.join("/tmp", "bench_edge_llm_db.json"),
+}
+
+
+def import_times() -> tuple:
+    """Total import time of src.api and self time per top-level package, in seconds."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.api"], cwd=ROOT, env=ENV,
+                            capture_output=True, text=True, check=True)
+    total = 0.0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            own, cumulative, name = line[len("import time:"):].split("|")
+            own, cumulative = int(own) / 1e6, int(cumulative) / 1e6
+        except ValueError:
+            continue  # the header line
+        name = name.strip()
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + own
+        if name == "src.api":
+            total = cumulative
+    return total, packages
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, deadline: float):
+    """Seconds until `url` answers 200, None when the deadline passes first."""
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.monotonic()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def serve_times(timeout: float) -> tuple:
+    port = free_port()
+    start = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-c", f"import uvicorn; uvicorn.run('src.api:app', host='127.0.0.1', port={port}, "
+                               f"log_level='warning')"],
+        cwd=ROOT, env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        live = wait_for(f"http://127.0.0.1:{port}/api/health/live", deadline)
+        ready = wait_for(f"http://127.0.0.1:{port}/api/health", deadline) if live else None
+    finally:
+        server.terminate()
+        server.wait()
+    return (live - start if live else None), (ready - start if ready else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages listed by import time")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the server")
+    args = parser.parse_args()
+
+    totals = []
+    packages = {}
+    for _ in range(args.runs):
+        total, run_packages = import_times()
+        totals.append(total)
+        for package, own in run_packages.items():
+            packages.setdefault(package, []).append(own)
+    print(f"import src.api: median {statistics.median(totals):.3f} s, min {min(totals):.3f} s")
+    for package, times in sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[:args.top]:
+        print(f"  {package:<24} {statistics.median(times):.3f} s")
+
+    lives, readies = [], []
+    for _ in range(args.runs):
+        live, ready = serve_times(args.timeout)
+        if live is not None:
+            lives.append(live)
+        if ready is not None:
+            readies.append(ready)
+    print(f"live (port bound): {statistics.median(lives):.3f} s" if lives else "live: timed out")
+    print(f"ready (warm-up done): {statistics.median(readies):.3f} s" if readies else "ready: timed out")
+
+
+if __name__ == "__main__":
+    main()
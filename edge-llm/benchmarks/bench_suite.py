@@ -0,0 +1,382 @@
+"""Benchmark suite over the signal, analysis and serving paths, compared against a saved baseline.
+
+In process, for every --sampling-freqs x --durations: trace generation
+(generate_engine_vibration_data), knock injection (add_knock_to_signal),
+the plot (plotting.render_plot), feature extraction (process_vibration_data)
+and the prompt (create_llm_prompt), then the document store operations on a
+scratch database. Served: uvicorn started as main.py does against the stub
+Ollama, then GET /api/engine-vibration and /ws textGeneration, chat and
+engineAnalysis round trips, timed from the client.
+
+Each case runs once to warm up and then --repeat times. Results are written
+as JSON with a fingerprint of the machine. --baseline compares the median of
+every case with an earlier results file and exits with 1 when one is slower
+by more than --tolerance, --save-baseline writes the baseline instead.
+
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --tolerance 0.15
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.stub_ollama import start_stub_server  # noqa: E402
+from benchmarks.bench_startup import ROOT, free_port, wait_for  # noqa: E402
+
+# the server modules read these on import, process pool workers import this script too
+SCRATCH = tempfile.mkdtemp(prefix="bench_suite_")
+os.environ.setdefault("EDGE_LLM_DB_PATH", os.path.join(SCRATCH, "db.sqlite3"))
+os.environ.setdefault("EDGE_LLM_LEGACY_DB_PATH", os.path.join(SCRATCH, "db.json"))
+os.environ.setdefault("EDGE_LLM_LOG_LEVEL", "WARNING")
+
+from src import api, plotting, vibration_formats, knock_classifier, fleet_analysis  # noqa: E402
+from src.db_manager import DocumentStore  # noqa: E402
+from src.vibration_sim import simulate_vibration, add_knock_to_signal  # noqa: E402
+
+GROUPS = ("signal", "db", "serve")
+# fingerprint fields that have to match for a comparison with the baseline to mean anything
+COMPARABLE = ("machine", "processor", "cpus", "python", "numpy")
+
+
+def summary(values: list) -> dict:
+    return {
+        "runs": len(values),
+        "min": min(values),
+        "median": statistics.median(values),
+        "mean": statistics.fmean(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """Seconds of `func` over `repeat` runs after one warm-up run.
+
+    `setup` runs untimed before every run and its result is passed to
+    `func`. When `func` returns a dict of seconds, such as the time to the
+    first token, each of them is summarized next to the total.
+    """
+    samples = {}
+    for run in range(repeat + 1):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        extra = func(*args)
+        seconds = time.perf_counter() - start
+        if run == 0:
+            continue
+        samples.setdefault("seconds", []).append(seconds)
+        for key, value in (extra if isinstance(extra, dict) else {}).items():
+            samples.setdefault(key, []).append(value)
+    return {key: summary(values) for key, values in samples.items()}
+
+
+def fingerprint() -> dict:
+    """What the numbers depend on besides the code: hardware, interpreter, numpy and the commit."""
+    processor = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            match = re.search(r"^model name\s*:\s*(.+)$", f.read(), re.MULTILINE)
+        processor = match.group(1).strip() if match else processor
+    except OSError:
+        pass
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        memory = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "machine": platform.machine(),
+        "processor": processor,
+        "cpus": os.cpu_count(),
+        "memory_bytes": memory,
+        "system": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "commit": commit,
+        "dirty": dirty,
+    }
+
+
+def signal_cases(sampling_freq: int, duration: float, repeat: int) -> dict:
+    """Generation, knock, plot, features and prompt of one trace size."""
+    label = f"[{sampling_freq}Hz,{duration:g}s]"
+    params = {"sampling_freq": sampling_freq, "total_time": duration}
+    results = {}
+
+    results["generate" + label] = measure(lambda: api.generate_engine_vibration_data(**params), repeat)
+
+    df, trace_params = api.generate_engine_vibration_data(**params)
+    time_data, vibration = df["time"].to_numpy(), df["vibration"].to_numpy()
+    rpm, cylinders = trace_params["rpm"], trace_params["num_cylinders"]
+    cycle_freq = rpm / 60 / 2
+
+    def knock_setup():
+        np.random.seed(trace_params["random_seed"])
+        return (simulate_vibration(time_data, rpm, cylinders, trace_params["noise_level"])[0],)
+
+    def knock(base):
+        add_knock_to_signal(base, time_data, cycle_freq, cylinders,
+                            trace_params["knock_start_time"], trace_params["knock_probability_start"],
+                            trace_params["knock_probability_end"], trace_params["knock_intensity_start"],
+                            trace_params["knock_intensity_end"], trace_params["knock_resonant_freq"],
+                            trace_params["knock_damping"], sampling_freq)
+    results["knock" + label] = measure(knock, repeat, setup=knock_setup)
+
+    results["plot" + label] = measure(lambda: plotting.render_plot(time_data, vibration, trace_params), repeat)
+
+    engine_info = fleet_analysis.engine_info_from_params(trace_params)
+    firing_freq = engine_info["firing_frequency"]
+    results["features" + label] = measure(
+        lambda: api.process_vibration_data(None, vibration, sampling_freq, firing_freq), repeat)
+
+    features, _ = api.process_vibration_data(None, vibration, sampling_freq, firing_freq)
+    verdict = knock_classifier.classify_knock(features)
+    results["prompt" + label] = measure(lambda: api.create_llm_prompt(features, engine_info, verdict=verdict),
+                                        repeat)
+    return results
+
+
+def db_cases(docs: int, repeat: int) -> dict:
+    """DocumentStore operations on chat documents in a scratch database, `docs` of them per run."""
+    directory = tempfile.mkdtemp(prefix="bench_db_", dir=SCRATCH)
+    stores = []
+
+    def chat(i: int) -> dict:
+        return {"id": i, "type": "chat", "user": f"question {i} about the knock sensor " * 4}
+
+    def new_store(fill: bool = False):
+        store = DocumentStore(os.path.join(directory, f"{len(stores)}.sqlite3"))
+        stores.append(store)
+        if fill:
+            store.insert_many({str(i): chat(i) for i in range(1, docs + 1)})
+        return (store,)
+
+    def insert(store):
+        for i in range(1, docs + 1):
+            store.insert(chat(i), doc_id=i)
+        store.commit()
+
+    def upsert(store):
+        for i in range(1, docs + 1):
+            store.upsert({"bot": "no knock detected", "metrics": {"eval_count": 50}}, doc_id=i)
+        store.commit()
+
+    def get(store):
+        for i in range(1, docs + 1):
+            store.get(i)
+
+    try:
+        results = {
+            f"db_insert[{docs}]": measure(insert, repeat, setup=new_store),
+            f"db_upsert[{docs}]": measure(upsert, repeat, setup=lambda: new_store(fill=True)),
+        }
+        store, = new_store(fill=True)
+        results[f"db_get[{docs}]"] = measure(lambda: get(store), repeat)
+        results[f"db_search_type[{docs}]"] = measure(lambda: store.search_type("chat"), repeat)
+        results[f"db_latest_of_type[{docs}]"] = measure(lambda: store.latest_of_type("chat", 20), repeat)
+        return results
+    finally:
+        for store in stores:
+            store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class Server:
+    """uvicorn serving src.api:app in a subprocess, against the stub Ollama in this one."""
+
+    def __init__(self, stub_url: str, timeout: float):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        env = {
+            **os.environ,
+            "EDGE_LLM_OLLAMA_URL": stub_url,
+            "EDGE_LLM_DB_PATH": os.path.join(SCRATCH, "serve.sqlite3"),
+            "EDGE_LLM_LEGACY_DB_PATH": os.path.join(SCRATCH, "serve.json"),
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", f"import uvicorn; uvicorn.run('src.api:app', host='127.0.0.1', "
+                                   f"port={self.port}, log_level='warning')"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if wait_for(f"{self.url}/api/health", time.monotonic() + timeout) is None:
+            self.close()
+            raise RuntimeError(f"Server did not get ready within {timeout} s")
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def round_trip(websocket, message, mark: str = "part") -> dict:
+    """Send a job and read its frames until the last, seconds to the first frame carrying `mark` returned."""
+    start = time.perf_counter()
+    websocket.send(message)
+    first = None
+    while True:
+        frame = json.loads(websocket.recv())
+        if "error" in frame or frame.get("status") == -1:
+            raise RuntimeError(f"Job failed: {frame.get('error', frame)}")
+        if first is None and mark in frame:
+            first = time.perf_counter() - start
+        if frame.get("done") or frame.get("status") == 1:
+            return {mark: first if first is not None else time.perf_counter() - start}
+
+
+def serve_cases(sweep: list, repeat: int, tokens: int, token_delay: float, timeout: float) -> dict:
+    from websockets.sync.client import connect
+
+    stub, stub_url = start_stub_server(tokens=tokens, token_delay=token_delay)
+    server = Server(stub_url, timeout)
+    results = {}
+    # a new seed every request, so the dataset cache misses and the trace is generated each time
+    seeds = iter(range(1000, 10 ** 9))
+    try:
+        for sampling_freq, duration in sweep:
+            def get_vibration():
+                query = f"sampling_freq={sampling_freq}&total_time={duration}&format=binary&random_seed={next(seeds)}"
+                with urllib.request.urlopen(f"{server.url}/api/engine-vibration?{query}") as response:
+                    response.read()
+            results[f"http_vibration[{sampling_freq}Hz,{duration:g}s]"] = measure(get_vibration, repeat)
+
+        with connect(f"ws://127.0.0.1:{server.port}/ws", max_size=None) as websocket:
+            generate = json.dumps({"opr": "textGeneration", "prompt": "Describe engine knock in one paragraph."})
+            results["ws_text_generation"] = measure(lambda: round_trip(websocket, generate), repeat)
+
+            chat_ids = iter(range(time.time_ns() // 1000, 10 ** 18))
+
+            def chat():
+                chat_id = next(chat_ids)
+                request = urllib.request.Request(
+                    f"{server.url}/api/db", method="POST", headers={"Content-Type": "application/json"},
+                    data=json.dumps({"opr": "add", "data": {"id": chat_id, "type": "chat",
+                                                            "user": "Is a crest factor of 4 a concern?"}}).encode())
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                return round_trip(websocket, json.dumps({"opr": "chat", "id": chat_id}))
+            results["ws_chat"] = measure(chat, repeat)
+
+            for sampling_freq, duration in sweep:
+                _, vibration, params = api.vibration_sim.generate_vibration_arrays(
+                    sampling_freq=sampling_freq, total_time=duration)
+                header = {"opr": "engineAnalysis", "id": "bench", "params": params,
+                          # the narrative goes to the model even for a clear-cut verdict, never from the cache
+                          "parameters": {"narrative": True, "cache": False},
+                          "dtype": vibration_formats.DTYPES["float32"], "columns": ["vibration"]}
+                message = (vibration_formats.pack_frame(json.dumps(header).encode())
+                           + vibration_formats.pack_frame(vibration.astype("<f4").tobytes()))
+                results[f"ws_engine_analysis[{sampling_freq}Hz,{duration:g}s]"] = measure(
+                    lambda: round_trip(websocket, message, mark="verdict"), repeat)
+    finally:
+        server.close()
+        stub.shutdown()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """Print the median of every case against the baseline, returns the cases slower than the tolerance.
+
+    A case also has to be `min_delta` seconds slower, the sub-millisecond
+    ones vary by more than any sensible tolerance from run to run.
+    """
+    mismatched = [key for key in COMPARABLE
+                  if baseline["fingerprint"].get(key) != results["fingerprint"].get(key)]
+    if mismatched:
+        print(f"warning: the baseline was recorded with a different {', '.join(mismatched)}, "
+              f"differences may not be regressions")
+    print(f"{'case':<40} {'baseline s':>11} {'now s':>11} {'ratio':>7}")
+    regressions = []
+    for name, result in results["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            print(f"{name:<40} {'-':>11} {result['seconds']['median']:11.5f} {'new':>7}")
+            continue
+        before, now = reference["seconds"]["median"], result["seconds"]["median"]
+        ratio = now / before if before > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance and now - before > min_delta:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40} {before:11.5f} {now:11.5f} {ratio:7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sampling-freqs", default="1000,10000,20000", help="comma separated, in Hz")
+    parser.add_argument("--durations", default="10,60", help="comma separated, in seconds")
+    parser.add_argument("--groups", default=",".join(GROUPS), help=f"comma separated subset of {', '.join(GROUPS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db-docs", type=int, default=1000, help="documents written and read per db run")
+    parser.add_argument("--tokens", type=int, default=200, help="tokens the stub Ollama answers with")
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the server")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with this results file, exit 1 on a regression")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="fraction a median may grow over the baseline before it counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.001,
+                        help="seconds a median has to grow by as well to count as a regression")
+    args = parser.parse_args()
+
+    groups = args.groups.split(",")
+    sweep = [(int(rate), float(duration)) for rate in args.sampling_freqs.split(",")
+             for duration in args.durations.split(",")]
+    results = {
+        "fingerprint": fingerprint(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("output", "baseline", "save_baseline", "tolerance", "min_delta")},
+        "cases": {},
+    }
+    try:
+        if "signal" in groups:
+            for sampling_freq, duration in sweep:
+                results["cases"].update(signal_cases(sampling_freq, duration, args.repeat))
+        if "db" in groups:
+            results["cases"].update(db_cases(args.db_docs, args.repeat))
+        if "serve" in groups:
+            results["cases"].update(serve_cases(sweep, args.repeat, args.tokens, args.token_delay, args.timeout))
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        return
+
+    print(f"{'case':<40} {'median s':>11} {'min s':>11} {'stdev s':>11}  other medians")
+    for name, result in results["cases"].items():
+        seconds = result["seconds"]
+        other = ", ".join(f"{key} {value['median']:.5f} s" for key, value in result.items() if key != "seconds")
+        print(f"{name:<40} {seconds['median']:11.5f} {seconds['min']:11.5f} {seconds['stdev']:11.5f}  {other}")
+
+
+if __name__ == "__main__":
+    main()
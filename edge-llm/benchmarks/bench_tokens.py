@@ -0,0 +1,102 @@
+"""Token streaming benchmark, frames and bytes a long answer takes on the WebSocket.
+
+Feeds --tokens fake tokens, one every --token-delay seconds, to a
+WebSocket stand-in in three ways: the old chat frames carrying the whole
+message so far, one delta frame per token, and TokenStream coalescing at
+--flush-ms / --flush-bytes. Reports frames, frames per second, bytes and the
+time spent encoding and sending.
+
+    python benchmarks/bench_tokens.py --tokens 2000 --token-delay 0.002
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.token_stream import TokenStream  # noqa: E402
+
+
+class CountingWebSocket:
+    """Counts what would go on the wire, and keeps the text so the answers can be compared."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.parts = []
+
+    async def send_text(self, frame: str):
+        self.frames += 1
+        self.bytes += len(frame)
+        self.parts.append(json.loads(frame).get("part", ""))
+
+
+def fake_tokens(count: int) -> list:
+    words = ("the ", "knock ", "sensor ", "reading ", "shows ", "a ", "crest ", "factor ", "of ", "4.2", ", ", "so ")
+    return [words[i % len(words)] for i in range(count)]
+
+
+async def cumulative(websocket, tokens, delay, **_):
+    message = ""
+    for token in tokens:
+        message += token
+        await websocket.send_text(json.dumps({"id": 1, "part": message, "status": 0}))
+        await asyncio.sleep(delay)
+    return websocket.parts[-1]
+
+
+async def per_token(websocket, tokens, delay, **_):
+    for token in tokens:
+        await websocket.send_text(json.dumps({"id": 1, "part": token, "status": 0}))
+        await asyncio.sleep(delay)
+    return "".join(websocket.parts)
+
+
+async def coalesced(websocket, tokens, delay, flush_ms, flush_bytes):
+    stream = TokenStream(websocket, {"id": 1, "status": 0}, flush_ms=flush_ms, flush_bytes=flush_bytes)
+    for token in tokens:
+        await stream.write(token)
+        await asyncio.sleep(delay)
+    await stream.flush()
+    stream.close()
+    return "".join(websocket.parts)
+
+
+async def bench(mode, tokens, delay, flush_ms, flush_bytes) -> dict:
+    websocket = CountingWebSocket()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    answer = await mode(websocket, tokens, delay, flush_ms=flush_ms, flush_bytes=flush_bytes)
+    cpu = time.process_time() - cpu_start
+    duration = time.perf_counter() - start
+    return {
+        "frames": websocket.frames,
+        "frames_per_second": websocket.frames / duration,
+        "bytes": websocket.bytes,
+        "cpu": cpu,
+        "complete": answer == "".join(tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--flush-ms", type=float, default=30)
+    parser.add_argument("--flush-bytes", type=int, default=256)
+    args = parser.parse_args()
+
+    tokens = fake_tokens(args.tokens)
+    print(f"{args.tokens} tokens, one every {args.token_delay * 1000:g} ms")
+    print(f"{'mode':<20} {'frames':>7} {'frames/s':>9} {'bytes':>12} {'cpu s':>7}  complete")
+    for name, mode in (("whole message", cumulative), ("delta per token", per_token), ("coalesced", coalesced)):
+        result = asyncio.run(bench(mode, tokens, args.token_delay, args.flush_ms, args.flush_bytes))
+        print(f"{name:<20} {result['frames']:7d} {result['frames_per_second']:9.1f} {result['bytes']:12d} "
+              f"{result['cpu']:7.3f}  {result['complete']}")
+
+
+if __name__ == "__main__":
+    main()
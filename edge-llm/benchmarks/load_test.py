@@ -0,0 +1,394 @@
+"""Load test of the /ws endpoint with many concurrent clients.
+
+Starts the stub Ollama and the server, as main.py does, in processes of
+their own, then opens --clients WebSocket connections. Each sends
+--messages jobs one after the other, drawn from --mix, weights of the chat,
+textGeneration and engineAnalysis oprs. Reports per opr the p50/p95/p99 of
+the time to the first model token and to the last frame, the error rate,
+and the resident memory and thread count of the server sampled during the
+run. --url targets a server that is already running instead, without the
+process figures.
+
+Engines have --channels sensors from generate_channel_arrays. An
+engineAnalysis job sends one sensor of the engine. --stream-engines feeds
+that many engines, every sensor as a stream of its own, into /ws/stream
+at the real sample rate while the clients run, and reports the samples
+ingested and the alerts raised.
+
+    python benchmarks/load_test.py --clients 50 --messages 5 --token-delay 0.02
+    python benchmarks/load_test.py --mix chat=3,engineAnalysis=1 --first-token-delay 0.5 --json load.json
+    python benchmarks/load_test.py --clients 20 --stream-engines 8 --channels 4 --sampling-freq 10000
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.bench_startup import ROOT, free_port, wait_for  # noqa: E402
+from src import vibration_formats  # noqa: E402
+from src.vibration_sim import generate_channel_arrays  # noqa: E402
+
+OPRS = ("chat", "textGeneration", "engineAnalysis")
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(mix: str) -> dict:
+    """{opr: weight} from `opr=weight,opr=weight`."""
+    weights = {}
+    for entry in mix.split(","):
+        opr, _, weight = entry.partition("=")
+        if opr.strip() not in OPRS:
+            raise ValueError(f"Unknown opr {opr.strip()!r}, expected one of {', '.join(OPRS)}")
+        weights[opr.strip()] = float(weight or 1)
+    return weights
+
+
+def process_stats(pid: int) -> dict:
+    """Resident memory in bytes and thread count of a process and its children, from /proc."""
+    stats = {"rss": 0, "threads": 0, "children_rss": 0}
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    for index, process in enumerate(pids):
+        try:
+            with open(f"/proc/{process}/status") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        rss = int(fields.get("VmRSS", "0 kB").split()[0]) * 1024
+        if index == 0:
+            stats["rss"] = rss
+            stats["threads"] = int(fields.get("Threads", 0))
+        else:
+            stats["children_rss"] += rss
+    return stats
+
+
+class ProcessSampler:
+    """Samples process_stats of the server every `interval` seconds, keeps the first, peak and last."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+
+    async def run(self):
+        while True:
+            self.samples.append(process_stats(self.pid))
+            await asyncio.sleep(self.interval)
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {}
+        return {key: {"start": self.samples[0][key], "peak": max(sample[key] for sample in self.samples),
+                      "end": self.samples[-1][key]}
+                for key in self.samples[0]}
+
+
+def binary_message(header: dict, samples) -> bytes:
+    """A float32 vibration column behind a JSON header, as the frontend and sensors send it."""
+    header = {**header, "dtype": vibration_formats.DTYPES["float32"], "columns": ["vibration"]}
+    return (vibration_formats.pack_frame(json.dumps(header).encode())
+            + vibration_formats.pack_frame(samples.astype("<f4").tobytes()))
+
+
+def engine_messages(vibration, params: dict, narrative: bool) -> list:
+    """An engineAnalysis message for each sensor of an engine."""
+    header = {"opr": "engineAnalysis", "id": "load", "params": params,
+              # without a narrative a clear-cut trace is answered by the rule engine and never reaches the model
+              "parameters": {"narrative": narrative, "cache": False}}
+    return [binary_message(header, channel) for channel in vibration]
+
+
+async def sensor_feed(index: int, args, stream_url: str, vibration, params: dict, done: asyncio.Event,
+                      stats: dict):
+    """Send every sensor of an engine to /ws/stream in --stream-chunk pieces at the sample rate until `done`.
+
+    The trace starts over when it runs out. Alerts and errors coming back
+    are counted by a reader alongside.
+    """
+    import websockets
+
+    chunk = max(1, min(int(args.stream_chunk * params["sampling_freq"]), vibration.shape[1]))
+    interval = chunk / params["sampling_freq"]
+
+    async def read(websocket):
+        async for frame in websocket:
+            frame = json.loads(frame)
+            if "alert" in frame:
+                stats["alerts"] += 1
+            elif "error" in frame:
+                stats["errors"] += 1
+                stats["error_messages"][frame["error"]] = stats["error_messages"].get(frame["error"], 0) + 1
+
+    try:
+        websocket = await websockets.connect(stream_url, max_size=None, open_timeout=args.timeout)
+    except Exception as e:
+        stats["errors"] += 1
+        stats["error_messages"][f"connect: {e}"] = stats["error_messages"].get(f"connect: {e}", 0) + 1
+        return
+    reader = asyncio.create_task(read(websocket))
+    position = 0
+    next_send = time.perf_counter()
+    try:
+        while not done.is_set():
+            for channel, samples in enumerate(vibration):
+                header = {"engine_id": f"load{index}-ch{channel}"}
+                if position == 0:
+                    header["params"] = params
+                await websocket.send(binary_message(header, samples[position:position + chunk]))
+                stats["messages"] += 1
+                stats["samples"] += chunk
+            position = position + chunk if position + 2 * chunk <= vibration.shape[1] else 0
+            next_send += interval
+            # a feed that cannot keep up sends at once instead of sleeping, the shortfall shows in samples/s
+            await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+    finally:
+        reader.cancel()
+        await websocket.close()
+
+
+async def add_chat(http, url: str, chat_id: int):
+    """Store the question first, the chat job reads it from the database as the frontend's does."""
+    response = await http.post(f"{url}/api/db", json={"opr": "add", "data": {
+        "id": chat_id, "type": "chat", "user": "Is a crest factor of 4 on cylinder 3 a concern?"}})
+    response.raise_for_status()
+
+
+async def run_job(websocket, opr: str, message, timeout: float) -> dict:
+    """Send one job and read its frames up to the last, the time to the first model text and to the end.
+
+    The first frames of an engine analysis are progress notes and the rule
+    based verdict, its model text starts after the verdict.
+    """
+    start = time.perf_counter()
+    await websocket.send(message)
+    first_token = None
+    model_text = opr != "engineAnalysis"
+    while True:
+        frame = json.loads(await asyncio.wait_for(websocket.recv(), timeout))
+        if "error" in frame or frame.get("status") == -1:
+            raise RuntimeError(frame.get("error", "job failed"))
+        if "verdict" in frame:
+            model_text = True
+        elif model_text and first_token is None and frame.get("part"):
+            first_token = time.perf_counter() - start
+        if frame.get("done") or frame.get("status") == 1:
+            return {"first_token": first_token, "completion": time.perf_counter() - start}
+
+
+async def client(index: int, args, ws_url: str, http_url: str, http, weights: dict, engine: list,
+                 results: list, chat_ids):
+    import websockets
+
+    rng = random.Random(args.seed + index)
+    oprs, opr_weights = list(weights), list(weights.values())
+    await asyncio.sleep(args.ramp * index / max(args.clients - 1, 1))
+    try:
+        websocket = await websockets.connect(ws_url, max_size=None, open_timeout=args.timeout)
+    except Exception as e:
+        results.extend({"opr": opr, "error": f"connect: {e}"} for opr in rng.choices(oprs, opr_weights,
+                                                                                     k=args.messages))
+        return
+    try:
+        for _ in range(args.messages):
+            opr = rng.choices(oprs, opr_weights)[0]
+            try:
+                if opr == "chat":
+                    chat_id = next(chat_ids)
+                    await add_chat(http, http_url, chat_id)
+                    message = json.dumps({"opr": "chat", "id": chat_id})
+                elif opr == "textGeneration":
+                    message = json.dumps({"opr": "textGeneration", "prompt": "Describe engine knock briefly."})
+                else:
+                    message = rng.choice(engine)
+                results.append({"opr": opr, **await run_job(websocket, opr, message, args.timeout)})
+            except Exception as e:
+                results.append({"opr": opr, "error": f"{type(e).__name__}: {e}"})
+                if websocket.close_code is not None:
+                    break
+            if args.think_time:
+                await asyncio.sleep(rng.expovariate(1 / args.think_time))
+    finally:
+        await websocket.close()
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": float(value) for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def report(results: list, duration: float) -> dict:
+    """Latency percentiles, error rate and throughput per opr and over all jobs."""
+    summary = {}
+    for opr in [*OPRS, "all"]:
+        jobs = [job for job in results if opr in ("all", job["opr"])]
+        if not jobs:
+            continue
+        done = [job for job in jobs if "error" not in job]
+        errors = {}
+        for job in jobs:
+            if "error" in job:
+                errors[job["error"]] = errors.get(job["error"], 0) + 1
+        summary[opr] = {
+            "jobs": len(jobs),
+            "errors": len(jobs) - len(done),
+            "error_rate": (len(jobs) - len(done)) / len(jobs),
+            "jobs_per_second": len(done) / duration,
+            "first_token": percentiles([job["first_token"] for job in done if job["first_token"] is not None]),
+            "completion": percentiles([job["completion"] for job in done]),
+            # the most frequent first, so a flood of one kind is easy to spot
+            "error_messages": dict(sorted(errors.items(), key=lambda item: -item[1])[:5]),
+        }
+    return summary
+
+
+async def load(args, ws_url: str, http_url: str, server_pid) -> dict:
+    import httpx
+
+    weights = parse_mix(args.mix)
+    _, vibration, params = generate_channel_arrays(channels=args.channels, sampling_freq=args.sampling_freq,
+                                                   total_time=args.duration)
+    engine = engine_messages(vibration, params, not args.no_narrative)
+    chat_ids = iter(range(time.time_ns() // 1000, 10 ** 18))
+    results = []
+    stream = {"messages": 0, "samples": 0, "alerts": 0, "errors": 0, "error_messages": {}}
+    sampler = ProcessSampler(server_pid) if server_pid else None
+    sampling = asyncio.create_task(sampler.run()) if sampler else None
+    limits = httpx.Limits(max_connections=max(args.clients, 1))
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as http:
+        start = time.perf_counter()
+        done = asyncio.Event()
+        feeds = [asyncio.create_task(sensor_feed(i, args, ws_url + "/stream", vibration, params, done, stream))
+                 for i in range(args.stream_engines)]
+        await asyncio.gather(*(client(i, args, ws_url, http_url, http, weights, engine, results, chat_ids)
+                               for i in range(args.clients)),
+                             asyncio.sleep(args.stream_seconds if feeds else 0))
+        done.set()
+        await asyncio.gather(*feeds)
+        duration = time.perf_counter() - start
+        try:
+            scheduler = (await http.get(f"{http_url}/api/scheduler")).json()
+        except (httpx.HTTPError, ValueError):
+            scheduler = None
+    if sampling:
+        sampler.samples.append(process_stats(server_pid))
+        sampling.cancel()
+    return {
+        "settings": {key: value for key, value in vars(args).items() if key != "json"},
+        "duration": duration,
+        "oprs": report(results, duration),
+        "stream": {**stream, "samples_per_second": stream["samples"] / duration,
+                   "target_samples_per_second": args.stream_engines * args.channels * args.sampling_freq},
+        "server": sampler.summary() if sampler else {},
+        "scheduler": scheduler,
+    }
+
+
+def print_report(result: dict):
+    print(f"{result['settings']['clients']} clients, {result['duration']:.1f} s")
+    print(f"{'opr':<16} {'jobs':>6} {'errors':>7} {'jobs/s':>8}   {'first token p50/p95/p99 s':<27} "
+          f"{'completion p50/p95/p99 s':<27}")
+
+    def triple(values):
+        return "/".join(f"{value:.3f}" if value is not None else "-" for value in values.values())
+
+    for opr, summary in result["oprs"].items():
+        print(f"{opr:<16} {summary['jobs']:6d} {summary['error_rate']:7.1%} {summary['jobs_per_second']:8.2f}   "
+              f"{triple(summary['first_token']):<27} {triple(summary['completion']):<27}")
+        for message, count in summary["error_messages"].items():
+            print(f"    {count} x {message}")
+    stream = result["stream"]
+    if stream["messages"] or stream["errors"]:
+        print(f"sensor streams: {stream['messages']} messages, {stream['samples_per_second']:.0f} of "
+              f"{stream['target_samples_per_second']} samples/s, {stream['alerts']} alerts, {stream['errors']} errors")
+        for message, count in sorted(stream["error_messages"].items(), key=lambda item: -item[1])[:5]:
+            print(f"    {count} x {message}")
+    server = result["server"]
+    if server:
+        print(f"server RSS {server['rss']['start'] / 2**20:.0f} MB at start, {server['rss']['peak'] / 2**20:.0f} MB "
+              f"peak, process pool {server['children_rss']['peak'] / 2**20:.0f} MB peak")
+        print(f"server threads {server['threads']['start']} at start, {server['threads']['peak']} peak, "
+              f"{server['threads']['end']} at the end")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=5, help="jobs each client sends one after the other")
+    parser.add_argument("--mix", default="chat=1,textGeneration=1,engineAnalysis=1", help="weights of the oprs")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which the clients connect")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds a client waits between jobs")
+    parser.add_argument("--tokens", type=int, default=50, help="tokens the stub Ollama answers with")
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.1)
+    parser.add_argument("--sampling-freq", type=int, default=1000, help="of the engine traces")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of the engine traces")
+    parser.add_argument("--channels", type=int, default=4, help="sensors per engine")
+    parser.add_argument("--stream-engines", type=int, default=0, help="engines feeding /ws/stream")
+    parser.add_argument("--stream-chunk", type=float, default=0.1, help="seconds of samples per stream message")
+    parser.add_argument("--stream-seconds", type=float, default=0.0,
+                        help="feed the streams at least this long, also with no clients")
+    parser.add_argument("--no-narrative", action="store_true",
+                        help="let the rule engine answer clear-cut engine analyses without the model")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for a frame")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="base URL of a running server instead of starting one, such as "
+                                      "http://127.0.0.1:8081")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        if args.url:
+            http_url, server_pid = args.url.rstrip("/"), None
+        else:
+            stub_port, port = free_port(), free_port()
+            processes.append(subprocess.Popen(
+                [sys.executable, os.path.join(ROOT, "benchmarks", "stub_ollama.py"), "--port", str(stub_port),
+                 "--tokens", str(args.tokens), "--token-delay", str(args.token_delay),
+                 "--first-token-delay", str(args.first_token_delay)],
+                stdout=subprocess.DEVNULL))
+            env = {
+                **os.environ,
+                "EDGE_LLM_OLLAMA_URL": f"http://127.0.0.1:{stub_port}",
+                "EDGE_LLM_DB_PATH": os.path.join("/tmp", "load_test_edge_llm_db.sqlite3"),
+                "EDGE_LLM_LEGACY_DB_PATH": os.path.join("/tmp", "load_test_edge_llm_db.json"),
+                "EDGE_LLM_LOG_LEVEL": os.environ.get("EDGE_LLM_LOG_LEVEL", "WARNING"),
+            }
+            server = subprocess.Popen(
+                [sys.executable, "-c", f"import uvicorn; uvicorn.run('src.api:app', host='127.0.0.1', "
+                                       f"port={port}, log_level='warning')"],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            processes.append(server)
+            http_url, server_pid = f"http://127.0.0.1:{port}", server.pid
+            if wait_for(f"{http_url}/api/health", time.monotonic() + 60) is None:
+                sys.exit("Server did not get ready within 60 s")
+        ws_url = http_url.replace("http", "ws", 1) + "/ws"
+        result = asyncio.run(load(args, ws_url, http_url, server_pid))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Minimal stand-in for the Ollama HTTP API used by the benchmarks.
+
+Serves /api/tags, /api/generate and /api/chat with a streamed NDJSON body of
+fake tokens. Token count and latencies are tunable so the serving path can be
+measured without a model on the machine.
+
+    python benchmarks/stub_ollama.py --port 11434 --tokens 200 --token-delay 0.02
+"""
+import json
+import time
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    tokens = 50
+    token_delay = 0.0
+    first_token_delay = 0.0
+
+    def setup(self):
+        super().setup()
+        # Ollama is a Go server, which disables Nagle on every connection
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            self.send_error(404)
+            return
+        body = json.dumps({"models": [{"name": "qwen3:1.7b"}, {"name": "gemma3:1b"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path not in ("/api/generate", "/api/chat"):
+            self.send_error(404)
+            return
+        chat = self.path == "/api/chat"
+        prompt = json.dumps(request.get("messages") if chat else request.get("prompt", ""))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        start = time.perf_counter_ns()
+        time.sleep(self.first_token_delay)
+        for i in range(self.tokens):
+            if i:
+                time.sleep(self.token_delay)
+            self._send_part(chat, request, f"tok{i} ", False)
+        self._send_part(chat, request, "", True, {
+            "total_duration": time.perf_counter_ns() - start,
+            "load_duration": 0,
+            "prompt_eval_count": len(prompt) // 4,
+            "prompt_eval_duration": int(self.first_token_delay * 1e9),
+            "eval_count": self.tokens,
+            "eval_duration": int(self.token_delay * self.tokens * 1e9),
+            "context": [1, 2, 3],
+        })
+        self._write_chunk(b"")
+
+    def _send_part(self, chat, request, text, done, extra=None):
+        body = {"model": request.get("model"), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+        if chat:
+            body["message"] = {"role": "assistant", "content": text}
+        else:
+            body["response"] = text
+        body.update(extra or {})
+        self._write_chunk(json.dumps(body).encode() + b"\n")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub_server(port: int = 0, tokens: int = 50, token_delay: float = 0.0,
+                      first_token_delay: float = 0.0):
+    """Start the stub on a background thread and return (server, base_url)."""
+    handler = type("Handler", (StubOllamaHandler,), {
+        "tokens": tokens,
+        "token_delay": token_delay,
+        "first_token_delay": first_token_delay,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.tokens, args.token_delay, args.first_token_delay)
+    print(f"Stub Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -76,7 +76,7 @@ Error generating stack: `+a.message+`
 `)}get[Symbol.toStringTag](){return"AxiosHeaders"}static from(t){return t instanceof this?t:new this(t)}static concat(t,...n){const r=new this(t);return n.forEach(i=>r.set(i)),r}static accessor(t){const r=(this[N_]=this[N_]={accessors:{}}).accessors,i=this.prototype;function a(s){const l=go(s);r[l]||(KP(i,s),r[l]=!0)}return A.isArray(t)?t.forEach(a):a(t),this}}gn.accessor(["Content-Type","Content-Length","Accept","Accept-Encoding","User-Agent","Authorization"]);A.reduceDescriptors(gn.prototype,({value:e},t)=>{let n=t[0].toUpperCase()+t.slice(1);return{get:()=>e,set(r){this[n]=r}}});A.freezeMethods(gn);function jf(e,t){const n=this||Ml,r=t||n,i=gn.from(r.headers);let a=r.data;return A.forEach(e,function(l){a=l.call(n,a,i.normalize(),t?t.status:void 0)}),i.normalize(),a}function xx(e){return!!(e&&e.__CANCEL__)}function Js(e,t,n){ge.call(this,e??"canceled",ge.ERR_CANCELED,t,n),this.name="CanceledError"}A.inherits(Js,ge,{__CANCEL__:!0});function Ex(e,t,n){const r=n.config.validateStatus;!n.status||!r||r(n.status)?e(n):t(new ge("Request failed with status code "+n.status,[ge.ERR_BAD_REQUEST,ge.ERR_BAD_RESPONSE][Math.floor(n.status/100)-4],n.config,n.request,n))}function QP(e){const t=/^([-+\w]{1,25})(:?\/\/|:)/.exec(e);return t&&t[1]||""}function ZP(e,t){e=e||10;const n=new Array(e),r=new Array(e);let i=0,a=0,s;return t=t!==void 0?t:1e3,function(c){const u=Date.now(),d=r[a];s||(s=u),n[i]=c,r[i]=u;let f=a,h=0;for(;f!==i;)h+=n[f++],f=f%e;if(i=(i+1)%e,i===a&&(a=(a+1)%e),u-s<t)return;const v=d&&u-d;return v?Math.round(h*1e3/v):void 0}}function XP(e,t){let n=0,r=1e3/t,i,a;const s=(u,d=Date.now())=>{n=d,i=null,a&&(clearTimeout(a),a=null),e.apply(null,u)};return[(...u)=>{const d=Date.now(),f=d-n;f>=r?s(u,d):(i=u,a||(a=setTimeout(()=>{a=null,s(i)},r-f)))},()=>i&&s(i)]}const Ru=(e,t,n=3)=>{let r=0;const i=ZP(50,250);return XP(a=>{const s=a.loaded,l=a.lengthComputable?a.total:void 0,c=s-r,u=i(c),d=s<=l;r=s;const f={loaded:s,total:l,progress:l?s/l:void 0,bytes:c,rate:u||void 0,estimated:u&&l&&d?(l-s)/u:void 0,event:a,lengthComputable:l!=null,[t?"download":"upload"]:!0};e(f)},n)},j_=(e,t)=>{const n=e!=null;return[r=>t[0]({lengthComputable:n,total:e,loaded:r}),t[1]]},R_=e=>(...t)=>A.asap(()=>e(...t)),JP=mn.hasStandardBrowserEnv?function(){const t=mn.navigator&&/(msie|trident)/i.test(mn.navigator.userAgent),n=document.createElement("a");let r;function i(a){let s=a;return t&&(n.setAttribute("href",s),s=n.href),n.setAttribute("href",s),{href:n.href,protocol:n.protocol?n.protocol.replace(/:$/,""):"",host:n.host,search:n.search?n.search.replace(/^\?/,""):"",hash:n.hash?n.hash.replace(/^#/,""):"",hostname:n.hostname,port:n.port,pathname:n.pathname.charAt(0)==="/"?n.pathname:"/"+n.pathname}}return r=i(window.location.href),function(s){const l=A.isString(s)?i(s):s;return l.protocol===r.protocol&&l.host===r.host}}():function(){return function(){return!0}}(),YP=mn.hasStandardBrowserEnv?{write(e,t,n,r,i,a){const s=[e+"="+encodeURIComponent(t)];A.isNumber(n)&&s.push("expires="+new Date(n).toGMTString()),A.isString(r)&&s.push("path="+r),A.isString(i)&&s.push("domain="+i),a===!0&&s.push("secure"),document.cookie=s.join("; ")},read(e){const t=document.cookie.match(new RegExp("(^|;\\s*)("+e+")=([^;]*)"));return t?decodeURIComponent(t[3]):null},remove(e){this.write(e,"",Date.now()-864e5)}}:{write(){},read(){return null},remove(){}};function eO(e){return/^([a-z][a-z\d+\-.]*:)?\/\//i.test(e)}function tO(e,t){return t?e.replace(/\/?\/$/,"")+"/"+t.replace(/^\/+/,""):e}function kx(e,t){return e&&!eO(t)?tO(e,t):t}const P_=e=>e instanceof gn?{...e}:e;function za(e,t){t=t||{};const n={};function r(u,d,f){return A.isPlainObject(u)&&A.isPlainObject(d)?A.merge.call({caseless:f},u,d):A.isPlainObject(d)?A.merge({},d):A.isArray(d)?d.slice():d}function i(u,d,f){if(A.isUndefined(d)){if(!A.isUndefined(u))return r(void 0,u,f)}else return r(u,d,f)}function a(u,d){if(!A.isUndefined(d))return r(void 0,d)}function s(u,d){if(A.isUndefined(d)){if(!A.isUndefined(u))return r(void 0,u)}else return r(void 0,d)}function l(u,d,f){if(f in t)return r(u,d);if(f in e)return r(void 0,u)}const c={url:a,method:a,data:a,baseURL:s,transformRequest:s,transformResponse:s,paramsSerializer:s,timeout:s,timeoutMessage:s,withCredentials:s,withXSRFToken:s,adapter:s,responseType:s,xsrfCookieName:s,xsrfHeaderName:s,onUploadProgress:s,onDownloadProgress:s,decompress:s,maxContentLength:s,maxBodyLength:s,beforeRedirect:s,transport:s,httpAgent:s,httpsAgent:s,cancelToken:s,socketPath:s,responseEncoding:s,validateStatus:l,headers:(u,d)=>i(P_(u),P_(d),!0)};return A.forEach(Object.keys(Object.assign({},e,t)),function(d){const f=c[d]||i,h=f(e[d],t[d],d);A.isUndefined(h)&&f!==l||(n[d]=h)}),n}const Sx=e=>{const t=za({},e);let{data:n,withXSRFToken:r,xsrfHeaderName:i,xsrfCookieName:a,headers:s,auth:l}=t;t.headers=s=gn.from(s),t.url=wx(kx(t.baseURL,t.url),e.params,e.paramsSerializer),l&&s.set("Authorization","Basic "+btoa((l.username||"")+":"+(l.password?unescape(encodeURIComponent(l.password)):"")));let c;if(A.isFormData(n)){if(mn.hasStandardBrowserEnv||mn.hasStandardBrowserWebWorkerEnv)s.setContentType(void 0);else if((c=s.getContentType())!==!1){const[u,...d]=c?c.split(";").map(f=>f.trim()).filter(Boolean):[];s.setContentType([u||"multipart/form-data",...d].join("; "))}}if(mn.hasStandardBrowserEnv&&(r&&A.isFunction(r)&&(r=r(t)),r||r!==!1&&JP(t.url))){const u=i&&a&&YP.read(a);u&&s.set(i,u)}return t},nO=typeof XMLHttpRequest<"u",rO=nO&&function(e){return new Promise(function(n,r){const i=Sx(e);let a=i.data;const s=gn.from(i.headers).normalize();let{responseType:l,onUploadProgress:c,onDownloadProgress:u}=i,d,f,h,v,w;function _(){v&&v(),w&&w(),i.cancelToken&&i.cancelToken.unsubscribe(d),i.signal&&i.signal.removeEventListener("abort",d)}let b=new XMLHttpRequest;b.open(i.method.toUpperCase(),i.url,!0),b.timeout=i.timeout;function p(){if(!b)return;const m=gn.from("getAllResponseHeaders"in b&&b.getAllResponseHeaders()),S={data:!l||l==="text"||l==="json"?b.responseText:b.response,status:b.status,statusText:b.statusText,headers:m,config:e,request:b};Ex(function(j){n(j),_()},function(j){r(j),_()},S),b=null}"onloadend"in b?b.onloadend=p:b.onreadystatechange=function(){!b||b.readyState!==4||b.status===0&&!(b.responseURL&&b.responseURL.indexOf("file:")===0)||setTimeout(p)},b.onabort=function(){b&&(r(new ge("Request aborted",ge.ECONNABORTED,e,b)),b=null)},b.onerror=function(){r(new ge("Network Error",ge.ERR_NETWORK,e,b)),b=null},b.ontimeout=function(){let x=i.timeout?"timeout of "+i.timeout+"ms exceeded":"timeout exceeded";const S=i.transitional||yx;i.timeoutErrorMessage&&(x=i.timeoutErrorMessage),r(new ge(x,S.clarifyTimeoutError?ge.ETIMEDOUT:ge.ECONNABORTED,e,b)),b=null},a===void 0&&s.setContentType(null),"setRequestHeader"in b&&A.forEach(s.toJSON(),function(x,S){b.setRequestHeader(S,x)}),A.isUndefined(i.withCredentials)||(b.withCredentials=!!i.withCredentials),l&&l!=="json"&&(b.responseType=i.responseType),u&&([h,w]=Ru(u,!0),b.addEventListener("progress",h)),c&&b.upload&&([f,v]=Ru(c),b.upload.addEventListener("progress",f),b.upload.addEventListener("loadend",v)),(i.cancelToken||i.signal)&&(d=m=>{b&&(r(!m||m.type?new Js(null,e,b):m),b.abort(),b=null)},i.cancelToken&&i.cancelToken.subscribe(d),i.signal&&(i.signal.aborted?d():i.signal.addEventListener("abort",d)));const g=QP(i.url);if(g&&mn.protocols.indexOf(g)===-1){r(new ge("Unsupported protocol "+g+":",ge.ERR_BAD_REQUEST,e));return}b.send(a||null)})},iO=(e,t)=>{const{length:n}=e=e?e.filter(Boolean):[];if(t||n){let r=new AbortController,i;const a=function(u){if(!i){i=!0,l();const d=u instanceof Error?u:this.reason;r.abort(d instanceof ge?d:new Js(d instanceof Error?d.message:d))}};let s=t&&setTimeout(()=>{s=null,a(new ge(`timeout ${t} of ms exceeded`,ge.ETIMEDOUT))},t);const l=()=>{e&&(s&&clearTimeout(s),s=null,e.forEach(u=>{u.unsubscribe?u.unsubscribe(a):u.removeEventListener("abort",a)}),e=null)};e.forEach(u=>u.addEventListener("abort",a));const{signal:c}=r;return c.unsubscribe=()=>A.asap(l),c}},aO=function*(e,t){let n=e.byteLength;if(n<t){yield e;return}let r=0,i;for(;r<n;)i=r+t,yield e.slice(r,i),r=i},sO=async function*(e,t){for await(const n of oO(e))yield*aO(n,t)},oO=async function*(e){if(e[Symbol.asyncIterator]){yield*e;return}const t=e.getReader();try{for(;;){const{done:n,value:r}=await t.read();if(n)break;yield r}}finally{await t.cancel()}},O_=(e,t,n,r)=>{const i=sO(e,t);let a=0,s,l=c=>{s||(s=!0,r&&r(c))};return new ReadableStream({async pull(c){try{const{done:u,value:d}=await i.next();if(u){l(),c.close();return}let f=d.byteLength;if(n){let h=a+=f;n(h)}c.enqueue(new Uint8Array(d))}catch(u){throw l(u),u}},cancel(c){return l(c),i.return()}},{highWaterMark:2})},Nd=typeof fetch=="function"&&typeof Request=="function"&&typeof Response=="function",Cx=Nd&&typeof ReadableStream=="function",lO=Nd&&(typeof TextEncoder=="function"?(e=>t=>e.encode(t))(new TextEncoder):async e=>new Uint8Array(await new Response(e).arrayBuffer())),Nx=(e,...t)=>{try{return!!e(...t)}catch{return!1}},cO=Cx&&Nx(()=>{let e=!1;const t=new Request(mn.origin,{body:new ReadableStream,method:"POST",get duplex(){return e=!0,"half"}}).headers.has("Content-Type");return e&&!t}),z_=64*1024,nh=Cx&&Nx(()=>A.isReadableStream(new Response("").body)),Pu={stream:nh&&(e=>e.body)};Nd&&(e=>{["text","arrayBuffer","blob","formData","stream"].forEach(t=>{!Pu[t]&&(Pu[t]=A.isFunction(e[t])?n=>n[t]():(n,r)=>{throw new ge(`Response type '${t}' is not supported`,ge.ERR_NOT_SUPPORT,r)})})})(new Response);const uO=async e=>{if(e==null)return 0;if(A.isBlob(e))return e.size;if(A.isSpecCompliantForm(e))return(await new Request(mn.origin,{method:"POST",body:e}).arrayBuffer()).byteLength;if(A.isArrayBufferView(e)||A.isArrayBuffer(e))return e.byteLength;if(A.isURLSearchParams(e)&&(e=e+""),A.isString(e))return(await lO(e)).byteLength},dO=async(e,t)=>{const n=A.toFiniteNumber(e.getContentLength());return n??uO(t)},fO=Nd&&(async e=>{let{url:t,method:n,data:r,signal:i,cancelToken:a,timeout:s,onDownloadProgress:l,onUploadProgress:c,responseType:u,headers:d,withCredentials:f="same-origin",fetchOptions:h}=Sx(e);u=u?(u+"").toLowerCase():"text";let v=iO([i,a&&a.toAbortSignal()],s),w;const _=v&&v.unsubscribe&&(()=>{v.unsubscribe()});let b;try{if(c&&cO&&n!=="get"&&n!=="head"&&(b=await dO(d,r))!==0){let S=new Request(t,{method:"POST",body:r,duplex:"half"}),C;if(A.isFormData(r)&&(C=S.headers.get("content-type"))&&d.setContentType(C),S.body){const[j,k]=j_(b,Ru(R_(c)));r=O_(S.body,z_,j,k)}}A.isString(f)||(f=f?"include":"omit");const p="credentials"in Request.prototype;w=new Request(t,{...h,signal:v,method:n.toUpperCase(),headers:d.normalize().toJSON(),body:r,duplex:"half",credentials:p?f:void 0});let g=await fetch(w);const m=nh&&(u==="stream"||u==="response");if(nh&&(l||m&&_)){const S={};["status","statusText","headers"].forEach(N=>{S[N]=g[N]});const C=A.toFiniteNumber(g.headers.get("content-length")),[j,k]=l&&j_(C,Ru(R_(l),!0))||[];g=new Response(O_(g.body,z_,j,()=>{k&&k(),_&&_()}),S)}u=u||"text";let x=await Pu[A.findKey(Pu,u)||"text"](g,e);return!m&&_&&_(),await new Promise((S,C)=>{Ex(S,C,{data:x,headers:gn.from(g.headers),status:g.status,statusText:g.statusText,config:e,request:w})})}catch(p){throw _&&_(),p&&p.name==="TypeError"&&/fetch/i.test(p.message)?Object.assign(new ge("Network Error",ge.ERR_NETWORK,e,w),{cause:p.cause||p}):ge.from(p,p&&p.code,e,w)}}),rh={http:NP,xhr:rO,fetch:fO};A.forEach(rh,(e,t)=>{if(e){try{Object.defineProperty(e,"name",{value:t})}catch{}Object.defineProperty(e,"adapterName",{value:t})}});const T_=e=>`- ${e}`,pO=e=>A.isFunction(e)||e===null||e===!1,jx={getAdapter:e=>{e=A.isArray(e)?e:[e];const{length:t}=e;let n,r;const i={};for(let a=0;a<t;a++){n=e[a];let s;if(r=n,!pO(n)&&(r=rh[(s=String(n)).toLowerCase()],r===void 0))throw new ge(`Unknown adapter '${s}'`);if(r)break;i[s||"#"+a]=r}if(!r){const a=Object.entries(i).map(([l,c])=>`adapter ${l} `+(c===!1?"is not supported by the environment":"is not available in the build"));let s=t?a.length>1?`since :
 `+a.map(T_).join(`
 `):" "+T_(a[0]):"as no adapter specified";throw new ge("There is no suitable adapter to dispatch the request "+s,"ERR_NOT_SUPPORT")}return r},adapters:rh};function Rf(e){if(e.cancelToken&&e.cancelToken.throwIfRequested(),e.signal&&e.signal.aborted)throw new Js(null,e)}function I_(e){return Rf(e),e.headers=gn.from(e.headers),e.data=jf.call(e,e.transformRequest),["post","put","patch"].indexOf(e.method)!==-1&&e.headers.setContentType("application/x-www-form-urlencoded",!1),jx.getAdapter(e.adapter||Ml.adapter)(e).then(function(r){return Rf(e),r.data=jf.call(e,e.transformResponse,r),r.headers=gn.from(r.headers),r},function(r){return xx(r)||(Rf(e),r&&r.response&&(r.response.data=jf.call(e,e.transformResponse,r.response),r.response.headers=gn.from(r.response.headers))),Promise.reject(r)})}const Rx="1.7.7",Xm={};["object","boolean","number","function","string","symbol"].forEach((e,t)=>{Xm[e]=function(r){return typeof r===e||"a"+(t<1?"n ":" ")+e}});const L_={};Xm.transitional=function(t,n,r){function i(a,s){return"[Axios v"+Rx+"] Transitional option '"+a+"'"+s+(r?". "+r:"")}return(a,s,l)=>{if(t===!1)throw new ge(i(s," has been removed"+(n?" in "+n:"")),ge.ERR_DEPRECATED);return n&&!L_[s]&&(L_[s]=!0,console.warn(i(s," has been deprecated since v"+n+" and will be removed in the near future"))),t?t(a,s,l):!0}};function hO(e,t,n){if(typeof e!="object")throw new ge("options must be an object",ge.ERR_BAD_OPTION_VALUE);const r=Object.keys(e);let i=r.length;for(;i-- >0;){const a=r[i],s=t[a];if(s){const l=e[a],c=l===void 0||s(l,a,e);if(c!==!0)throw new ge("option "+a+" must be "+c,ge.ERR_BAD_OPTION_VALUE);continue}if(n!==!0)throw new ge("Unknown option "+a,ge.ERR_BAD_OPTION)}}const ih={assertOptions:hO,validators:Xm},ri=ih.validators;class xa{constructor(t){this.defaults=t,this.interceptors={request:new C_,response:new C_}}async request(t,n){try{return await this._request(t,n)}catch(r){if(r instanceof Error){let i;Error.captureStackTrace?Error.captureStackTrace(i={}):i=new Error;const a=i.stack?i.stack.replace(/^.+\n/,""):"";try{r.stack?a&&!String(r.stack).endsWith(a.replace(/^.+\n.+\n/,""))&&(r.stack+=`
-`+a):r.stack=a}catch{}}throw r}}_request(t,n){typeof t=="string"?(n=n||{},n.url=t):n=t||{},n=za(this.defaults,n);const{transitional:r,paramsSerializer:i,headers:a}=n;r!==void 0&&ih.assertOptions(r,{silentJSONParsing:ri.transitional(ri.boolean),forcedJSONParsing:ri.transitional(ri.boolean),clarifyTimeoutError:ri.transitional(ri.boolean)},!1),i!=null&&(A.isFunction(i)?n.paramsSerializer={serialize:i}:ih.assertOptions(i,{encode:ri.function,serialize:ri.function},!0)),n.method=(n.method||this.defaults.method||"get").toLowerCase();let s=a&&A.merge(a.common,a[n.method]);a&&A.forEach(["delete","get","head","post","put","patch","common"],w=>{delete a[w]}),n.headers=gn.concat(s,a);const l=[];let c=!0;this.interceptors.request.forEach(function(_){typeof _.runWhen=="function"&&_.runWhen(n)===!1||(c=c&&_.synchronous,l.unshift(_.fulfilled,_.rejected))});const u=[];this.interceptors.response.forEach(function(_){u.push(_.fulfilled,_.rejected)});let d,f=0,h;if(!c){const w=[I_.bind(this),void 0];for(w.unshift.apply(w,l),w.push.apply(w,u),h=w.length,d=Promise.resolve(n);f<h;)d=d.then(w[f++],w[f++]);return d}h=l.length;let v=n;for(f=0;f<h;){const w=l[f++],_=l[f++];try{v=w(v)}catch(b){_.call(this,b);break}}try{d=I_.call(this,v)}catch(w){return Promise.reject(w)}for(f=0,h=u.length;f<h;)d=d.then(u[f++],u[f++]);return d}getUri(t){t=za(this.defaults,t);const n=kx(t.baseURL,t.url);return wx(n,t.params,t.paramsSerializer)}}A.forEach(["delete","get","head","options"],function(t){xa.prototype[t]=function(n,r){return this.request(za(r||{},{method:t,url:n,data:(r||{}).data}))}});A.forEach(["post","put","patch"],function(t){function n(r){return function(a,s,l){return this.request(za(l||{},{method:t,headers:r?{"Content-Type":"multipart/form-data"}:{},url:a,data:s}))}}xa.prototype[t]=n(),xa.prototype[t+"Form"]=n(!0)});class Jm{constructor(t){if(typeof t!="function")throw new TypeError("executor must be a function.");let n;this.promise=new Promise(function(a){n=a});const r=this;this.promise.then(i=>{if(!r._listeners)return;let a=r._listeners.length;for(;a-- >0;)r._listeners[a](i);r._listeners=null}),this.promise.then=i=>{let a;const s=new Promise(l=>{r.subscribe(l),a=l}).then(i);return s.cancel=function(){r.unsubscribe(a)},s},t(function(a,s,l){r.reason||(r.reason=new Js(a,s,l),n(r.reason))})}throwIfRequested(){if(this.reason)throw this.reason}subscribe(t){if(this.reason){t(this.reason);return}this._listeners?this._listeners.push(t):this._listeners=[t]}unsubscribe(t){if(!this._listeners)return;const n=this._listeners.indexOf(t);n!==-1&&this._listeners.splice(n,1)}toAbortSignal(){const t=new AbortController,n=r=>{t.abort(r)};return this.subscribe(n),t.signal.unsubscribe=()=>this.unsubscribe(n),t.signal}static source(){let t;return{token:new Jm(function(i){t=i}),cancel:t}}}function mO(e){return function(n){return e.apply(null,n)}}function gO(e){return A.isObject(e)&&e.isAxiosError===!0}const ah={Continue:100,SwitchingProtocols:101,Processing:102,EarlyHints:103,Ok:200,Created:201,Accepted:202,NonAuthoritativeInformation:203,NoContent:204,ResetContent:205,PartialContent:206,MultiStatus:207,AlreadyReported:208,ImUsed:226,MultipleChoices:300,MovedPermanently:301,Found:302,SeeOther:303,NotModified:304,UseProxy:305,Unused:306,TemporaryRedirect:307,PermanentRedirect:308,BadRequest:400,Unauthorized:401,PaymentRequired:402,Forbidden:403,NotFound:404,MethodNotAllowed:405,NotAcceptable:406,ProxyAuthenticationRequired:407,RequestTimeout:408,Conflict:409,Gone:410,LengthRequired:411,PreconditionFailed:412,PayloadTooLarge:413,UriTooLong:414,UnsupportedMediaType:415,RangeNotSatisfiable:416,ExpectationFailed:417,ImATeapot:418,MisdirectedRequest:421,UnprocessableEntity:422,Locked:423,FailedDependency:424,TooEarly:425,UpgradeRequired:426,PreconditionRequired:428,TooManyRequests:429,RequestHeaderFieldsTooLarge:431,UnavailableForLegalReasons:451,InternalServerError:500,NotImplemented:501,BadGateway:502,ServiceUnavailable:503,GatewayTimeout:504,HttpVersionNotSupported:505,VariantAlsoNegotiates:506,InsufficientStorage:507,LoopDetected:508,NotExtended:510,NetworkAuthenticationRequired:511};Object.entries(ah).forEach(([e,t])=>{ah[t]=e});function Px(e){const t=new xa(e),n=ox(xa.prototype.request,t);return A.extend(n,xa.prototype,t,{allOwnKeys:!0}),A.extend(n,t,null,{allOwnKeys:!0}),n.create=function(i){return Px(za(e,i))},n}const _t=Px(Ml);_t.Axios=xa;_t.CanceledError=Js;_t.CancelToken=Jm;_t.isCancel=xx;_t.VERSION=Rx;_t.toFormData=Cd;_t.AxiosError=ge;_t.Cancel=_t.CanceledError;_t.all=function(t){return Promise.all(t)};_t.spread=mO;_t.isAxiosError=gO;_t.mergeConfig=za;_t.AxiosHeaders=gn;_t.formToJSON=e=>bx(A.isHTMLForm(e)?new FormData(e):e);_t.getAdapter=jx.getAdapter;_t.HttpStatusCode=ah;_t.default=_t;var Ox=(e=>(e.COLLECTIONS="COLLECTIONS",e.ASSETS="ASSETS",e.CHAT_SESSIONS="CHAT_SESSIONS",e.CHATS="CHATS",e))(Ox||{});const Ym=_t.create({baseURL:`http://${window.location.hostname}:8081/api/`,headers:{"Content-type":"application/json","Access-Control-Allow-Origin":"*"}}),vO=async e=>{const{data:t}=await Ym.post("/db",{opr:"add",data:e});return t.data},_O=async()=>{const{data:e}=await Ym.post("/db",{opr:"clear_chats",type:"chat"});return e.data},wO=async()=>{const{data:e}=await Ym.post("/db",{opr:"chats",type:"chat"});return console.log("🚀 ~ list chats ~ data:",e),e.data},yO=()=>r2({queryKey:["CHATS"],queryFn:()=>wO()}),zx=ax(""),jd=vn(void 0),bO=e=>{const[t,n]=Le(zx),[,r]=Le(jd),i=()=>{e.onSend(),n(""),r(void 0)};return E.jsxs("div",{style:{display:"flex",flexDirection:"row",alignContent:"space-around"},children:[E.jsx("div",{style:{flex:1,padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(Tb,{autoFocus:!0,onKeyDown:({detail:a})=>{a.key==="Enter"&&!a.shiftKey&&i()},disabled:e.isDisabled,rows:2,placeholder:"Start a chat with the offline Gen-AI chatbot. for example - 'Hi How are you?'",spellcheck:!0,value:t,onChange:({detail:a})=>n(a.value)})}),E.jsx("div",{style:{padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(Pe,{size:"s",direction:"horizontal",children:E.jsx(kn,{disabled:e.isDisabled||t.length<3,variant:"primary",onClick:i,children:"Send"})})})]})};var Tx={color:void 0,size:void 0,className:void 0,style:void 0,attr:void 0},M_=o.createContext&&o.createContext(Tx),xO=["attr","size","title"];function EO(e,t){if(e==null)return{};var n=kO(e,t),r,i;if(Object.getOwnPropertySymbols){var a=Object.getOwnPropertySymbols(e);for(i=0;i<a.length;i++)r=a[i],!(t.indexOf(r)>=0)&&Object.prototype.propertyIsEnumerable.call(e,r)&&(n[r]=e[r])}return n}function kO(e,t){if(e==null)return{};var n={};for(var r in e)if(Object.prototype.hasOwnProperty.call(e,r)){if(t.indexOf(r)>=0)continue;n[r]=e[r]}return n}function Ou(){return Ou=Object.assign?Object.assign.bind():function(e){for(var t=1;t<arguments.length;t++){var n=arguments[t];for(var r in n)Object.prototype.hasOwnProperty.call(n,r)&&(e[r]=n[r])}return e},Ou.apply(this,arguments)}function A_(e,t){var n=Object.keys(e);if(Object.getOwnPropertySymbols){var r=Object.getOwnPropertySymbols(e);t&&(r=r.filter(function(i){return Object.getOwnPropertyDescriptor(e,i).enumerable})),n.push.apply(n,r)}return n}function zu(e){for(var t=1;t<arguments.length;t++){var n=arguments[t]!=null?arguments[t]:{};t%2?A_(Object(n),!0).forEach(function(r){SO(e,r,n[r])}):Object.getOwnPropertyDescriptors?Object.defineProperties(e,Object.getOwnPropertyDescriptors(n)):A_(Object(n)).forEach(function(r){Object.defineProperty(e,r,Object.getOwnPropertyDescriptor(n,r))})}return e}function SO(e,t,n){return t=CO(t),t in e?Object.defineProperty(e,t,{value:n,enumerable:!0,configurable:!0,writable:!0}):e[t]=n,e}function CO(e){var t=NO(e,"string");return typeof t=="symbol"?t:t+""}function NO(e,t){if(typeof e!="object"||!e)return e;var n=e[Symbol.toPrimitive];if(n!==void 0){var r=n.call(e,t||"default");if(typeof r!="object")return r;throw new TypeError("@@toPrimitive must return a primitive value.")}return(t==="string"?String:Number)(e)}function Ix(e){return e&&e.map((t,n)=>o.createElement(t.tag,zu({key:n},t.attr),Ix(t.child)))}function Lx(e){return t=>o.createElement(jO,Ou({attr:zu({},e.attr)},t),Ix(e.child))}function jO(e){var t=n=>{var{attr:r,size:i,title:a}=e,s=EO(e,xO),l=i||n.size||"1em",c;return n.className&&(c=n.className),e.className&&(c=(c?c+" ":"")+e.className),o.createElement("svg",Ou({stroke:"currentColor",fill:"currentColor",strokeWidth:"0"},n.attr,r,s,{className:c,style:zu(zu({color:e.color||n.color},n.style),e.style),height:l,width:l,xmlns:"http://www.w3.org/2000/svg"}),a&&o.createElement("title",null,a),e.children)};return M_!==void 0?o.createElement(M_.Consumer,null,n=>t(n)):t(Tx)}function RO(e){return Lx({tag:"svg",attr:{fill:"currentColor",viewBox:"0 0 16 16"},child:[{tag:"path",attr:{d:"M12 0H4a2 2 0 0 0-2 2v12a2 2 0 0 0 2 2h8a2 2 0 0 0 2-2V2a2 2 0 0 0-2-2m-1 7a3 3 0 1 1-6 0 3 3 0 0 1 6 0m-3 4c2.623 0 4.146.826 5 1.755V14a1 1 0 0 1-1 1H4a1 1 0 0 1-1-1v-1.245C3.854 11.825 5.377 11 8 11"},child:[]}]})(e)}function PO(e){return Lx({tag:"svg",attr:{viewBox:"0 0 24 24",fill:"currentColor"},child:[{tag:"path",attr:{d:"M13.5 2C13.5 2.44425 13.3069 2.84339 13 3.11805V5H18C19.6569 5 21 6.34315 21 8V18C21 19.6569 19.6569 21 18 21H6C4.34315 21 3 19.6569 3 18V8C3 6.34315 4.34315 5 6 5H11V3.11805C10.6931 2.84339 10.5 2.44425 10.5 2C10.5 1.17157 11.1716 0.5 12 0.5C12.8284 0.5 13.5 1.17157 13.5 2ZM6 7C5.44772 7 5 7.44772 5 8V18C5 18.5523 5.44772 19 6 19H18C18.5523 19 19 18.5523 19 18V8C19 7.44772 18.5523 7 18 7H13H11H6ZM2 10H0V16H2V10ZM22 10H24V16H22V10ZM9 14.5C9.82843 14.5 10.5 13.8284 10.5 13C10.5 12.1716 9.82843 11.5 9 11.5C8.17157 11.5 7.5 12.1716 7.5 13C7.5 13.8284 8.17157 14.5 9 14.5ZM15 14.5C15.8284 14.5 16.5 13.8284 16.5 13C16.5 12.1716 15.8284 11.5 15 11.5C14.1716 11.5 13.5 12.1716 13.5 13C13.5 13.8284 14.1716 14.5 15 14.5Z"},child:[]}]})(e)}const OO=e=>{const{chat:t}=e,[,n]=Le(IR),[,r]=Le(jd);return E.jsxs("div",{children:[E.jsxs("div",{style:{display:"flex",flexDirection:"row",alignContent:"space-around",padding:10},children:[E.jsx("div",{style:{flex:1,padding:10,alignContent:"center",alignSelf:"center",marginLeft:"40%",marginRight:0},children:E.jsx(jn,{children:t.human})}),E.jsx("div",{style:{padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(RO,{size:30,color:"#00a4ef",style:{cursor:"pointer"}})})]}),E.jsxs("div",{style:{display:"flex",flexDirection:"row-reverse",alignContent:"space-around",padding:10},children:[E.jsx("div",{style:{flex:1,padding:10,alignContent:"center",alignSelf:"center",marginLeft:"0",marginRight:"40%"},children:E.jsx(jn,{footer:E.jsx(Am,{headerText:"Insights",variant:"footer",defaultExpanded:!0,children:E.jsx(Ee,{float:"right",children:E.jsx(kn,{iconName:"angle-right",variant:"primary",onClick:()=>{r(t),n()}})})}),children:t.bot},t.id)}),E.jsx("div",{style:{padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(PO,{size:30,color:"#00a4ef",style:{cursor:"pointer"}})})]})]})},zO=()=>{const e=y.useRef(null),t=rm(),[n]=Le(zx),[r,i]=y.useState(!1),[a,s]=Le($s),l=sx($s),[c,u]=y.useState(""),{data:d,refetch:f}=yO(),[h]=Le(Wm),[v]=Le(Vm),[w]=Le(Gm),[_]=Le(nx),b=y.useMemo(()=>{if(c!==""&&d&&d.length>0){const S=[...d],C=S.pop();if(C)return C.bot=c,S.push(C),S}return d},[d,c]);y.useEffect(()=>{try{a.ws===null?s({...a,ws:new WebSocket(`ws://${window.location.hostname}:8081/ws`)}):(a.ws.onopen=S=>{Ue.success("Connected to core device"),s({...a,status:"connected"})},a.ws.onclose=S=>{s({ws:null,status:"disconnected"})},a.ws.onmessage=({data:S})=>{const C=JSON.parse(S);C.status===0?u(C.part):C.status===1&&(i(!1),f()),x()})}catch(S){console.log("🚀 ~ err:",S)}},[a]);const p=xv({mutationFn:S=>vO(S),onSuccess:S=>{console.log("🚀 ~ ChatContainer ~ data:",S),m(S)},onError:S=>{console.log("🚀 ~ ChatContainer ~ err:",S),Ue("Message sending failed!",{type:"error"})},onSettled:()=>{t.invalidateQueries({queryKey:[Ox.CHATS]}),x()}}),g=xv({mutationFn:()=>_O(),onSuccess:S=>{console.log("🚀 ~ clearChatsMutation ~ data:",S),f(),x()},onError:S=>{console.log("🚀 ~ clearChatsMutation ~ err:",S)}}),m=S=>{try{a.ws&&(u(""),i(!0),a.ws.send(JSON.stringify({opr:"chat",id:S,parameters:{temperature:h,top_p:v,model:w,system_prompt:_}})))}catch{i(!1),l()}},x=()=>{var S;e.current&&(e.current.focus(),e.current.scrollIntoView({behavior:"auto",block:"end"}),(S=e.current.lastElementChild)==null||S.scrollIntoView({behavior:"auto",block:"end"}))};return E.jsx("div",{children:E.jsxs(jn,{header:E.jsx(Ct,{variant:"h2",actions:E.jsxs(Pe,{size:"s",direction:"horizontal",children:[E.jsx(kn,{disabled:r||g.isPending,loading:p.isPending,iconName:"refresh",onClick:()=>f(),children:"Refresh"}),E.jsx(kn,{disabled:r||p.isPending,loading:g.isPending,iconName:"delete-marker",onClick:()=>g.mutate(),children:"Clear Chat History"}),E.jsx(kn,{iconName:"angle-down",onClick:x,children:"Scroll to End"})]}),children:"Chat Messages"}),children:[E.jsxs("div",{ref:e,style:{maxHeight:"90vh",minHeight:"65vh",display:"flex",flex:1,flexDirection:"column",overflow:"auto"},children:[b&&b.length>0&&b.map(S=>E.jsx(OO,{chat:S},S.id)),E.jsx("div",{style:{display:"flex",flex:1,color:"#00a4ef",justifyContent:"center"},children:p.isPending&&E.jsx(Fm,{size:"large"})})]}),E.jsx(Ee,{children:E.jsx(bO,{isDisabled:p.isPending||r||a.status==="disconnected",onSend:()=>{p.mutate({id:Date.now(),type:"chat",human:n,bot:"...",metrics:{model:"",temperature:0,top_p:0,total_duration:0,load_duration:0,prompt_eval_duration:0,eval_count:0,eval_duration:0}})}})})]})})},TO=()=>{const[,e]=Le(Um);return E.jsx(vd,{header:E.jsx(Pe,{size:"m",children:E.jsx(Ct,{variant:"h1",info:E.jsx(_d,{onFollow:e,children:"Info"}),description:"Converse with an offline Gen-AI based chatbot.",children:"Chatbot"})}),children:E.jsx(Pe,{size:"xl",children:E.jsx(zO,{})})})},IO=()=>{const[e]=Le(jd);return E.jsx("div",{className:"drawer-example",children:E.jsx(Tl,{header:E.jsx("h2",{children:"Chat Info"}),children:E.jsx(Ee,{margin:{bottom:"l"},children:E.jsxs(Pe,{size:"l",children:[E.jsx(jn,{header:E.jsx(Ct,{variant:"h2",children:"Metrics"}),children:E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Model"}),E.jsx("div",{children:(e==null?void 0:e.metrics.model)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Temperature"}),E.jsx("div",{children:(e==null?void 0:e.metrics.temperature)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Top P"}),E.jsx("div",{children:(e==null?void 0:e.metrics.top_p)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Evaluation Count"}),E.jsx("div",{children:(e==null?void 0:e.metrics.eval_count)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Evaluation Duration"}),E.jsxs("div",{children:[e?(e.metrics.eval_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Evaluation Duration"}),E.jsxs("div",{children:[e?(e.metrics.prompt_eval_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Load Duration"}),E.jsxs("div",{children:[e?(e.metrics.load_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Total Duration"}),E.jsxs("div",{children:[e?(e.metrics.total_duration/1e9).toFixed(2):"-"," sec"]})]})]})}),E.jsx(jn,{header:E.jsx(Ct,{variant:"h2",children:"Metrics Parameters"}),children:E.jsx(Or,{children:E.jsxs("p",{children:["Each response also returns a bunch of metrics as follows",E.jsxs("ul",{children:[E.jsxs("li",{children:[E.jsx("b",{children:"Evaluation Count:"})," number of tokens in the response. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Evaluation Duration:"})," time in seconds spent generating the response. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Prompt Evaluation Duration:"})," time spent generating the response. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Load Duration:"})," time spent loading the model. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Total Duration:"})," time spent evaluating the prompt. "]})]})]})})})]})})})})},LO=()=>{const[e]=Le(jd);return E.jsx("div",{className:"drawer-example",children:e?E.jsx(IO,{}):E.jsx(Tl,{header:E.jsx("h2",{children:"Offline Chatbot"}),children:E.jsxs(Ee,{margin:{bottom:"l"},children:[E.jsx(Ct,{variant:"h3",children:"Chat Sessions"}),E.jsxs(Or,{children:[E.jsx("p",{children:"Generative AI-powered chat bots are driving the transformation of customer experience, enabling intuitive conversational interfaces that augment human capabilities across different business needs."}),E.jsx("p",{children:"Add conversational interfaces driven by natural language processing and generative responses from LLMs that understand intent, maintain context, and pull answers from trusted knowledge sources."})]})]})})})},MO=`http://${window.location.hostname}:8081`,AO=`${MO}/api/engine-vibration`,DO=async e=>{try{const t=new URLSearchParams;Object.entries(e).forEach(([r,i])=>{t.append(r,i.toString())});const n=await fetch(`${AO}?${t.toString()}`,{method:"GET",headers:{Accept:"application/json"}});if(!n.ok)throw new Error(`Server responded with status ${n.status}`);return await n.json()}catch(t){throw console.error("Error fetching engine vibration data:",t),t}},BO=e=>{const{metrics:t,prompt:n}=e;return E.jsx(jn,{header:E.jsx(Ct,{variant:"h2",children:"Analysis Metrics"}),children:E.jsxs(fi,{columns:3,variant:"text-grid",children:[E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Model"}),E.jsx("div",{children:(t==null?void 0:t.model)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Created At"}),E.jsx("div",{children:(t==null?void 0:t.created_at)??"-"})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Temperature"}),E.jsx("div",{children:(t==null?void 0:t.temperature)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Top P"}),E.jsx("div",{children:(t==null?void 0:t.top_p)??"-"})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Response Length"}),E.jsxs("div",{children:[(t==null?void 0:t.response_length)??"-"," chars"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Evaluation Count"}),E.jsxs("div",{children:[(t==null?void 0:t.eval_count)??"-"," tokens"]})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Length"}),E.jsxs("div",{children:[(t==null?void 0:t.prompt_length)??"-"," chars"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Evaluation Count"}),E.jsxs("div",{children:[(t==null?void 0:t.prompt_eval_count)??"-"," tokens"]})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Preprocessing Duration"}),E.jsxs("div",{children:[t&&t.preprocessing_duration?(t.preprocessing_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Creation Duration"}),E.jsxs("div",{children:[t&&t.prompt_creation_duration?(t.prompt_creation_duration/1e9).toFixed(2):"-"," sec"]})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Model Response Duration"}),E.jsxs("div",{children:[t&&t.model_response_duration?(t.model_response_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Total Duration"}),E.jsxs("div",{children:[t&&t.total_duration?(t.total_duration/1e9).toFixed(2):"-"," sec"]})]})]})]})})},FO=`http://${window.location.hostname}:8081`,$O=`${FO}/api/engine-vibration`,qO=()=>{const[,e]=Le(Um),[t,n]=y.useState(!1),[r,i]=y.useState(""),[a,s]=y.useState(""),[l,c]=y.useState([]),[u,d]=y.useState({total_time:4,sampling_freq:2e4,rpm:2e3,num_cylinders:4,knock_start_time:2,knock_probability_start:.2,knock_probability_end:.9,knock_intensity_start:1,knock_intensity_end:4,knock_resonant_freq:667,knock_damping:.05,noise_level:.1,random_seed:42}),[f,h]=y.useState(0),[v,w]=y.useState(!1),[_,b]=y.useState(""),[p,g]=y.useState(""),[m,x]=y.useState(null),[S,C]=y.useState(""),[j,k]=y.useState(!1),[N,O]=Le($s),z=async()=>{n(!0),s("");try{console.log("Making API request with params:",u);let L;try{L=await DO(u)}catch(T){console.warn("Direct fetch failed, falling back to axios:",T),L=(await _t.get($O,{params:u,headers:{Accept:"application/json"}})).data}if(console.log("API response received:",L),!L)throw new Error("Empty response from API");if(L.error)throw new Error(`Server error: ${L.error}`);if(!L.plot)throw new Error("API response missing plot data");if(!L.params||L.params.knock_count===void 0)throw new Error("API response missing knock count data");i(`data:image/png;base64,${L.plot}`),h(L.params.knock_count),L.data&&Array.isArray(L.data)?c(L.data):(console.warn("Vibration data not available in the response"),c([]))}catch(L){if(console.error("Error generating vibration data:",L),L.code==="ERR_NETWORK")s("Cannot connect to API server. Please make sure the server is running on port 8081.");else{const T=L.response?`Server error: ${L.response.status} ${L.response.statusText}`:L.message||"Failed to generate vibration data. Please try again.";s(T)}i(""),h(0),c([])}finally{n(!1)}},M=()=>{if(l.length===0)return;const L=Object.keys(l[0]).join(","),T=l.map(Q=>Object.values(Q).join(",")).join(`
+`+a):r.stack=a}catch{}}throw r}}_request(t,n){typeof t=="string"?(n=n||{},n.url=t):n=t||{},n=za(this.defaults,n);const{transitional:r,paramsSerializer:i,headers:a}=n;r!==void 0&&ih.assertOptions(r,{silentJSONParsing:ri.transitional(ri.boolean),forcedJSONParsing:ri.transitional(ri.boolean),clarifyTimeoutError:ri.transitional(ri.boolean)},!1),i!=null&&(A.isFunction(i)?n.paramsSerializer={serialize:i}:ih.assertOptions(i,{encode:ri.function,serialize:ri.function},!0)),n.method=(n.method||this.defaults.method||"get").toLowerCase();let s=a&&A.merge(a.common,a[n.method]);a&&A.forEach(["delete","get","head","post","put","patch","common"],w=>{delete a[w]}),n.headers=gn.concat(s,a);const l=[];let c=!0;this.interceptors.request.forEach(function(_){typeof _.runWhen=="function"&&_.runWhen(n)===!1||(c=c&&_.synchronous,l.unshift(_.fulfilled,_.rejected))});const u=[];this.interceptors.response.forEach(function(_){u.push(_.fulfilled,_.rejected)});let d,f=0,h;if(!c){const w=[I_.bind(this),void 0];for(w.unshift.apply(w,l),w.push.apply(w,u),h=w.length,d=Promise.resolve(n);f<h;)d=d.then(w[f++],w[f++]);return d}h=l.length;let v=n;for(f=0;f<h;){const w=l[f++],_=l[f++];try{v=w(v)}catch(b){_.call(this,b);break}}try{d=I_.call(this,v)}catch(w){return Promise.reject(w)}for(f=0,h=u.length;f<h;)d=d.then(u[f++],u[f++]);return d}getUri(t){t=za(this.defaults,t);const n=kx(t.baseURL,t.url);return wx(n,t.params,t.paramsSerializer)}}A.forEach(["delete","get","head","options"],function(t){xa.prototype[t]=function(n,r){return this.request(za(r||{},{method:t,url:n,data:(r||{}).data}))}});A.forEach(["post","put","patch"],function(t){function n(r){return function(a,s,l){return this.request(za(l||{},{method:t,headers:r?{"Content-Type":"multipart/form-data"}:{},url:a,data:s}))}}xa.prototype[t]=n(),xa.prototype[t+"Form"]=n(!0)});class Jm{constructor(t){if(typeof t!="function")throw new TypeError("executor must be a function.");let n;this.promise=new Promise(function(a){n=a});const r=this;this.promise.then(i=>{if(!r._listeners)return;let a=r._listeners.length;for(;a-- >0;)r._listeners[a](i);r._listeners=null}),this.promise.then=i=>{let a;const s=new Promise(l=>{r.subscribe(l),a=l}).then(i);return s.cancel=function(){r.unsubscribe(a)},s},t(function(a,s,l){r.reason||(r.reason=new Js(a,s,l),n(r.reason))})}throwIfRequested(){if(this.reason)throw this.reason}subscribe(t){if(this.reason){t(this.reason);return}this._listeners?this._listeners.push(t):this._listeners=[t]}unsubscribe(t){if(!this._listeners)return;const n=this._listeners.indexOf(t);n!==-1&&this._listeners.splice(n,1)}toAbortSignal(){const t=new AbortController,n=r=>{t.abort(r)};return this.subscribe(n),t.signal.unsubscribe=()=>this.unsubscribe(n),t.signal}static source(){let t;return{token:new Jm(function(i){t=i}),cancel:t}}}function mO(e){return function(n){return e.apply(null,n)}}function gO(e){return A.isObject(e)&&e.isAxiosError===!0}const ah={Continue:100,SwitchingProtocols:101,Processing:102,EarlyHints:103,Ok:200,Created:201,Accepted:202,NonAuthoritativeInformation:203,NoContent:204,ResetContent:205,PartialContent:206,MultiStatus:207,AlreadyReported:208,ImUsed:226,MultipleChoices:300,MovedPermanently:301,Found:302,SeeOther:303,NotModified:304,UseProxy:305,Unused:306,TemporaryRedirect:307,PermanentRedirect:308,BadRequest:400,Unauthorized:401,PaymentRequired:402,Forbidden:403,NotFound:404,MethodNotAllowed:405,NotAcceptable:406,ProxyAuthenticationRequired:407,RequestTimeout:408,Conflict:409,Gone:410,LengthRequired:411,PreconditionFailed:412,PayloadTooLarge:413,UriTooLong:414,UnsupportedMediaType:415,RangeNotSatisfiable:416,ExpectationFailed:417,ImATeapot:418,MisdirectedRequest:421,UnprocessableEntity:422,Locked:423,FailedDependency:424,TooEarly:425,UpgradeRequired:426,PreconditionRequired:428,TooManyRequests:429,RequestHeaderFieldsTooLarge:431,UnavailableForLegalReasons:451,InternalServerError:500,NotImplemented:501,BadGateway:502,ServiceUnavailable:503,GatewayTimeout:504,HttpVersionNotSupported:505,VariantAlsoNegotiates:506,InsufficientStorage:507,LoopDetected:508,NotExtended:510,NetworkAuthenticationRequired:511};Object.entries(ah).forEach(([e,t])=>{ah[t]=e});function Px(e){const t=new xa(e),n=ox(xa.prototype.request,t);return A.extend(n,xa.prototype,t,{allOwnKeys:!0}),A.extend(n,t,null,{allOwnKeys:!0}),n.create=function(i){return Px(za(e,i))},n}const _t=Px(Ml);_t.Axios=xa;_t.CanceledError=Js;_t.CancelToken=Jm;_t.isCancel=xx;_t.VERSION=Rx;_t.toFormData=Cd;_t.AxiosError=ge;_t.Cancel=_t.CanceledError;_t.all=function(t){return Promise.all(t)};_t.spread=mO;_t.isAxiosError=gO;_t.mergeConfig=za;_t.AxiosHeaders=gn;_t.formToJSON=e=>bx(A.isHTMLForm(e)?new FormData(e):e);_t.getAdapter=jx.getAdapter;_t.HttpStatusCode=ah;_t.default=_t;var Ox=(e=>(e.COLLECTIONS="COLLECTIONS",e.ASSETS="ASSETS",e.CHAT_SESSIONS="CHAT_SESSIONS",e.CHATS="CHATS",e))(Ox||{});const Ym=_t.create({baseURL:`http://${window.location.hostname}:8081/api/`,headers:{"Content-type":"application/json","Access-Control-Allow-Origin":"*"}}),vO=async e=>{const{data:t}=await Ym.post("/db",{opr:"add",data:e});return t.data},_O=async()=>{const{data:e}=await Ym.post("/db",{opr:"clear_chats",type:"chat"});return e.data},wO=async()=>{const{data:e}=await Ym.post("/db",{opr:"chats",type:"chat"});return console.log("🚀 ~ list chats ~ data:",e),e.data},yO=()=>r2({queryKey:["CHATS"],queryFn:()=>wO()}),zx=ax(""),jd=vn(void 0),bO=e=>{const[t,n]=Le(zx),[,r]=Le(jd),i=()=>{e.onSend(),n(""),r(void 0)};return E.jsxs("div",{style:{display:"flex",flexDirection:"row",alignContent:"space-around"},children:[E.jsx("div",{style:{flex:1,padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(Tb,{autoFocus:!0,onKeyDown:({detail:a})=>{a.key==="Enter"&&!a.shiftKey&&i()},disabled:e.isDisabled,rows:2,placeholder:"Start a chat with the offline Gen-AI chatbot. for example - 'Hi How are you?'",spellcheck:!0,value:t,onChange:({detail:a})=>n(a.value)})}),E.jsx("div",{style:{padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(Pe,{size:"s",direction:"horizontal",children:E.jsx(kn,{disabled:e.isDisabled||t.length<3,variant:"primary",onClick:i,children:"Send"})})})]})};var Tx={color:void 0,size:void 0,className:void 0,style:void 0,attr:void 0},M_=o.createContext&&o.createContext(Tx),xO=["attr","size","title"];function EO(e,t){if(e==null)return{};var n=kO(e,t),r,i;if(Object.getOwnPropertySymbols){var a=Object.getOwnPropertySymbols(e);for(i=0;i<a.length;i++)r=a[i],!(t.indexOf(r)>=0)&&Object.prototype.propertyIsEnumerable.call(e,r)&&(n[r]=e[r])}return n}function kO(e,t){if(e==null)return{};var n={};for(var r in e)if(Object.prototype.hasOwnProperty.call(e,r)){if(t.indexOf(r)>=0)continue;n[r]=e[r]}return n}function Ou(){return Ou=Object.assign?Object.assign.bind():function(e){for(var t=1;t<arguments.length;t++){var n=arguments[t];for(var r in n)Object.prototype.hasOwnProperty.call(n,r)&&(e[r]=n[r])}return e},Ou.apply(this,arguments)}function A_(e,t){var n=Object.keys(e);if(Object.getOwnPropertySymbols){var r=Object.getOwnPropertySymbols(e);t&&(r=r.filter(function(i){return Object.getOwnPropertyDescriptor(e,i).enumerable})),n.push.apply(n,r)}return n}function zu(e){for(var t=1;t<arguments.length;t++){var n=arguments[t]!=null?arguments[t]:{};t%2?A_(Object(n),!0).forEach(function(r){SO(e,r,n[r])}):Object.getOwnPropertyDescriptors?Object.defineProperties(e,Object.getOwnPropertyDescriptors(n)):A_(Object(n)).forEach(function(r){Object.defineProperty(e,r,Object.getOwnPropertyDescriptor(n,r))})}return e}function SO(e,t,n){return t=CO(t),t in e?Object.defineProperty(e,t,{value:n,enumerable:!0,configurable:!0,writable:!0}):e[t]=n,e}function CO(e){var t=NO(e,"string");return typeof t=="symbol"?t:t+""}function NO(e,t){if(typeof e!="object"||!e)return e;var n=e[Symbol.toPrimitive];if(n!==void 0){var r=n.call(e,t||"default");if(typeof r!="object")return r;throw new TypeError("@@toPrimitive must return a primitive value.")}return(t==="string"?String:Number)(e)}function Ix(e){return e&&e.map((t,n)=>o.createElement(t.tag,zu({key:n},t.attr),Ix(t.child)))}function Lx(e){return t=>o.createElement(jO,Ou({attr:zu({},e.attr)},t),Ix(e.child))}function jO(e){var t=n=>{var{attr:r,size:i,title:a}=e,s=EO(e,xO),l=i||n.size||"1em",c;return n.className&&(c=n.className),e.className&&(c=(c?c+" ":"")+e.className),o.createElement("svg",Ou({stroke:"currentColor",fill:"currentColor",strokeWidth:"0"},n.attr,r,s,{className:c,style:zu(zu({color:e.color||n.color},n.style),e.style),height:l,width:l,xmlns:"http://www.w3.org/2000/svg"}),a&&o.createElement("title",null,a),e.children)};return M_!==void 0?o.createElement(M_.Consumer,null,n=>t(n)):t(Tx)}function RO(e){return Lx({tag:"svg",attr:{fill:"currentColor",viewBox:"0 0 16 16"},child:[{tag:"path",attr:{d:"M12 0H4a2 2 0 0 0-2 2v12a2 2 0 0 0 2 2h8a2 2 0 0 0 2-2V2a2 2 0 0 0-2-2m-1 7a3 3 0 1 1-6 0 3 3 0 0 1 6 0m-3 4c2.623 0 4.146.826 5 1.755V14a1 1 0 0 1-1 1H4a1 1 0 0 1-1-1v-1.245C3.854 11.825 5.377 11 8 11"},child:[]}]})(e)}function PO(e){return Lx({tag:"svg",attr:{viewBox:"0 0 24 24",fill:"currentColor"},child:[{tag:"path",attr:{d:"M13.5 2C13.5 2.44425 13.3069 2.84339 13 3.11805V5H18C19.6569 5 21 6.34315 21 8V18C21 19.6569 19.6569 21 18 21H6C4.34315 21 3 19.6569 3 18V8C3 6.34315 4.34315 5 6 5H11V3.11805C10.6931 2.84339 10.5 2.44425 10.5 2C10.5 1.17157 11.1716 0.5 12 0.5C12.8284 0.5 13.5 1.17157 13.5 2ZM6 7C5.44772 7 5 7.44772 5 8V18C5 18.5523 5.44772 19 6 19H18C18.5523 19 19 18.5523 19 18V8C19 7.44772 18.5523 7 18 7H13H11H6ZM2 10H0V16H2V10ZM22 10H24V16H22V10ZM9 14.5C9.82843 14.5 10.5 13.8284 10.5 13C10.5 12.1716 9.82843 11.5 9 11.5C8.17157 11.5 7.5 12.1716 7.5 13C7.5 13.8284 8.17157 14.5 9 14.5ZM15 14.5C15.8284 14.5 16.5 13.8284 16.5 13C16.5 12.1716 15.8284 11.5 15 11.5C14.1716 11.5 13.5 12.1716 13.5 13C13.5 13.8284 14.1716 14.5 15 14.5Z"},child:[]}]})(e)}const OO=e=>{const{chat:t}=e,[,n]=Le(IR),[,r]=Le(jd);return E.jsxs("div",{children:[E.jsxs("div",{style:{display:"flex",flexDirection:"row",alignContent:"space-around",padding:10},children:[E.jsx("div",{style:{flex:1,padding:10,alignContent:"center",alignSelf:"center",marginLeft:"40%",marginRight:0},children:E.jsx(jn,{children:t.human})}),E.jsx("div",{style:{padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(RO,{size:30,color:"#00a4ef",style:{cursor:"pointer"}})})]}),E.jsxs("div",{style:{display:"flex",flexDirection:"row-reverse",alignContent:"space-around",padding:10},children:[E.jsx("div",{style:{flex:1,padding:10,alignContent:"center",alignSelf:"center",marginLeft:"0",marginRight:"40%"},children:E.jsx(jn,{footer:E.jsx(Am,{headerText:"Insights",variant:"footer",defaultExpanded:!0,children:E.jsx(Ee,{float:"right",children:E.jsx(kn,{iconName:"angle-right",variant:"primary",onClick:()=>{r(t),n()}})})}),children:t.bot},t.id)}),E.jsx("div",{style:{padding:10,alignContent:"center",alignSelf:"center"},children:E.jsx(PO,{size:30,color:"#00a4ef",style:{cursor:"pointer"}})})]})]})},zO=()=>{const e=y.useRef(null),t=rm(),[n]=Le(zx),[r,i]=y.useState(!1),[a,s]=Le($s),l=sx($s),[c,u]=y.useState(""),{data:d,refetch:f}=yO(),[h]=Le(Wm),[v]=Le(Vm),[w]=Le(Gm),[_]=Le(nx),b=y.useMemo(()=>{if(c!==""&&d&&d.length>0){const S=[...d],C=S.pop();if(C)return C.bot=c,S.push(C),S}return d},[d,c]);y.useEffect(()=>{try{a.ws===null?s({...a,ws:new WebSocket(`ws://${window.location.hostname}:8081/ws`)}):(a.ws.onopen=S=>{Ue.success("Connected to core device"),s({...a,status:"connected"})},a.ws.onclose=S=>{s({ws:null,status:"disconnected"})},a.ws.onmessage=({data:S})=>{const C=JSON.parse(S);C.status===0?u(B=>B+C.part):C.status===1&&(i(!1),f()),x()})}catch(S){console.log("🚀 ~ err:",S)}},[a]);const p=xv({mutationFn:S=>vO(S),onSuccess:S=>{console.log("🚀 ~ ChatContainer ~ data:",S),m(S)},onError:S=>{console.log("🚀 ~ ChatContainer ~ err:",S),Ue("Message sending failed!",{type:"error"})},onSettled:()=>{t.invalidateQueries({queryKey:[Ox.CHATS]}),x()}}),g=xv({mutationFn:()=>_O(),onSuccess:S=>{console.log("🚀 ~ clearChatsMutation ~ data:",S),f(),x()},onError:S=>{console.log("🚀 ~ clearChatsMutation ~ err:",S)}}),m=S=>{try{a.ws&&(u(""),i(!0),a.ws.send(JSON.stringify({opr:"chat",id:S,parameters:{temperature:h,top_p:v,model:w,system_prompt:_}})))}catch{i(!1),l()}},x=()=>{var S;e.current&&(e.current.focus(),e.current.scrollIntoView({behavior:"auto",block:"end"}),(S=e.current.lastElementChild)==null||S.scrollIntoView({behavior:"auto",block:"end"}))};return E.jsx("div",{children:E.jsxs(jn,{header:E.jsx(Ct,{variant:"h2",actions:E.jsxs(Pe,{size:"s",direction:"horizontal",children:[E.jsx(kn,{disabled:r||g.isPending,loading:p.isPending,iconName:"refresh",onClick:()=>f(),children:"Refresh"}),E.jsx(kn,{disabled:r||p.isPending,loading:g.isPending,iconName:"delete-marker",onClick:()=>g.mutate(),children:"Clear Chat History"}),E.jsx(kn,{iconName:"angle-down",onClick:x,children:"Scroll to End"})]}),children:"Chat Messages"}),children:[E.jsxs("div",{ref:e,style:{maxHeight:"90vh",minHeight:"65vh",display:"flex",flex:1,flexDirection:"column",overflow:"auto"},children:[b&&b.length>0&&b.map(S=>E.jsx(OO,{chat:S},S.id)),E.jsx("div",{style:{display:"flex",flex:1,color:"#00a4ef",justifyContent:"center"},children:p.isPending&&E.jsx(Fm,{size:"large"})})]}),E.jsx(Ee,{children:E.jsx(bO,{isDisabled:p.isPending||r||a.status==="disconnected",onSend:()=>{p.mutate({id:Date.now(),type:"chat",human:n,bot:"...",metrics:{model:"",temperature:0,top_p:0,total_duration:0,load_duration:0,prompt_eval_duration:0,eval_count:0,eval_duration:0}})}})})]})})},TO=()=>{const[,e]=Le(Um);return E.jsx(vd,{header:E.jsx(Pe,{size:"m",children:E.jsx(Ct,{variant:"h1",info:E.jsx(_d,{onFollow:e,children:"Info"}),description:"Converse with an offline Gen-AI based chatbot.",children:"Chatbot"})}),children:E.jsx(Pe,{size:"xl",children:E.jsx(zO,{})})})},IO=()=>{const[e]=Le(jd);return E.jsx("div",{className:"drawer-example",children:E.jsx(Tl,{header:E.jsx("h2",{children:"Chat Info"}),children:E.jsx(Ee,{margin:{bottom:"l"},children:E.jsxs(Pe,{size:"l",children:[E.jsx(jn,{header:E.jsx(Ct,{variant:"h2",children:"Metrics"}),children:E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Model"}),E.jsx("div",{children:(e==null?void 0:e.metrics.model)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Temperature"}),E.jsx("div",{children:(e==null?void 0:e.metrics.temperature)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Top P"}),E.jsx("div",{children:(e==null?void 0:e.metrics.top_p)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Evaluation Count"}),E.jsx("div",{children:(e==null?void 0:e.metrics.eval_count)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Evaluation Duration"}),E.jsxs("div",{children:[e?(e.metrics.eval_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Evaluation Duration"}),E.jsxs("div",{children:[e?(e.metrics.prompt_eval_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Load Duration"}),E.jsxs("div",{children:[e?(e.metrics.load_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Total Duration"}),E.jsxs("div",{children:[e?(e.metrics.total_duration/1e9).toFixed(2):"-"," sec"]})]})]})}),E.jsx(jn,{header:E.jsx(Ct,{variant:"h2",children:"Metrics Parameters"}),children:E.jsx(Or,{children:E.jsxs("p",{children:["Each response also returns a bunch of metrics as follows",E.jsxs("ul",{children:[E.jsxs("li",{children:[E.jsx("b",{children:"Evaluation Count:"})," number of tokens in the response. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Evaluation Duration:"})," time in seconds spent generating the response. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Prompt Evaluation Duration:"})," time spent generating the response. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Load Duration:"})," time spent loading the model. "]}),E.jsxs("li",{children:[E.jsx("b",{children:"Total Duration:"})," time spent evaluating the prompt. "]})]})]})})})]})})})})},LO=()=>{const[e]=Le(jd);return E.jsx("div",{className:"drawer-example",children:e?E.jsx(IO,{}):E.jsx(Tl,{header:E.jsx("h2",{children:"Offline Chatbot"}),children:E.jsxs(Ee,{margin:{bottom:"l"},children:[E.jsx(Ct,{variant:"h3",children:"Chat Sessions"}),E.jsxs(Or,{children:[E.jsx("p",{children:"Generative AI-powered chat bots are driving the transformation of customer experience, enabling intuitive conversational interfaces that augment human capabilities across different business needs."}),E.jsx("p",{children:"Add conversational interfaces driven by natural language processing and generative responses from LLMs that understand intent, maintain context, and pull answers from trusted knowledge sources."})]})]})})})},MO=`http://${window.location.hostname}:8081`,AO=`${MO}/api/engine-vibration`,DO=async e=>{try{const t=new URLSearchParams;Object.entries(e).forEach(([r,i])=>{t.append(r,i.toString())});const n=await fetch(`${AO}?${t.toString()}`,{method:"GET",headers:{Accept:"application/json"}});if(!n.ok)throw new Error(`Server responded with status ${n.status}`);return await n.json()}catch(t){throw console.error("Error fetching engine vibration data:",t),t}},BO=e=>{const{metrics:t,prompt:n}=e;return E.jsx(jn,{header:E.jsx(Ct,{variant:"h2",children:"Analysis Metrics"}),children:E.jsxs(fi,{columns:3,variant:"text-grid",children:[E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Model"}),E.jsx("div",{children:(t==null?void 0:t.model)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Created At"}),E.jsx("div",{children:(t==null?void 0:t.created_at)??"-"})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Temperature"}),E.jsx("div",{children:(t==null?void 0:t.temperature)??"-"})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Top P"}),E.jsx("div",{children:(t==null?void 0:t.top_p)??"-"})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Response Length"}),E.jsxs("div",{children:[(t==null?void 0:t.response_length)??"-"," chars"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Evaluation Count"}),E.jsxs("div",{children:[(t==null?void 0:t.eval_count)??"-"," tokens"]})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Length"}),E.jsxs("div",{children:[(t==null?void 0:t.prompt_length)??"-"," chars"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Evaluation Count"}),E.jsxs("div",{children:[(t==null?void 0:t.prompt_eval_count)??"-"," tokens"]})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Preprocessing Duration"}),E.jsxs("div",{children:[t&&t.preprocessing_duration?(t.preprocessing_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Prompt Creation Duration"}),E.jsxs("div",{children:[t&&t.prompt_creation_duration?(t.prompt_creation_duration/1e9).toFixed(2):"-"," sec"]})]})]}),E.jsxs(Pe,{size:"l",children:[E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Model Response Duration"}),E.jsxs("div",{children:[t&&t.model_response_duration?(t.model_response_duration/1e9).toFixed(2):"-"," sec"]})]}),E.jsxs("div",{children:[E.jsx(Ee,{variant:"awsui-key-label",children:"Total Duration"}),E.jsxs("div",{children:[t&&t.total_duration?(t.total_duration/1e9).toFixed(2):"-"," sec"]})]})]})]})})},FO=`http://${window.location.hostname}:8081`,$O=`${FO}/api/engine-vibration`,qO=()=>{const[,e]=Le(Um),[t,n]=y.useState(!1),[r,i]=y.useState(""),[a,s]=y.useState(""),[l,c]=y.useState([]),[u,d]=y.useState({total_time:4,sampling_freq:2e4,rpm:2e3,num_cylinders:4,knock_start_time:2,knock_probability_start:.2,knock_probability_end:.9,knock_intensity_start:1,knock_intensity_end:4,knock_resonant_freq:667,knock_damping:.05,noise_level:.1,random_seed:42}),[f,h]=y.useState(0),[v,w]=y.useState(!1),[_,b]=y.useState(""),[p,g]=y.useState(""),[m,x]=y.useState(null),[S,C]=y.useState(""),[j,k]=y.useState(!1),[N,O]=Le($s),z=async()=>{n(!0),s("");try{console.log("Making API request with params:",u);let L;try{L=await DO(u)}catch(T){console.warn("Direct fetch failed, falling back to axios:",T),L=(await _t.get($O,{params:u,headers:{Accept:"application/json"}})).data}if(console.log("API response received:",L),!L)throw new Error("Empty response from API");if(L.error)throw new Error(`Server error: ${L.error}`);if(!L.plot)throw new Error("API response missing plot data");if(!L.params||L.params.knock_count===void 0)throw new Error("API response missing knock count data");i(`data:image/png;base64,${L.plot}`),h(L.params.knock_count),L.data&&Array.isArray(L.data)?c(L.data):(console.warn("Vibration data not available in the response"),c([]))}catch(L){if(console.error("Error generating vibration data:",L),L.code==="ERR_NETWORK")s("Cannot connect to API server. Please make sure the server is running on port 8081.");else{const T=L.response?`Server error: ${L.response.status} ${L.response.statusText}`:L.message||"Failed to generate vibration data. Please try again.";s(T)}i(""),h(0),c([])}finally{n(!1)}},M=()=>{if(l.length===0)return;const L=Object.keys(l[0]).join(","),T=l.map(Q=>Object.values(Q).join(",")).join(`
 `),B=`${L}
 ${T}`,D=new Blob([B],{type:"text/csv;charset=utf-8;"}),G=URL.createObjectURL(D),U=document.createElement("a");U.href=G,U.setAttribute("download",`engine_vibration_rpm${u.rpm}_cylinders${u.num_cylinders}.csv`),document.body.appendChild(U),U.click(),document.body.removeChild(U)},W=()=>{if(l.length!==0){if(!N.ws||N.status!=="connected"){g("WebSocket not connected. Please refresh the page and try again.");return}w(!0),g(""),b("");try{const L=Object.keys(l[0]).join(","),T=l.map(D=>Object.values(D).join(",")).join(`
 `),B=`${L}
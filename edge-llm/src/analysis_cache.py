@@ -0,0 +1,124 @@
+import os
+import numpy as np
+from .cache import LRUCache
+
+ANALYSIS_CACHE_ENTRIES = int(os.environ.get("EDGE_LLM_ANALYSIS_CACHE_ENTRIES", 128))
+# seconds a cached analysis is served, 0 disables the cache
+ANALYSIS_CACHE_TTL = float(os.environ.get("EDGE_LLM_ANALYSIS_CACHE_TTL", 3600))
+# near hits: largest distance to a stored analysis, in quantization steps of any one feature, 0 for exact hits only
+ANALYSIS_CACHE_NEAR = float(os.environ.get("EDGE_LLM_ANALYSIS_CACHE_NEAR", 1.0))
+
+# quantization step of each feature, about the noise between traces of the same engine state.
+# The crest factor step is the margin of the knock classifier bands.
+FEATURE_STEPS = {
+    "rms_amplitude": 0.05,
+    "crest_factor": 0.1,
+    "max_amplitude": 0.1,
+    "total_energy": 0.01,
+    "knock_band_excess": 0.25,
+    "knock_nonharmonic_ratio": 0.01,
+    "harmonic_ratio": 0.02,
+}
+# dominant frequencies compared, in Hz steps
+DOMINANT_FREQUENCIES = 3
+FREQUENCY_STEP = 2.0
+
+
+def feature_vector(features: dict) -> np.ndarray:
+    """Features of process_vibration_data in quantization steps, one value per dimension."""
+    windows = features.get("windows") or {}
+    values = [
+        features["rms_amplitude"],
+        features["crest_factor"],
+        features["max_amplitude"],
+        features["total_energy"],
+        # None when the sample rate leaves the knock band unobserved
+        windows.get("knock_band_excess", {}).get("p90") or 0.0,
+        windows.get("knock_nonharmonic_ratio", {}).get("mean", 0.0),
+        windows.get("harmonic_ratio", {}).get("mean", 0.0),
+    ]
+    vector = np.array(values) / np.array(list(FEATURE_STEPS.values()))
+    # the strongest peaks in frequency order, missing peaks as 0 Hz so they never match a real one
+    freqs = sorted(features["dominant_frequencies"][:DOMINANT_FREQUENCIES])
+    freqs += [0.0] * (DOMINANT_FREQUENCIES - len(freqs))
+    return np.concatenate([vector, np.array(freqs) / FREQUENCY_STEP])
+
+
+def analysis_group(engine_info: dict, model: str, verdict: dict = None) -> tuple:
+    """Analyses are only shared within the same engine, model and rule-based verdict.
+
+    The verdict keeps a near hit from crossing a severity boundary the rules already see.
+    """
+    return (
+        model,
+        engine_info["type"],
+        engine_info["cylinders"],
+        engine_info["rpm"],
+        verdict["severity"] if verdict else None,
+        verdict["ambiguous"] if verdict else None,
+    )
+
+
+class AnalysisCache:
+    """Model analyses keyed on quantized features, with a nearest-neighbour fallback.
+
+    An exact hit needs every feature in the same quantization bucket. When
+    there is none, the stored analysis of the same group whose features are
+    closest is used if no feature is further than `near` steps away.
+    """
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_ENTRIES, ttl: float = ANALYSIS_CACHE_TTL,
+                 near: float = ANALYSIS_CACHE_NEAR):
+        self.near = near
+        self.enabled = ttl > 0 and max_entries > 0
+        self.cache = LRUCache(max_entries, ttl=ttl)
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def lookup(self, group: tuple, features: dict):
+        """Cached entry and its distance in quantization steps, or (None, None)."""
+        if not self.enabled:
+            return None, None
+        vector = feature_vector(features)
+        entry = self.cache.get((group, tuple(np.rint(vector).astype(int))))
+        if entry is not None:
+            self.exact_hits += 1
+            return entry, float(np.abs(entry["vector"] - vector).max())
+
+        if self.near > 0:
+            candidates = [(key, value) for key, value in self.cache.items() if key[0] == group]
+            if candidates:
+                distances = [float(np.abs(value["vector"] - vector).max()) for _, value in candidates]
+                best = int(np.argmin(distances))
+                if distances[best] <= self.near:
+                    # counts as use, keeps the entry from being evicted
+                    entry = self.cache.get(candidates[best][0])
+                    if entry is not None:
+                        self.near_hits += 1
+                        return entry, distances[best]
+        self.misses += 1
+        return None, None
+
+    def store(self, group: tuple, features: dict, response: str, metrics: dict):
+        if not self.enabled:
+            return
+        vector = feature_vector(features)
+        self.cache.put((group, tuple(np.rint(vector).astype(int))),
+                       {"vector": vector, "response": response, "metrics": metrics})
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "near": self.near,
+            "hits": self.exact_hits + self.near_hits,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+        }
+
+
+analysis_cache = AnalysisCache()
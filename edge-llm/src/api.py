@@ -2,33 +2,43 @@ import os
 import time
 import logging
 import json
-import requests
-import threading
 import asyncio
-import numpy as np
-import pandas as pd
-import random
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, File, UploadFile, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response, JSONResponse
+from .log_config import log_config, TOKEN_EVENT
+# queued JSON logging, set up before the modules below log at import time
+log_config.configure()
 from . import db_manager
+from .chat_context import chat_context
+from .scheduler import JobScheduler, QueueFullError
+from .ollama_client import ollama, OllamaError
+from . import vibration_formats
+from . import vibration_features
+from . import vibration_sim
+from .vibration_sim import DEFAULT_CHUNK_SIZE, normalize_vibration_params, stream_engine_vibration_data
+from . import knock_classifier
+import httpx
 import base64
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+from . import plotting
+from .dataset_cache import CachedDataset, dataset_cache, dataset_key, dataset_etag, etag_matches
+from .analysis_cache import analysis_cache, analysis_group
+from . import fleet_analysis
+from .fleet_analysis import FleetTrace
+from . import sensor_stream
+from .sensor_stream import sensor_streams
+from .process_pool import process_pool, loop_lag
+from .warmup import warmup, import_modules, WARMUP_ENABLED
+from .token_stream import TokenStream, token_streams
+from . import telemetry
+from .telemetry import (current_opr, feature_extraction_seconds, trace_generation_seconds, plot_render_seconds,
+                        AllocationPeak)
 import io
+import resource
 from typing import Optional
-from scipy import signal
-from scipy.fft import fft, fftfreq
-from scipy import stats
-
-logging.basicConfig(
-    format="{asctime} - {levelname} - {message}",
-    style="{",
-    datefmt="%Y-%m-%d %H:%M",
-    level=logging.DEBUG,
-)
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 app.add_middleware(
@@ -39,42 +49,103 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+# request latency by route, the mounted /api app included
+app.add_middleware(telemetry.MetricsMiddleware)
 
 # constants
-OLLAMA_GENERATE_URL = "http://localhost:11434/api/generate"
-OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
 OLLAMA_TEXT_MODEL = "qwen3:1.7b"
 DEFAULT_SYSTEM_PROMPT = "/no_think - You are a helpful AI assistant. Answer questions accurately and concisely. Answer questions directly and concisely without sharing your internal thinking process."
 
+# websocket job scheduling, number of concurrent jobs per opr and queue limits
+OPR_CONCURRENCY = {
+    "chat": int(os.environ.get("EDGE_LLM_CHAT_WORKERS", 2)),
+    "textGeneration": int(os.environ.get("EDGE_LLM_TEXT_GENERATION_WORKERS", 2)),
+    "engineAnalysis": int(os.environ.get("EDGE_LLM_ENGINE_ANALYSIS_WORKERS", 1)),
+    "fleetAnalysis": int(os.environ.get("EDGE_LLM_FLEET_ANALYSIS_WORKERS", 1)),
+}
+MAX_QUEUED_JOBS = int(os.environ.get("EDGE_LLM_MAX_QUEUED_JOBS", 64))
+MAX_CONNECTION_JOBS = int(os.environ.get("EDGE_LLM_MAX_CONNECTION_JOBS", 8))
+
+# largest chunk_size accepted when /api/engine-vibration streams its response
+MAX_CHUNK_SIZE = 1048576
+# reads of a stream window retried when the ingest overwrote it meanwhile
+STREAM_WINDOW_READ_ATTEMPTS = 3
+
 # app.mount("/static", StaticFiles(directory="../static"), name="static")
 folder = os.path.dirname(__file__)
 
+scheduler = JobScheduler(OPR_CONCURRENCY, MAX_QUEUED_JOBS, MAX_CONNECTION_JOBS)
+
+# read when /metrics is scraped, alongside the histograms
+telemetry.registry.gauge(
+    "edge_llm_jobs_queued", "WebSocket jobs waiting for a worker", ("opr",),
+    lambda: {(opr,): stats["queue_depth"] for opr, stats in scheduler.metrics()["oprs"].items()})
+telemetry.registry.gauge(
+    "edge_llm_jobs_running", "WebSocket jobs running", ("opr",),
+    lambda: {(opr,): stats["running"] for opr, stats in scheduler.metrics()["oprs"].items()})
+telemetry.registry.gauge(
+    "edge_llm_token_streams_active", "Model answers streaming to a WebSocket", (),
+    lambda: {(): token_streams.active})
+telemetry.registry.gauge(
+    "edge_llm_log_records_dropped", "Log records dropped because the writer thread fell behind", (),
+    lambda: {(): log_config.metrics()["dropped"]})
+telemetry.registry.gauge(
+    "edge_llm_process_pool_running", "Calls running or waiting in the process pool", (),
+    lambda: {(): process_pool.metrics()["running"]})
+
 
+@app.on_event("startup")
+async def start_scheduler():
+    scheduler.start()
+    loop_lag.start()
+    # the heavy libraries and the worker processes load after the port is bound, /api/health tells when
+    if WARMUP_ENABLED:
+        warmup.start({"imports": import_modules, "process_pool": process_pool.warm})
 
-async def broadcast_message(websocket: WebSocket, message: str, body: any):
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await warmup.stop()
+    await scheduler.stop()
+    await ollama.close()
+    await loop_lag.stop()
+    process_pool.close()
+    sensor_streams.close()
+    # commit writes still waiting for their batch
+    db_manager.db.close()
+
+
+async def broadcast_message(tokens: TokenStream, message: str, body: any):
     response_part = body.get('response', '')
-    # the response streams one token at a time, print that as we receive it
-    print(response_part, end='', flush=True)
+    # the response streams one token at a time, a sample of them is logged at debug level
+    logger.debug("Token %r", response_part, extra=TOKEN_EVENT)
     message += response_part
-    await websocket.send_text(json.dumps({
-        "part": response_part
-    }))
+    # coalesced with the tokens around it into one frame
+    await tokens.write(response_part)
     if 'error' in body:
+        await tokens.flush()
         raise Exception(body['error'])
 
     if body.get('done', False):
-        print(body)
+        logger.info("Text generation complete", extra=answer_fields(body))
         body["response"] = message
         body["status"] = message
+        body["stream"] = tokens.metrics()
 
-        await websocket.send_text(json.dumps(body))
+        await tokens.send(body)
     return message
 
 
+def answer_fields(body: dict) -> dict:
+    """Fields of the final part of a model answer worth a structured log record, without the text."""
+    return {key: body.get(key) for key in ("model", "eval_count", "eval_duration", "prompt_eval_count",
+                                           "prompt_eval_duration", "total_duration")}
+
+
 async def ollama_generate_text(payload: any, websocket: WebSocket):
-    print("ollama generate-->")
-    logging.debug(payload)
+    logger.info("Text generation started", extra={"prompt_length": len(payload.get("prompt", ""))})
     message = ""
+    tokens = TokenStream(websocket, {})
     try:
         # Extract parameters with defaults if not provided
         parameters = payload.get("parameters", {})
@@ -82,47 +153,32 @@ async def ollama_generate_text(payload: any, websocket: WebSocket):
         top_p = parameters.get("top_p", 0.9)
         model = parameters.get("model", OLLAMA_TEXT_MODEL)
         system_prompt = DEFAULT_SYSTEM_PROMPT
-        
-        # Add explicit instructions against exposing thinking process
-        
-        # Construct the prompt with the enhanced system prompt
-        formatted_prompt = f"{system_prompt}\n\nUser: {payload['prompt']}\n\nAssistant: "
-        
-        r = requests.post(OLLAMA_GENERATE_URL,
-                          json={
-                              'model': model,
-                              'prompt': formatted_prompt,
-                              'options': {
-                                  'temperature': temperature,
-                                  'top_p': top_p
-                              }
-                          },
-                          stream=True)
-        for line in r.iter_lines():
-            body = json.loads(line)
+
+        # the system prompt goes in its own field, so the model's template puts it first and
+        # unchanged in every request and Ollama reuses its KV cache instead of evaluating it again
+        stream = ollama.generate({
+            'model': model,
+            'system': system_prompt,
+            'prompt': payload['prompt'],
+            'options': {
+                'temperature': temperature,
+                'top_p': top_p
+            }
+        })
+        async for body in stream:
             message = await broadcast_message(
-                websocket=websocket, message=message, body=body)
+                tokens=tokens, message=message, body=body)
     except Exception as e:
-        logging.error("exception ")
-        logging.error(e)
+        logger.error(f"Model request failed: {e}")
+    finally:
+        tokens.close()
 
 async def ollama_chat(payload: any, websocket: WebSocket):
-    print("ollama chat-->")
+    logger.info("Chat started", extra={"chat_id": payload.get("id")})
     message = ""
     history = []
+    tokens = TokenStream(websocket, {"id": payload["id"], "status": 0})
     try:
-        # Get chat history with graceful handling for database issues
-        try:
-            chat_history = db_manager.get_chat_history()
-            print(f"chat_history : {chat_history}")
-            # Check if chat_history is a string (error message) instead of a list
-            if isinstance(chat_history, str):
-                print(f"Error in chat history response: {chat_history}")
-                chat_history = []
-        except Exception as e:
-            print(f"Error retrieving chat history, proceeding with empty history: {e}")
-            chat_history = []
-        
         # Extract parameters with defaults if not provided
         parameters = payload.get("parameters", {})
         temperature = parameters.get("temperature", 0.7)
@@ -131,62 +187,49 @@ async def ollama_chat(payload: any, websocket: WebSocket):
         # Get system prompt from parameters or use default
         system_prompt = DEFAULT_SYSTEM_PROMPT
         
-        # First, add the system message
-        messages = [
-            {
-                "role": "system",
-                "content": system_prompt
+        # System prompt, rolling summary and the recent turns that fit the token budget,
+        # with graceful handling for database issues
+        try:
+            messages = chat_context.messages(system_prompt)
+        except Exception as e:
+            logger.warning(f"Error retrieving chat history, proceeding with empty history: {e}")
+            messages = [
+                {
+                    "role": "system",
+                    "content": system_prompt
+                }
+            ]
+        logger.debug(f"Chat request with {len(messages)} messages")
+
+        stream = ollama.chat({
+            'model': model,
+            'messages': messages,
+            'options': {
+                'temperature': temperature,
+                'top_p': top_p
             }
-        ]
-        
-        # Then add the chat history
-        for chat in chat_history:
-            messages.append({
-                "role": "user",
-                "content": chat["human"]
-            })
-            if chat["bot"] != "...":
-                messages.append({
-                    "role": "assistant",
-                    "content": chat["bot"]
-                })
+        })
 
-        print(f"history - {messages}")
-        print("*********************")
-
-        r = requests.post(OLLAMA_CHAT_URL,
-                          json={
-                              'model': model,
-                              'messages': messages,
-                              'options': {
-                                  'temperature': temperature,
-                                  'top_p': top_p
-                              }
-                          },
-                          stream=True)
-
-        for line in r.iter_lines():
-            body = json.loads(line)
-            # print(body)
+        async for body in stream:
             message += body["message"]["content"]
-            # dispatch messages to front end
-            await websocket.send_text(json.dumps({
-                "id": payload["id"],
-                "part": message,
-                "status": 0
-            }))
+            logger.debug("Token %r", body["message"]["content"], extra=TOKEN_EVENT)
+            # dispatch the new text to front end, coalesced into frames of several tokens
+            await tokens.write(body["message"]["content"])
             if 'error' in body:
+                await tokens.flush()
                 raise Exception(body['error'])
 
             # send a final update to front end
             if body.get('done', False):
-                print(body)
+                logger.info("Chat answer complete", extra={"chat_id": payload["id"], **answer_fields(body)})
                 body["id"] = payload["id"]
                 body["response"] = message
                 body["status"] = 1
-                await websocket.send_text(json.dumps(body))
+                body["stream"] = tokens.metrics()
+                await tokens.send(body)
 
                 # update DB with the response values
+                chat_context.record_response(payload["id"], message)
                 db_manager.update_chat_by_id(payload["id"], {
                     "response": message,
                     "metrics": {
@@ -195,36 +238,46 @@ async def ollama_chat(payload: any, websocket: WebSocket):
                         "top_p": parameters.get("top_p", 0.9),
                         "total_duration":  body.get("total_duration"),
                         "load_duration":  body.get("load_duration"),
+                        "prompt_eval_count": body.get("prompt_eval_count"),
                         "prompt_eval_duration": body.get("prompt_eval_duration"),
                         "eval_count":  body.get("eval_count"),
                         "eval_duration":  body.get("eval_duration"),
                     }
                 })
 
+                # fold turns that left the window into the summary, the reply is already out
+                await chat_context.fold_summary(
+                    lambda prompt: ollama.complete({'model': model, 'prompt': prompt, 'options': {'temperature': 0.2}}))
+
     except Exception as e:
-        logging.error("exception ")
-        logging.error(e)
+        logger.error(f"Model request failed: {e}")
+    finally:
+        tokens.close()
 
 
-def threadRunner(payload: dict, websocket: WebSocket):
+async def jobRunner(payload: dict, websocket: WebSocket):
     try:
         if payload["opr"] == "textGeneration":
-            asyncio.run(ollama_generate_text(payload=payload, websocket=websocket))
+            await ollama_generate_text(payload=payload, websocket=websocket)
         elif payload["opr"] == "chat":
-            asyncio.run(ollama_chat(payload=payload, websocket=websocket))
-        elif payload["opr"] == "engineAnalysis":  # Add this if it's not already there
-            asyncio.run(ollama_analyze_engine(payload=payload, websocket=websocket))
+            await ollama_chat(payload=payload, websocket=websocket)
+        elif payload["opr"] == "engineAnalysis":
+            await ollama_analyze_engine(payload=payload, websocket=websocket)
+        elif payload["opr"] == "fleetAnalysis":
+            await ollama_analyze_fleet(payload=payload, websocket=websocket)
         else:
             return False
         return True
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        print(f"Error in threadRunner: {e}")
+        logger.error(f"Error in jobRunner: {e}")
         # Try to send error message to client
         try:
-            asyncio.run(websocket.send_text(json.dumps({
+            await websocket.send_text(json.dumps({
                 "error": str(e),
                 "status": -1
-            })))
+            }))
         except:
             pass
         return False
@@ -240,28 +293,190 @@ async def db_operations(payload: dict) -> dict:
         return {"data": response}
 
 
+@app.get("/api/health", tags=["health"])
+async def health_ready():
+    """Readiness, 503 until the background warm-up is done, so a load balancer waits for a fast first request."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/api/health/live", tags=["health"])
+async def health_live() -> dict:
+    """Liveness, answered as soon as the event loop serves requests."""
+    return {"alive": True}
+
+
+@app.get("/api/scheduler", tags=["metrics"])
+async def scheduler_metrics() -> dict:
+    return scheduler.metrics()
+
+
+@app.get("/api/cache", tags=["metrics"])
+async def cache_metrics() -> dict:
+    return {"dataset": dataset_cache.stats(), "plot": plotting.plot_cache.stats(), "analysis": analysis_cache.stats()}
+
+
+@app.get("/api/streams", tags=["metrics"])
+async def stream_metrics() -> dict:
+    """Sliding-window state and recent alerts of every streaming engine."""
+    return sensor_streams.status()
+
+
+@app.get("/api/process-pool", tags=["metrics"])
+async def process_pool_metrics() -> dict:
+    """Calls offloaded to worker processes, and the event loop lag they would otherwise add to."""
+    return {"pool": process_pool.metrics(), "loop_lag": loop_lag.metrics()}
+
+
+@app.get("/api/ollama", tags=["metrics"])
+async def ollama_metrics() -> dict:
+    """Prompt evaluation totals per Ollama endpoint, a falling prompt_eval_duration_avg means the KV cache is reused."""
+    return ollama.metrics()
+
+
+@app.get("/api/token-streams", tags=["metrics"])
+async def token_stream_metrics() -> dict:
+    """Frames and bytes of streamed model answers, against what a frame per token would have sent."""
+    return token_streams.metrics()
+
+
+@app.get("/metrics", tags=["metrics"])
+async def prometheus_metrics() -> Response:
+    """Latency histograms and queue gauges in the Prometheus text format."""
+    return Response(telemetry.registry.exposition(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    print("Websocket connect -->")
+    logger.info("WebSocket connected")
     await websocket.accept()
+    connection = scheduler.connection()
     try:
         while True:
-            data = await websocket.receive_text()
-            payload: dict = json.loads(data)
-            print(payload["opr"])
-            thread = threading.Thread(
-                target=threadRunner, args=(payload, websocket))
-            # Start the thread
-            thread.start()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                # binary frames carry a JSON header and raw sample arrays, see vibration_formats
+                data = message["bytes"]
+                try:
+                    with AllocationPeak() as parse_peak:
+                        payload, arrays = vibration_formats.decode_binary_message(data)
+                except ValueError as e:
+                    await websocket.send_text(json.dumps({"error": f"Invalid binary message: {e}", "status": -1}))
+                    continue
+                payload["arrays"] = arrays
+                payload["parse_peak_bytes"] = parse_peak.bytes
+            else:
+                data = message["text"]
+                try:
+                    payload = json.loads(data)
+                except ValueError as e:
+                    await websocket.send_text(json.dumps({"error": f"Invalid message: {e}", "status": -1}))
+                    continue
+            if not isinstance(payload, dict) or not isinstance(payload.get("opr"), str):
+                await websocket.send_text(json.dumps({
+                    "id": payload.get("id") if isinstance(payload, dict) else None,
+                    "error": "Invalid message: expected a JSON object with a string opr",
+                    "status": -1
+                }))
+                continue
+            payload["message_size"] = len(data)
+            logger.debug("WebSocket message", extra={"opr": payload.get("opr")})
+            try:
+                scheduler.submit(payload["opr"], connection,
+                                 lambda payload=payload: jobRunner(payload, websocket))
+            except (KeyError, QueueFullError) as e:
+                # reply straight away so the client is not left waiting on a job that never runs
+                error = f"Unsupported operation: {payload['opr']}" if isinstance(e, KeyError) else str(e)
+                await websocket.send_text(json.dumps({
+                    "id": payload.get("id"),
+                    "error": error,
+                    "status": -1
+                }))
 
     except WebSocketDisconnect:
-        print("Websocket disconnect xxxx->")
+        logger.info("WebSocket disconnected")
+    finally:
+        scheduler.cancel_connection(connection)
+
+@app.websocket("/ws/stream")
+async def sensor_stream_endpoint(websocket: WebSocket):
+    """Continuous samples from engine sensors in, knock alerts out.
+
+    Each message carries an `engine_id`, the engine `params` (needed on the
+    first message of an engine) and its next samples, as a `samples` list in
+    a JSON text frame or as the `vibration` column of a binary frame. Nothing
+    is sent back until an alert is raised. With `analyze_on_alert` in
+    `parameters`, an alert also queues an engineAnalysis of the window, which
+    streams back with the alert id.
+    """
+    logger.info("Sensor stream connected")
+    await websocket.accept()
+    connection = scheduler.connection()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            engine_id = None
+            try:
+                if message.get("bytes") is not None:
+                    header, arrays = vibration_formats.decode_binary_message(message["bytes"])
+                    samples = arrays["vibration"]
+                else:
+                    header = json.loads(message["text"])
+                    if not isinstance(header, dict):
+                        raise ValueError("message must be a JSON object")
+                    samples = header.get("samples") or []
+                engine_id = header["engine_id"]
+                for key in ("params", "parameters"):
+                    if not isinstance(header.get(key) or {}, dict):
+                        raise ValueError(f"{key} must be a JSON object")
+                stream, alerts = await asyncio.to_thread(sensor_streams.ingest, engine_id, header.get("params"), samples)
+            except (ValueError, KeyError) as e:
+                await websocket.send_text(json.dumps({
+                    "engine_id": engine_id,
+                    "error": f"Invalid sensor message: {e}",
+                    "status": -1
+                }))
+                continue
+
+            parameters = header.get("parameters") or {}
+            for alert in alerts:
+                headline = "knock cleared" if alert["severity"] == "none" else f"{alert['severity']} knock"
+                await websocket.send_text(json.dumps({
+                    "id": f"{engine_id}-alert-{alert['sequence']}",
+                    "part": f"**Engine {engine_id}** at {alert['stream_time']:.1f} s: {headline} ({alert['type']})\n",
+                    "alert": alert,
+                    "status": 0
+                }))
+                if alert["type"] == "cleared" or not parameters.get("analyze_on_alert", sensor_stream.STREAM_ANALYZE_ON_ALERT):
+                    continue
+                # the rules already decided, ask the model for the narrative of the window
+                payload = {
+                    "opr": "engineAnalysis",
+                    "id": f"{engine_id}-alert-{alert['sequence']}",
+                    # the job outlives this window of the ring, it gets its own copy
+                    "arrays": {"vibration": stream.latest()[0].copy()},
+                    "params": stream.params,
+                    "parameters": {**parameters, "narrative": True},
+                }
+                try:
+                    scheduler.submit("engineAnalysis", connection,
+                                     lambda payload=payload: jobRunner(payload, websocket))
+                except QueueFullError as e:
+                    logger.warning(f"Skipping the analysis of alert {payload['id']}: {e}")
+
+    except WebSocketDisconnect:
+        logger.info("Sensor stream disconnected")
+    finally:
+        scheduler.cancel_connection(connection)
 
 # Define a separate app for API routes to ensure they take precedence
 api_app = FastAPI()
 
-@api_app.get("/engine-vibration")
-async def get_engine_vibration(
+def vibration_query(
     total_time: Optional[float] = Query(10.0),
     sampling_freq: Optional[int] = Query(1000),
     rpm: Optional[int] = Query(3000),
@@ -275,44 +490,245 @@ async def get_engine_vibration(
     knock_damping: Optional[float] = Query(0.05),
     noise_level: Optional[float] = Query(0.1),
     random_seed: Optional[int] = Query(42)
+) -> dict:
+    """Generation parameters shared by the engine vibration endpoints."""
+    return dict(
+        total_time=total_time,
+        sampling_freq=sampling_freq,
+        rpm=rpm,
+        num_cylinders=num_cylinders,
+        knock_start_time=knock_start_time,
+        knock_probability_start=knock_probability_start,
+        knock_probability_end=knock_probability_end,
+        knock_intensity_start=knock_intensity_start,
+        knock_intensity_end=knock_intensity_end,
+        knock_resonant_freq=knock_resonant_freq,
+        knock_damping=knock_damping,
+        noise_level=noise_level,
+        random_seed=random_seed
+    )
+
+@api_app.get("/engine-vibration")
+async def get_engine_vibration(
+    generation_params: dict = Depends(vibration_query),
+    stream: Optional[bool] = Query(False),
+    chunk_size: Optional[int] = Query(DEFAULT_CHUNK_SIZE),
+    output_format: Optional[str] = Query(None, alias="format"),
+    dtype: Optional[str] = Query("float64"),
+    include_time: Optional[bool] = Query(True),
+    plot: Optional[bool] = Query(True),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
 ):
+    output_format = vibration_formats.negotiate_format(output_format, accept, stream=stream)
+    if dtype not in vibration_formats.DTYPES:
+        return {"error": f"Unsupported dtype: {dtype}"}
+    dtype = vibration_formats.DTYPES[dtype]
+
+    if stream:
+        if output_format not in vibration_formats.STREAM_FORMATS:
+            return {"error": f"Unsupported stream format: {output_format}"}
+        if not chunk_size or chunk_size < 1 or chunk_size > MAX_CHUNK_SIZE:
+            return {"error": f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}"}
+        # checked before the response starts, a bad parameter cannot turn into a broken 200
+        try:
+            generation_params = normalize_vibration_params(**generation_params)
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}
+        logger.info(f"Streaming engine vibration data in chunks of {chunk_size} samples")
+        if output_format == "binary":
+            encoder, media_type = vibration_formats.binary_stream, vibration_formats.BINARY_MEDIA_TYPE
+            encoder_options = {"dtype": dtype, "include_time": include_time}
+        else:
+            encoder, media_type = vibration_formats.ndjson_stream, vibration_formats.NDJSON_MEDIA_TYPE
+            encoder_options = {"include_time": include_time}
+
+        # a plain generator, so Starlette computes and encodes each chunk on its threadpool
+        def body():
+            params, chunks = stream_engine_vibration_data(chunk_size=chunk_size, **generation_params)
+            yield from encoder(params, chunks, **encoder_options)
+
+        return StreamingResponse(body(), media_type=media_type)
+
+    if output_format not in vibration_formats.FORMATS:
+        return {"error": f"Unsupported format: {output_format}"}
+
     try:
-        logging.info(f"Generating engine vibration data with params: rpm={rpm}, cylinders={num_cylinders}")
-        
-        # Generate the vibration data
-        df, params = generate_engine_vibration_data(
-            total_time=total_time,
-            sampling_freq=sampling_freq,
-            rpm=rpm,
-            num_cylinders=num_cylinders,
-            knock_start_time=knock_start_time,
-            knock_probability_start=knock_probability_start,
-            knock_probability_end=knock_probability_end,
-            knock_intensity_start=knock_intensity_start,
-            knock_intensity_end=knock_intensity_end,
-            knock_resonant_freq=knock_resonant_freq,
-            knock_damping=knock_damping,
-            noise_level=noise_level,
-            random_seed=random_seed
-        )
-        
-        logging.info(f"Vibration data generated successfully with {params['knock_count']} knock events")
-        
-        # Generate the visualization
-        plot_data = visualize_dataset(df, params)
-        logging.info("Visualization generated successfully")
-        
-        # Return the data, parameters, and visualization
-        return {
-            "data": df.to_dict(orient="records"),
-            "params": params,
-            "plot": plot_data
-        }
+        # the body depends only on these, records always carry time and ignore dtype,
+        # the other formats have no plot and columnar JSON ignores dtype
+        if output_format == "records":
+            variant = (output_format, None, True, plot)
+        else:
+            variant = (output_format, None if output_format == "columnar" else dtype, include_time, False)
+        # answering a revalidation does not need the trace, which may have left the cache
+        etag = dataset_etag(dataset_key(normalize_vibration_params(**generation_params)), variant)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        dataset = await get_vibration_dataset(generation_params)
+        body = dataset.responses.get(variant)
+        if body is None:
+            if output_format == "arrow":
+                try:
+                    body = await asyncio.to_thread(vibration_formats.arrow_ipc, dataset.params, dataset.time,
+                                                   dataset.vibration, dtype, include_time)
+                except ImportError:
+                    return {"error": "Arrow output requires pyarrow to be installed"}
+            else:
+                png = await dataset_plot(dataset) if output_format == "records" and plot else None
+                body = await asyncio.to_thread(encode_vibration_response, dataset, output_format, dtype,
+                                               include_time, png)
+            # a body that would take the entry over the cache limit is served without keeping it
+            if dataset_cache.fits(dataset.nbytes + len(body)):
+                dataset.responses[variant] = body
+                # store again so the cache accounts for the encoded body
+                dataset_cache.put(dataset.key, dataset)
+
+        media_type = {
+            "binary": vibration_formats.BINARY_MEDIA_TYPE,
+            "arrow": vibration_formats.ARROW_MEDIA_TYPE,
+        }.get(output_format, vibration_formats.JSON_MEDIA_TYPE)
+        return Response(body, media_type=media_type, headers=headers)
+    except Exception as e:
+        logger.error(f"Error generating engine vibration data: {e}")
+        logger.exception("Detailed error:")
+        return {"error": str(e)}
+
+async def get_vibration_dataset(generation_params: dict) -> CachedDataset:
+    """The trace for a set of generation parameters, generated in the process pool on a cache miss."""
+    key = dataset_key(normalize_vibration_params(**generation_params))
+    dataset = dataset_cache.get(key)
+    if dataset is not None:
+        return dataset
+
+    logger.info(f"Generating engine vibration data with params: rpm={generation_params['rpm']}, cylinders={generation_params['num_cylinders']}")
+    with trace_generation_seconds.time():
+        sample_time, vibration, params = await process_pool.run(vibration_sim.generate_vibration_arrays,
+                                                                **generation_params)
+    logger.info(f"Vibration data generated successfully with {params['knock_count']} knock events")
+
+    dataset = CachedDataset(key, params, sample_time, vibration)
+    dataset_cache.put(key, dataset)
+    return dataset
+
+async def dataset_plot(dataset: CachedDataset) -> bytes:
+    """PNG of a trace, rendered in the process pool once per set of generation parameters."""
+    key = plotting.plot_cache_key(dataset.params)
+    png = plotting.plot_cache.get(key)
+    if png is None:
+        with plot_render_seconds.time():
+            png = await process_pool.run(plotting.render_plot, dataset.time, dataset.vibration, dataset.params)
+        plotting.plot_cache.put(key, png)
+    return png
+
+def encode_vibration_response(dataset: CachedDataset, output_format: str, dtype: str, include_time: bool,
+                              png: bytes = None) -> bytes:
+    """Encode a cached trace in one of the one-shot formats of /api/engine-vibration, records with `png` as the plot."""
+    if output_format == "columnar":
+        return vibration_formats.columnar_json(dataset.params, dataset.time, dataset.vibration, include_time)
+    if output_format == "binary":
+        frames = vibration_formats.binary_stream(dataset.params, [(dataset.time, dataset.vibration)], dtype, include_time)
+        return b"".join(frames)
+    if png is not None:
+        png = base64.b64encode(png).decode('utf-8')
+    return vibration_formats.records_json(dataset.params, dataset.time, dataset.vibration, png)
+
+@api_app.get("/engine-vibration/plot")
+async def get_engine_vibration_plot(
+    generation_params: dict = Depends(vibration_query),
+    if_none_match: Optional[str] = Header(None)
+):
+    """The plot of a trace as a PNG image, rendered on first request."""
+    try:
+        params = normalize_vibration_params(**generation_params)
+        # answering a revalidation needs neither the trace nor the plot
+        etag = dataset_etag(dataset_key(params), ("png",))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        png = plotting.plot_cache.get(plotting.plot_cache_key(params))
+        if png is None:
+            dataset = await get_vibration_dataset(generation_params)
+            png = await dataset_plot(dataset)
+        return Response(png, media_type="image/png", headers=headers)
     except Exception as e:
-        logging.error(f"Error generating engine vibration data: {e}")
-        logging.exception("Detailed error:")
+        logger.error(f"Error rendering engine vibration plot: {e}")
+        logger.exception("Detailed error:")
         return {"error": str(e)}
 
+@api_app.get("/streams/{engine_id}/window")
+async def get_stream_window(
+    engine_id: str,
+    seconds: Optional[float] = Query(None),
+    output_format: Optional[str] = Query(None, alias="format"),
+    dtype: Optional[str] = Query("float64"),
+    accept: Optional[str] = Header(None)
+):
+    """Newest samples of a streaming engine, read straight from its ring buffer."""
+    stream = sensor_streams.streams.get(engine_id)
+    if stream is None:
+        return {"error": f"Engine {engine_id} is not streaming"}
+    # columnar JSON unless binary is asked for, records would repeat a time per sample
+    if not output_format:
+        output_format = "binary" if vibration_formats.negotiate_format(None, accept) == "binary" else "columnar"
+    if output_format not in ("columnar", "binary"):
+        return {"error": f"Unsupported format: {output_format}"}
+    if dtype not in vibration_formats.DTYPES:
+        return {"error": f"Unsupported dtype: {dtype}"}
+
+    # the view is only copied while encoding, the ingest keeps writing meanwhile,
+    # so encode again when the producer overwrote part of it before we were done
+    for _ in range(STREAM_WINDOW_READ_ATTEMPTS):
+        view, start = stream.latest(seconds)
+        if output_format == "binary":
+            payload = view.astype(vibration_formats.DTYPES[dtype]).tobytes()
+        else:
+            values = view.tolist()
+        if stream.ring.intact(start):
+            break
+    else:
+        return {"error": "The stream overwrote the window while it was read, try a shorter window"}
+
+    header = {
+        "engine_id": engine_id,
+        "params": stream.params,
+        "sample_rate": stream.sample_rate,
+        "start": start,
+        "start_time": start / stream.sample_rate,
+        "num_samples": len(view),
+    }
+    if output_format == "binary":
+        header.update(dtype=vibration_formats.DTYPES[dtype], columns=["vibration"])
+        body = vibration_formats.pack_frame(json.dumps(header).encode("utf-8")) + vibration_formats.pack_frame(payload)
+        return Response(body, media_type=vibration_formats.BINARY_MEDIA_TYPE)
+    return {**header, "vibration": values}
+
+
+@api_app.post("/fleet-analysis")
+async def post_fleet_analysis(payload: dict):
+    """Analyze many traces at once, one NDJSON line per engine as it completes and a last line with the metrics.
+
+    The body is {"traces": [...], "parameters": {...}} with traces as in the
+    fleetAnalysis WebSocket message.
+    """
+    # measured alongside the fleetAnalysis jobs of the WebSocket
+    current_opr.set("fleetAnalysis")
+    try:
+        traces, parse_peak_bytes = await asyncio.to_thread(AllocationPeak.run, load_fleet_traces, payload.get("traces"))
+    except Exception as e:
+        logger.error(f"Error reading fleet traces: {e}")
+        return {"error": str(e)}
+
+    async def body():
+        metrics = {"parse_peak_bytes": parse_peak_bytes}
+        async for result in analyze_fleet(traces, payload.get("parameters", {}), metrics):
+            yield json.dumps({"result": result}) + "\n"
+        yield json.dumps({"metrics": metrics}) + "\n"
+
+    return StreamingResponse(body(), media_type=vibration_formats.NDJSON_MEDIA_TYPE)
+
 # Mount the API routes at /api with higher priority
 app.mount("/api", api_app)
 
@@ -324,304 +740,56 @@ app.mount("/", StaticFiles(directory=folder + "/../frontend/dist", html=True), n
 async def exception_404_handler(request, exc):
     return FileResponse(folder + "/../frontend/dist/index.html")
 
-def generate_engine_vibration_data(
-    # Time parameters
-    total_time: float = 10.0,          # Total time in seconds
-    sampling_freq: int = 1000,         # Sampling frequency in Hz
-    
-    # Engine parameters
-    rpm: int = 3000,                   # Engine RPM
-    num_cylinders: int = 4,            # Number of cylinders
-    
-    # Knock parameters
-    knock_start_time: float = 3.0,     # Time when knocking begins (seconds)
-    knock_probability_start: float = 0.2,  # Initial probability of knock per cycle
-    knock_probability_end: float = 0.9,    # Final probability of knock per cycle
-    knock_intensity_start: float = 1.0,    # Initial knock intensity multiplier
-    knock_intensity_end: float = 4.0,      # Final knock intensity multiplier
-    knock_resonant_freq: int = 400,      # Knock resonant frequency (Hz)
-    knock_damping: float = 0.05,        # Knock damping factor
-    
-    # Noise parameters
-    noise_level: float = 0.1,          # Background noise level
-    
-    # Random seed for reproducibility
-    random_seed: int = 42
-):
-    """Generate synthetic engine vibration data with developing knock."""
-    # Set random seed for reproducibility
-    np.random.seed(random_seed)
-    
-    # Ensure all parameters are the correct type
-    total_time = float(total_time)
-    sampling_freq = int(sampling_freq)
-    rpm = int(rpm)
-    num_cylinders = int(num_cylinders)
-    knock_start_time = float(knock_start_time)
-    knock_probability_start = float(knock_probability_start)
-    knock_probability_end = float(knock_probability_end)
-    knock_intensity_start = float(knock_intensity_start)
-    knock_intensity_end = float(knock_intensity_end)
-    knock_resonant_freq = int(knock_resonant_freq)
-    knock_damping = float(knock_damping)
-    noise_level = float(noise_level)
-    random_seed = int(random_seed)
-    
-    # Calculate time points
-    num_samples = int(total_time * sampling_freq)
-    time = np.linspace(0, total_time, num_samples)
-    
-    # Calculate engine cycle parameters
-    cycle_freq = rpm / 60 / 2  # Engine cycle frequency (Hz) for 4-stroke
-    firing_interval = 1.0 / (cycle_freq * num_cylinders)  # Time between firing events
-    
-    # Create base vibration signal (normal engine operation)
-    vibration = generate_base_vibration(time, rpm, num_cylinders, noise_level)
-    
-    # Add developing knock to the signal
-    vibration, knock_events = add_knock_to_signal(
-        vibration, time, cycle_freq, num_cylinders,
-        knock_start_time, knock_probability_start, knock_probability_end,
-        knock_intensity_start, knock_intensity_end,
-        knock_resonant_freq, knock_damping, sampling_freq
-    )
-    
-    # Create DataFrame for the dataset
+def generate_engine_vibration_data(**kwargs):
+    """Generate synthetic engine vibration data with developing knock, as a DataFrame and the parameters used.
+
+    Takes the arguments of vibration_sim.generate_vibration_arrays.
+    """
+    import pandas as pd
+    time, vibration, params = vibration_sim.generate_vibration_arrays(**kwargs)
     df = pd.DataFrame({
         'time': time,
         'vibration': vibration
     })
-    
-    # Create a dictionary with parameters used
-    params = {
-        'total_time': total_time,
-        'sampling_freq': sampling_freq,
-        'rpm': rpm,
-        'num_cylinders': num_cylinders,
-        'knock_start_time': knock_start_time,
-        'knock_probability_start': knock_probability_start,
-        'knock_probability_end': knock_probability_end,
-        'knock_intensity_start': knock_intensity_start,
-        'knock_intensity_end': knock_intensity_end,
-        'knock_resonant_freq': knock_resonant_freq,
-        'knock_damping': knock_damping,
-        'noise_level': noise_level,
-        'random_seed': random_seed,
-        'knock_count': len(knock_events)
-    }
-    
     return df, params
 
-def generate_base_vibration(time, rpm, num_cylinders, noise_level):
-    """Generate base engine vibration without knocking."""
-    # Engine cycle frequency (Hz)
-    cycle_freq = rpm / 60 / 2
-    # Firing frequency (Hz)
-    firing_freq = cycle_freq * num_cylinders
-    
-    # Create fundamental vibration component
-    vibration = np.sin(2 * np.pi * firing_freq * time) * 0.5
-    
-    # Add harmonics
-    vibration += np.sin(2 * np.pi * 2 * firing_freq * time) * 0.3
-    vibration += np.sin(2 * np.pi * 3 * firing_freq * time) * 0.15
-    vibration += np.sin(2 * np.pi * 4 * firing_freq * time) * 0.05
-    
-    # Add firing impulses
-    for i in range(num_cylinders):
-        phase = 2 * np.pi * i / num_cylinders
-        impulse = 0.4 * np.sin(2 * np.pi * firing_freq * time + phase) ** 8
-        vibration += impulse
-    
-    # Add noise to the signal
-    vibration += np.random.normal(0, noise_level, len(time))
-    
-    # Add a slower rpm variation to simulate load changes
-    vibration *= 1 + 0.1 * np.sin(2 * np.pi * 0.2 * time)
-    
-    return vibration
 
-def add_knock_to_signal(
-    vibration, time, cycle_freq, num_cylinders,
-    knock_start_time, knock_prob_start, knock_prob_end,
-    intensity_start, intensity_end,
-    knock_freq, knock_damping, sampling_freq
-):
-    """Add engine knock to vibration signal with increasing probability and intensity."""
-    # Number of samples
-    num_samples = len(time)
-    
-    # Find the index where knocking starts
-    knock_start_idx = np.argmax(time >= knock_start_time)
-    if knock_start_idx == 0 and time[0] < knock_start_time:
-        # No knocking in this dataset
-        return vibration, []
-    
-    # Calculate firing frequency
-    firing_freq = cycle_freq * num_cylinders
-    firing_interval = 1.0 / firing_freq
-    
-    # Calculate combustion events (when each cylinder fires)
-    total_time = time[-1]
-    firing_times = np.arange(0, total_time, firing_interval)
-    
-    # Track knock events
-    knock_events = []
-    
-    # For each combustion event, decide whether to add knock
-    for fire_time in firing_times:
-        # Skip if before knock start time
-        if fire_time < knock_start_time:
-            continue
-        
-        # Calculate knock probability based on time progression
-        time_progress = (fire_time - knock_start_time) / (total_time - knock_start_time)
-        time_progress = min(max(time_progress, 0), 1)  # Clamp between 0 and 1
-        knock_probability = knock_prob_start + time_progress * (knock_prob_end - knock_prob_start)
-        
-        # Determine if knock happens in this combustion cycle
-        if np.random.random() <= knock_probability:
-            # Calculate knock intensity based on time progression
-            knock_intensity = intensity_start + time_progress * (intensity_end - intensity_start)
-            
-            # Generate knock signal and add it to vibration
-            idx_start = np.argmax(time >= fire_time)
-            if idx_start < num_samples:
-                # Calculate how many samples to affect with knock (about 10ms knock duration)
-                knock_duration_samples = int(0.010 * sampling_freq)
-                idx_end = min(idx_start + knock_duration_samples, num_samples)
-                
-                # Create knock signal (damped sine wave)
-                knock_time = time[idx_start:idx_end] - time[idx_start]
-                knock_signal = knock_intensity * np.exp(-knock_damping * knock_time * 1000) * np.sin(2 * np.pi * knock_freq * knock_time)
-                
-                # Add knock to vibration signal
-                vibration[idx_start:idx_end] += knock_signal
-                
-                # Record knock event
-                knock_events.append((float(fire_time), float(knock_intensity)))
-    
-    return vibration, knock_events
-
-def visualize_dataset(df, params):
-    """Visualize the dataset with plots showing the developing knock."""
-    plt.figure(figsize=(12, 8))
-    
-    # Plot full dataset
-    plt.subplot(3, 1, 1)
-    plt.plot(df['time'], df['vibration'])
-    plt.title(f"Engine Vibration ({params['rpm']} RPM) with Developing Knock")
-    plt.ylabel('Amplitude')
-    plt.grid(True)
-    
-    # Plot early segment (before knock)
-    plt.subplot(3, 1, 2)
-    early_df = df[df['time'] < params['knock_start_time']]
-    plt.plot(early_df['time'], early_df['vibration'])
-    plt.title('Early Operation (No Knock)')
-    plt.ylabel('Amplitude')
-    plt.grid(True)
-    
-    # Plot late segment (with severe knock)
-    plt.subplot(3, 1, 3)
-    late_start = params['total_time'] * 0.5
-    late_df = df[df['time'] > late_start]
-    plt.plot(late_df['time'], late_df['vibration'])
-    plt.title('Late Operation (Knocking)')
-    plt.xlabel('Time (seconds)')
-    plt.ylabel('Amplitude')
-    plt.grid(True)
-    
-    plt.tight_layout()
-    
-    # Save the plot to a base64-encoded string
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    plot_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    plt.close()
-    
-    return plot_data
+def process_vibration_data(time_data, vibration_data, sample_rate, firing_freq=None,
+                           segment_seconds=None, overlap=None):
+    return vibration_features.analyze_trace(vibration_data, sample_rate, firing_freq, segment_seconds, overlap)
 
 
+def parse_vibration_csv(csv_data: str):
+    """Extract the time and vibration columns from CSV text.
 
-def process_vibration_data(time_data, vibration_data, sample_rate):
-    # Apply window to reduce spectral leakage
-    windowed_data = vibration_data * signal.windows.hann(len(vibration_data))
-    
-    # Compute FFT
-    fft_result = np.fft.rfft(windowed_data)
-    fft_freq = np.fft.rfftfreq(len(vibration_data), 1/sample_rate)
-    fft_magnitude = np.abs(fft_result) / len(vibration_data)
-    
-    # Find peaks in frequency domain
-    peaks, _ = signal.find_peaks(fft_magnitude, height=0.05)
-    peak_freqs = fft_freq[peaks]
-    peak_magnitudes = fft_magnitude[peaks]
-    
-    # Calculate some key features
-    rms = np.sqrt(np.mean(np.square(vibration_data)))
-    crest_factor = np.max(np.abs(vibration_data)) / rms
-    
-    # Find the dominant frequencies
-    sorted_indices = np.argsort(peak_magnitudes)[::-1]
-    dominant_freqs = peak_freqs[sorted_indices[:5]]
-    dominant_mags = peak_magnitudes[sorted_indices[:5]]
-    
-    features = {
-        "rms_amplitude": float(rms),
-        "crest_factor": float(crest_factor),
-        "dominant_frequencies": [float(f) for f in dominant_freqs],
-        "dominant_magnitudes": [float(m) for m in dominant_mags],
-        "total_energy": float(np.sum(fft_magnitude * fft_magnitude)),
-        "max_amplitude": float(np.max(np.abs(vibration_data)))
-    }
+    Uses pyarrow's multi-threaded CSV reader when it is installed, otherwise
+    pandas' C parser restricted to the two columns.
+    """
+    raw = csv_data.encode("utf-8")
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        import pandas as pd
+        df = pd.read_csv(io.BytesIO(raw), usecols=['time', 'vibration'], dtype='float64')
+        return df['time'].values, df['vibration'].values
     
-    return features, (fft_freq, fft_magnitude)
-
+    table = pa_csv.read_csv(pa.BufferReader(raw), convert_options=pa_csv.ConvertOptions(
+        include_columns=['time', 'vibration'],
+        column_types={'time': pa.float64(), 'vibration': pa.float64()}
+    ))
+    return table['time'].to_numpy(), table['vibration'].to_numpy()
 
-def create_llm_prompt(features, engine_info, history=None):
-    prompt = f"""You are an expert engine vibration analyst with years of experience diagnosing engine problems from vibration signatures. You specialize in identifying engine knock and other combustion irregularities.
 
-Engine Information:
-- Type: {engine_info['type']}
-- Number of Cylinders: {engine_info['cylinders']}
-- Operating RPM: {engine_info['rpm']}
-- Expected firing frequency: {engine_info['firing_frequency']:.2f} Hz
+# Fixed part of the engine analysis prompt, sent as the system prompt. It comes first in
+# every request and never changes, so Ollama keeps it in its KV cache and only evaluates the
+# per-request data built by create_llm_prompt. Anything that varies belongs in that function.
+ENGINE_ANALYSIS_SYSTEM_PROMPT = """You are an expert engine vibration analyst with years of experience diagnosing engine problems from vibration signatures. You specialize in identifying engine knock and other combustion irregularities.
 
-Current Vibration Analysis:
-- RMS Amplitude: {features['rms_amplitude']:.4f}
-- Crest Factor: {features['crest_factor']:.4f}
-- Maximum Amplitude: {features['max_amplitude']:.4f}
-- Total Vibration Energy: {features['total_energy']:.4f}
+You are given the engine information, the expected firing frequency harmonics of that engine and the features of a vibration trace. Analyze them with the framework below.
 
-Dominant Frequencies (Hz) and their magnitudes:
-"""
-    
-    for i, (freq, mag) in enumerate(zip(features['dominant_frequencies'], 
-                                     features['dominant_magnitudes'])):
-        prompt += f"- {freq:.2f} Hz: {mag:.4f}\n"
-    
-    # Add historical context if available
-    if history:
-        prompt += "\nTrend Analysis:\n"
-        for timestamp, hist_feat in history[-5:]:  # Last 5 data points
-            prompt += f"- {timestamp}: RMS={hist_feat['rms_amplitude']:.4f}, "
-            prompt += f"Max={hist_feat['max_amplitude']:.4f}\n"
-    
-    # Calculate expected engine frequencies for reference
-    firing_freq = engine_info['firing_frequency']
-    expected_freqs = [firing_freq, firing_freq * 2, firing_freq * 3, firing_freq * 4]
-    
-    prompt += f"""
 CRITICAL ANALYSIS FRAMEWORK FOR ENGINE KNOCK DETECTION:
 
-Expected Normal Engine Frequencies for {engine_info['rpm']} RPM, {engine_info['cylinders']}-cylinder engine:
-- Primary firing frequency: ~{expected_freqs[0]:.1f} Hz
-- 2nd harmonic: ~{expected_freqs[1]:.1f} Hz  
-- 3rd harmonic: ~{expected_freqs[2]:.1f} Hz
-- 4th harmonic: ~{expected_freqs[3]:.1f} Hz
-
 BASELINE NORMAL OPERATION CHARACTERISTICS (with noise tolerance):
 - RMS Amplitude: Typically 0.6-0.9 for normal operation (baseline ~0.68, varies with noise)
 - Crest Factor: Typically 1.8-2.8 for normal combustion (baseline ~2.33, noise can affect this)
@@ -653,7 +821,7 @@ KNOCK DETECTION INDICATORS (accounting for noise variations):
    - Normal range: 1.2-2.2 (wide range due to noise sensitivity)
    - Knock indicators: Sustained values above 2.5-3.0 (not just noise spikes)
 
-ANALYSIS EXAMPLES FOR REFERENCE:
+ANALYSIS EXAMPLES FOR REFERENCE (4-stroke, 4 cylinders, 2000 RPM, firing frequency ~66.7 Hz):
 Normal Operation Example (Clean baseline):
 - RMS: ~0.68, Crest Factor: ~2.33, Max Amplitude: ~1.58, Total Energy: ~0.117
 - Frequencies: 66.75 Hz, 133.25 Hz, 266.75 Hz (only harmonics)
@@ -675,12 +843,14 @@ DECISION LOGIC (noise-robust):
 4. If crest factor >4.2 AND strong energy >600 Hz → Heavy knock
 
 IMPORTANT: When assessing, consider that:
+- The Time-Resolved Analysis shows how the signal changes over the trace: a non-harmonic knock band ratio that rises over the timeline indicates developing knock, even when the whole-trace averages look normal
+- A Rule-Based Pre-Assessment, when given, comes from fixed thresholds on the crest factor and the knock band; confirm or correct it
 - Noise primarily affects amplitude metrics (RMS, Max Amplitude) more than crest factor
 - High-frequency content (>400 Hz) is the most reliable knock indicator
 - Crest factor is relatively stable and less affected by broadband noise
 - Look for patterns, not just single elevated values
 
-Based on this vibration data, please provide:
+For the vibration data you are given, please provide:
 1. **Primary Assessment**: Is this normal engine operation or knock? State confidence level.
 2. **Detailed Analysis**: 
    - Crest factor interpretation (accounting for noise tolerance)
@@ -690,13 +860,80 @@ Based on this vibration data, please provide:
 4. **Recommendations**: Immediate actions needed based on findings
 5. **Confidence Level**: High/Medium/Low with explanation of what led to this conclusion
 
-Remember: The presence of firing frequency harmonics (66-67 Hz, 133-134 Hz, 266-267 Hz for this engine) is NORMAL. Only frequencies significantly above 400 Hz that are not engine harmonics indicate knock. Noise can elevate amplitude metrics but should not create specific resonant frequencies.
+Remember: The presence of the firing frequency and its harmonics, listed with the engine information, is NORMAL. Only frequencies significantly above 400 Hz that are not engine harmonics indicate knock. Noise can elevate amplitude metrics but should not create specific resonant frequencies.
+"""
+
+
+def create_llm_prompt(features, engine_info, history=None, verdict=None):
+    """Per-request part of the engine analysis prompt, sent after ENGINE_ANALYSIS_SYSTEM_PROMPT."""
+    # Calculate expected engine frequencies for reference
+    firing_freq = engine_info['firing_frequency']
+    expected_freqs = [firing_freq, firing_freq * 2, firing_freq * 3, firing_freq * 4]
+    
+    prompt = f"""Engine Information:
+- Type: {engine_info['type']}
+- Number of Cylinders: {engine_info['cylinders']}
+- Operating RPM: {engine_info['rpm']}
+- Expected firing frequency: {firing_freq:.2f} Hz
+
+Expected Normal Engine Frequencies for {engine_info['rpm']} RPM, {engine_info['cylinders']}-cylinder engine:
+- Primary firing frequency: ~{expected_freqs[0]:.1f} Hz
+- 2nd harmonic: ~{expected_freqs[1]:.1f} Hz  
+- 3rd harmonic: ~{expected_freqs[2]:.1f} Hz
+- 4th harmonic: ~{expected_freqs[3]:.1f} Hz
+
+Current Vibration Analysis:
+- RMS Amplitude: {features['rms_amplitude']:.4f}
+- Crest Factor: {features['crest_factor']:.4f}
+- Maximum Amplitude: {features['max_amplitude']:.4f}
+- Total Vibration Energy: {features['total_energy']:.4f}
+
+Dominant Frequencies (Hz) and their magnitudes:
+"""
+    
+    for i, (freq, mag) in enumerate(zip(features['dominant_frequencies'], 
+                                     features['dominant_magnitudes'])):
+        prompt += f"- {freq:.2f} Hz: {mag:.4f}\n"
+    
+    # Add the time-resolved features if available
+    windows = features.get('windows')
+    if windows and windows['count']:
+        prompt += f"""
+Time-Resolved Analysis ({windows['count']} windows of {windows['segment_seconds']:.2f} s, {windows['overlap']:.0%} overlap):
+- Window RMS: mean {windows['rms']['mean']:.4f}, max {windows['rms']['max']:.4f}
+- Window Crest Factor: mean {windows['crest_factor']['mean']:.4f}, max {windows['crest_factor']['max']:.4f}
+- Knock Band (400-800 Hz) Energy Ratio: mean {windows['knock_band_ratio']['mean']:.4f}, max {windows['knock_band_ratio']['max']:.4f}
+- Non-Harmonic Knock Band Energy Ratio: mean {windows['knock_nonharmonic_ratio']['mean']:.4f}, max {windows['knock_nonharmonic_ratio']['max']:.4f}
+- Harmonic Energy Ratio: mean {windows['harmonic_ratio']['mean']:.4f}, min {windows['harmonic_ratio']['min']:.4f}
+
+Timeline (start: RMS, crest factor, knock band ratio, non-harmonic knock band ratio, harmonic ratio):
 """
+        for row in windows['timeline']:
+            prompt += (f"- {row['start']:.2f} s: {row['rms']:.4f}, {row['crest_factor']:.4f}, "
+                       f"{row['knock_band_ratio']:.4f}, {row['knock_nonharmonic_ratio']:.4f}, "
+                       f"{row['harmonic_ratio']:.4f}\n")
+    
+    # Add historical context if available
+    if history:
+        prompt += "\nTrend Analysis:\n"
+        for timestamp, hist_feat in history[-5:]:  # Last 5 data points
+            prompt += f"- {timestamp}: RMS={hist_feat['rms_amplitude']:.4f}, "
+            prompt += f"Max={hist_feat['max_amplitude']:.4f}\n"
     
+    # Add the rule-based pre-assessment if available
+    if verdict:
+        assessment = "normal operation" if verdict['severity'] == "none" else f"{verdict['severity']} knock"
+        prompt += f"\nRule-Based Pre-Assessment: {assessment}, {verdict['confidence']} confidence"
+        prompt += " (inconclusive)\n" if verdict['ambiguous'] else "\n"
+        for reason in verdict['reasons']:
+            prompt += f"- {reason}\n"
+    
+    prompt += "\nAnalyze this vibration data following the framework.\n"
     return prompt
 
 async def ollama_analyze_engine(payload: any, websocket: WebSocket):
-    print("ollama engine analysis-->")
+    logger.info("Engine analysis started", extra={"request_id": payload.get("id")})
+    tokens = TokenStream(websocket, {"id": payload.get("id", "engine_analysis"), "status": 0})
     try:
         # Extract parameters with defaults if not provided
         parameters = payload.get("parameters", {})
@@ -704,6 +941,7 @@ async def ollama_analyze_engine(payload: any, websocket: WebSocket):
         top_p = parameters.get("top_p", 0.9)
         model = parameters.get("model", "qwen3:1.7b")
         csv_data = payload.get("csvData", "")
+        arrays = payload.get("arrays")
         params = payload.get("params", {})
         
         # Track start time for total analysis duration
@@ -716,8 +954,8 @@ async def ollama_analyze_engine(payload: any, websocket: WebSocket):
             "status": 0
         }))
         
-        # Validate CSV data
-        if not csv_data:
+        # Validate the input, raw arrays from a binary message or CSV text
+        if arrays is None and not csv_data:
             raise ValueError("No CSV data provided")
         
         # Preprocess the CSV data
@@ -728,35 +966,121 @@ async def ollama_analyze_engine(payload: any, websocket: WebSocket):
         }))
         
         try:
-            # Parse CSV data
-            df = pd.read_csv(io.StringIO(csv_data))
-            
             # Extract time and vibration data
-            time_data = df['time'].values
-            vibration_data = df['vibration'].values
+            parse_start = time.time()
+            if arrays is not None:
+                input_format = "binary"
+                time_data = arrays.get('time')
+                vibration_data = arrays['vibration']
+                # decoded when the message arrived
+                parse_peak_bytes = payload.get("parse_peak_bytes")
+            else:
+                input_format = "csv"
+                # measured in the worker thread, the parse does not hold up the event loop
+                (time_data, vibration_data), parse_peak_bytes = await asyncio.to_thread(
+                    AllocationPeak.run, parse_vibration_csv, csv_data)
+            parse_duration = time.time() - parse_start
             sample_rate = params.get('sampling_freq', 1000)
             
-            # Process vibration data to extract features
+            # Create engine information dictionary
+            engine_info = fleet_analysis.engine_info_from_params(params)
+            
+            # Process vibration data to extract features, in the process pool so token streams keep flowing
             preprocessing_start = time.time()
-            features, fft_data = process_vibration_data(time_data, vibration_data, sample_rate)
+            features, fft_data = await process_pool.run(
+                vibration_features.analyze_trace, vibration_data, sample_rate, engine_info["firing_frequency"],
+                parameters.get("segment_seconds"), parameters.get("segment_overlap"))
             preprocessing_duration = time.time() - preprocessing_start
+            feature_extraction_seconds.observe(preprocessing_duration, current_opr.get())
             
-            # Create engine information dictionary
-            engine_info = {
-                "type": params.get("engine_type", "4-stroke"),
-                "cylinders": params.get("num_cylinders", 4),
-                "rpm": params.get("rpm", 3000),
-                "firing_frequency": (params.get("rpm", 3000) / 60) * (params.get("num_cylinders", 4) / 2)
-            }
+            # Rule-based verdict, streamed before anything else
+            classification_start = time.time()
+            verdict = knock_classifier.classify_knock(features)
+            classification_duration = time.time() - classification_start
+            await websocket.send_text(json.dumps({
+                "id": payload.get("id", "engine_analysis"),
+                "part": knock_classifier.format_verdict(verdict),
+                "verdict": verdict,
+                "status": 0
+            }))
+            
+            # Clear-cut results skip the model unless the client asks for a narrative
+            if knock_classifier.KNOCK_FAST_PATH and not verdict["ambiguous"] and not parameters.get("narrative", False):
+                logger.info(f"Engine analysis answered by the rule engine: {verdict['severity']} ({verdict['confidence']})")
+                total_duration = time.time() - start_time
+                await websocket.send_text(json.dumps({
+                    "id": payload.get("id", "engine_analysis"),
+                    "status": 1,
+                    "metrics": {
+                        "model": None,
+                        "llm_skipped": True,
+                        "cache_hit": False,
+                        "verdict": verdict,
+                        "prompt_length": 0,
+                        "response_length": 0,
+                        "input_format": input_format,
+                        "message_size": payload.get("message_size", 0),
+                        "num_samples": len(vibration_data),
+                        "parse_duration": int(parse_duration * 1000000000),  # Convert to ns
+                        "parse_peak_bytes": parse_peak_bytes,
+                        "process_max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+                        "preprocessing_duration": int(preprocessing_duration * 1000000000),  # Convert to ns
+                        "classification_duration": int(classification_duration * 1000000000),  # Convert to ns
+                        "prompt_creation_duration": 0,
+                        "model_response_duration": 0,
+                        "total_duration": int(total_duration * 1000000000),  # Convert to ns
+                        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    }
+                }))
+                return
             
             # Generate prompt for LLM analysis
             prompt_creation_start = time.time()
-            prompt = create_llm_prompt(features, engine_info)
+            prompt = create_llm_prompt(features, engine_info, verdict=verdict)
             prompt_creation_duration = time.time() - prompt_creation_start
             
-            logging.info(f"Sending compact engine analysis prompt ({len(prompt)} chars)")
+            logger.info(f"Sending engine analysis prompt ({len(prompt)} chars after the {len(ENGINE_ANALYSIS_SYSTEM_PROMPT)} char system prompt)")
             # Log the entire prompt for debugging
-            logging.debug(f"Full engine analysis prompt: \n{prompt}")
+            logger.debug("Full engine analysis prompt:\n%s", prompt)
+            
+            # Reuse the analysis of a trace with the same or nearly the same features
+            cache_group = analysis_group(engine_info, model, verdict)
+            cached, cache_distance = (analysis_cache.lookup(cache_group, features)
+                                      if parameters.get("cache", True) else (None, None))
+            if cached is not None:
+                logger.info(f"Engine analysis served from the cache (distance {cache_distance:.2f})")
+                await websocket.send_text(json.dumps({
+                    "id": payload.get("id", "engine_analysis"),
+                    "part": cached["response"],
+                    "status": 0
+                }))
+                total_duration = time.time() - start_time
+                await websocket.send_text(json.dumps({
+                    "id": payload.get("id", "engine_analysis"),
+                    "status": 1,
+                    "metrics": {
+                        # the model metrics of the request that produced the analysis
+                        **cached["metrics"],
+                        "cache_hit": True,
+                        "cache_distance": cache_distance,
+                        "prompt_length": len(prompt),
+                        "input_format": input_format,
+                        "message_size": payload.get("message_size", 0),
+                        "num_samples": len(vibration_data),
+                        "parse_duration": int(parse_duration * 1000000000),  # Convert to ns
+                        "parse_peak_bytes": parse_peak_bytes,
+                        "process_max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+                        "preprocessing_duration": int(preprocessing_duration * 1000000000),  # Convert to ns
+                        "classification_duration": int(classification_duration * 1000000000),  # Convert to ns
+                        "verdict": verdict,
+                        "prompt_creation_duration": int(prompt_creation_duration * 1000000000),  # Convert to ns
+                        "model_response_duration": 0,
+                        "total_duration": int(total_duration * 1000000000),  # Convert to ns
+                        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    },
+                    "prompt": f"{ENGINE_ANALYSIS_SYSTEM_PROMPT}\n{prompt}"
+                }))
+                return
             
             # Notify the user that we're sending request to Ollama
             await websocket.send_text(json.dumps({
@@ -765,38 +1089,32 @@ async def ollama_analyze_engine(payload: any, websocket: WebSocket):
                 "status": 0
             }))
             
-            # First check connection to Ollama
+            # Check connection to Ollama, the answer is cached by the client
             try:
-                session = requests.Session()
-                check_response = session.get("http://localhost:11434/api/tags", timeout=5)
-                if check_response.status_code != 200:
-                    raise Exception(f"Ollama API is not responding properly. Status: {check_response.status_code}")
+                await ollama.ensure_ready()
                 
                 await websocket.send_text(json.dumps({
                     "id": payload.get("id", "engine_analysis"),
                     "part": "AI model is ready, processing data...\n\n",
                     "status": 0
                 }))
-            except requests.exceptions.RequestException as e:
-                logging.error(f"Error connecting to Ollama: {e}")
-                raise Exception(f"Failed to connect to Ollama API: {e}")
+            except OllamaError as e:
+                logger.error(f"Error connecting to Ollama: {e}")
+                raise
 
             # Make the request to Ollama with streaming response
             model_request_start = time.time()
-            response = requests.post(
-                OLLAMA_GENERATE_URL,
-                json={
-                    'model': model,
-                    'prompt': prompt,
-                    'options': {
-                        'temperature': temperature,
-                        'top_p': top_p
-                    }
-                },
-                stream=True
-            )
+            stream = ollama.generate({
+                'model': model,
+                'system': ENGINE_ANALYSIS_SYSTEM_PROMPT,
+                'prompt': prompt,
+                'options': {
+                    'temperature': temperature,
+                    'top_p': top_p
+                }
+            })
             
-            logging.info(f"Message posted to Ollama for engine analysis")
+            logger.info(f"Message posted to Ollama for engine analysis")
             
             # Process the streaming response
             message = ""
@@ -809,75 +1127,98 @@ async def ollama_analyze_engine(payload: any, websocket: WebSocket):
             # Set a heartbeat for the frontend
             last_update_time = time.time()
             
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        body = json.loads(line)
-                        response_part = body.get('response', '')
-                        if response_part:
-                            message += response_part
-                            
-                            # Stream ONLY the new part to frontend
-                            await websocket.send_text(json.dumps({
-                                "id": payload.get("id", "engine_analysis"),
-                                "part": response_part,
-                                "status": 0
-                            }))
-                            last_update_time = time.time()
-                        
-                        if 'error' in body:
-                            raise Exception(body['error'])
-                            
-                        # Send a final update to front end
-                        if body.get('done', False):
-                            logging.info(f"Engine analysis complete")
-                            model_request_duration = time.time() - model_request_start
-                            total_duration = time.time() - start_time
-                            
-                            # Convert timings to nanoseconds to match Ollama format
-                            metrics = {
-                                "model": model,
-                                "temperature": temperature,
-                                "top_p": top_p,
-                                "prompt_length": len(prompt),
-                                "response_length": len(message),
-                                "preprocessing_duration": int(preprocessing_duration * 1000000000),  # Convert to ns
-                                "prompt_creation_duration": int(prompt_creation_duration * 1000000000),  # Convert to ns
-                                "model_response_duration": int(model_request_duration * 1000000000),  # Convert to ns
-                                "total_duration": int(total_duration * 1000000000),  # Convert to ns
-                                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                                # Include Ollama metrics if available
-                                "eval_count": body.get("eval_count", 0),
-                                "prompt_eval_count": body.get("prompt_eval_count", 0),
-                                "prompt_eval_duration": body.get("prompt_eval_duration", 0),
-                                "eval_duration": body.get("eval_duration", 0)
-                            }
-                            
-                            await websocket.send_text(json.dumps({
-                                "id": payload.get("id", "engine_analysis"),
-                                "status": 1,
-                                "metrics": metrics,
-                                "prompt": prompt  # Include the full prompt
-                            }))
-                            break
-                    except json.JSONDecodeError as e:
-                        logging.error(f"Error parsing JSON from Ollama: {e}, line: {line}")
-                        continue
+            async for body in stream:
+                response_part = body.get('response', '')
+                if response_part:
+                    message += response_part
                     
-                    # Check if we need to send a heartbeat
-                    current_time = time.time()
-                    if current_time - last_update_time > 10:
-                        await websocket.send_text(json.dumps({
-                            "id": payload.get("id", "engine_analysis"),
-                            "part": ".",  # Just send a dot as heartbeat
-                            "status": 0,
-                            "heartbeat": True
-                        }))
-                        last_update_time = current_time
+                    # Stream ONLY the new part to frontend, coalesced into frames of several tokens
+                    await tokens.write(response_part)
+                    last_update_time = time.time()
                 
+                if 'error' in body:
+                    await tokens.flush()
+                    raise Exception(body['error'])
+                    
+                # Send a final update to front end
+                if body.get('done', False):
+                    logger.info(f"Engine analysis complete")
+                    model_request_duration = time.time() - model_request_start
+                    total_duration = time.time() - start_time
+                    
+                    # Convert timings to nanoseconds to match Ollama format
+                    metrics = {
+                        "model": model,
+                        "temperature": temperature,
+                        "top_p": top_p,
+                        "prompt_length": len(prompt),
+                        "system_prompt_length": len(ENGINE_ANALYSIS_SYSTEM_PROMPT),
+                        "response_length": len(message),
+                        "input_format": input_format,
+                        "message_size": payload.get("message_size", 0),
+                        "num_samples": len(vibration_data),
+                        "parse_duration": int(parse_duration * 1000000000),  # Convert to ns
+                        "parse_peak_bytes": parse_peak_bytes,
+                        # high-water mark of the server process since it started, ru_maxrss is in KiB on Linux
+                        "process_max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+                        "preprocessing_duration": int(preprocessing_duration * 1000000000),  # Convert to ns
+                        "classification_duration": int(classification_duration * 1000000000),  # Convert to ns
+                        "llm_skipped": False,
+                        "cache_hit": False,
+                        "verdict": verdict,
+                        "prompt_creation_duration": int(prompt_creation_duration * 1000000000),  # Convert to ns
+                        "model_response_duration": int(model_request_duration * 1000000000),  # Convert to ns
+                        "total_duration": int(total_duration * 1000000000),  # Convert to ns
+                        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                        # Include Ollama metrics if available
+                        "eval_count": body.get("eval_count", 0),
+                        "prompt_eval_count": body.get("prompt_eval_count", 0),
+                        "prompt_eval_duration": body.get("prompt_eval_duration", 0),
+                        "eval_duration": body.get("eval_duration", 0),
+                        # frames and bytes the answer took on the WebSocket
+                        "stream": tokens.metrics(),
+                    }
+                    
+                    analysis_cache.store(cache_group, features, message, {
+                        key: metrics[key] for key in ("model", "temperature", "top_p", "response_length", "llm_skipped",
+                                                      "eval_count", "prompt_eval_count", "prompt_eval_duration",
+                                                      "eval_duration")})
+                    
+                    await tokens.send({
+                        "id": payload.get("id", "engine_analysis"),
+                        "status": 1,
+                        "metrics": metrics,
+                        "prompt": f"{ENGINE_ANALYSIS_SYSTEM_PROMPT}\n{prompt}"  # Include the full prompt
+                    })
+                    break
+                
+                # Check if we need to send a heartbeat
+                current_time = time.time()
+                if current_time - last_update_time > 10:
+                    await tokens.send({
+                        "id": payload.get("id", "engine_analysis"),
+                        "part": ".",  # Just send a dot as heartbeat
+                        "status": 0,
+                        "heartbeat": True
+                    })
+                    last_update_time = current_time
+
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout from Ollama API: {e}")
+            await tokens.send({
+                "id": payload.get("id", "engine_analysis"),
+                "part": "\n\nThe AI model is taking too long to respond. Please try again later with a smaller dataset.",
+                "status": 0
+            })
+            await tokens.send({
+                "id": payload.get("id", "engine_analysis"),
+                "error": "Timeout waiting for AI response",
+                "status": -1
+            })
+
         except Exception as e:
             error_msg = str(e)
-            logging.error(f"Error in data processing: {error_msg}")
+            logger.error(f"Error in data processing: {error_msg}")
             
             # Provide a friendlier error message to the user
             user_msg = "Error processing vibration data: "
@@ -888,33 +1229,235 @@ async def ollama_analyze_engine(payload: any, websocket: WebSocket):
             else:
                 user_msg += error_msg
                 
-            await websocket.send_text(json.dumps({
+            await tokens.send({
                 "id": payload.get("id", "engine_analysis"),
                 "error": user_msg,
                 "status": -1
-            }))
+            })
             return
             
-        except requests.exceptions.Timeout as e:
-            logging.error(f"Timeout from Ollama API: {e}")
+    except Exception as e:
+        logger.error(f"Exception in engine analysis: {e}")
+        # Send error to client
+        try:
             await websocket.send_text(json.dumps({
                 "id": payload.get("id", "engine_analysis"),
-                "part": "\n\nThe AI model is taking too long to respond. Please try again later with a smaller dataset.",
-                "status": 0
+                "error": str(e),
+                "status": -1
             }))
+        except:
+            pass
+    finally:
+        tokens.close()
+
+
+def load_fleet_traces(traces: list, arrays: dict = None) -> list:
+    """FleetTrace objects for the traces of a fleet request.
+
+    Each trace has an `engine_id`, its generation `params` and its samples,
+    as `csvData` text, a `vibration` list or, in a binary message,
+    `num_samples` of the concatenated `vibration` column.
+    """
+    if not traces:
+        raise ValueError("No traces provided")
+    if len(traces) > fleet_analysis.FLEET_MAX_TRACES:
+        raise ValueError(f"At most {fleet_analysis.FLEET_MAX_TRACES} traces are accepted per request")
+    loaded = []
+    engine_ids = set()
+    offset = 0
+    for index, trace in enumerate(traces):
+        engine_id = str(trace.get("engine_id", index))
+        if engine_id in engine_ids:
+            raise ValueError(f"Duplicate engine_id: {engine_id}")
+        engine_ids.add(engine_id)
+        if arrays is not None and "num_samples" in trace:
+            num_samples = int(trace["num_samples"])
+            vibration = arrays["vibration"][offset:offset + num_samples]
+            offset += num_samples
+        elif trace.get("csvData"):
+            _, vibration = parse_vibration_csv(trace["csvData"])
+        elif trace.get("vibration") is not None:
+            vibration = trace["vibration"]
+        else:
+            raise ValueError(f"No samples for engine {engine_id}")
+        if len(vibration) < 2:
+            raise ValueError(f"Engine {engine_id} has fewer than two samples")
+        loaded.append(FleetTrace(engine_id, trace.get("params", {}), vibration))
+    return loaded
+
+
+def fleet_result(trace: FleetTrace, source: str, analysis: str = None, **extra) -> dict:
+    """Result of one engine, `source` tells whether the rules, the cache or the model answered."""
+    verdict = trace.verdict
+    return {
+        "engine_id": trace.engine_id,
+        "source": source,
+        "assessment": verdict["assessment"],
+        "severity": verdict["severity"],
+        "confidence": verdict["confidence"],
+        "verdict": verdict,
+        "features": trace.features,
+        "analysis": analysis,
+        **extra,
+    }
+
+
+async def analyze_fleet(traces: list, parameters: dict, metrics: dict):
+    """Analyze a fleet of traces, yielding the result of each engine as soon as it is known.
+
+    Features are computed in the process pool with equal-length traces
+    stacked into one pass. Clear-cut rule verdicts and cached analyses come first,
+    the other engines go to the model FLEET_PROMPT_ENGINES to a prompt with
+    at most FLEET_LLM_CONCURRENCY calls at a time. `metrics` is filled in
+    once every engine has its result.
+    """
+    temperature = parameters.get("temperature", 0.7)
+    top_p = parameters.get("top_p", 0.9)
+    model = parameters.get("model", OLLAMA_TEXT_MODEL)
+    narrative = parameters.get("narrative", False)
+    use_cache = parameters.get("cache", True)
+    start_time = time.time()
+    sources = {"rules": 0, "cache": 0, "model": 0, "error": 0}
+
+    features_start = time.time()
+    features, stacks = await process_pool.run(
+        fleet_analysis.stack_features, [trace.vibration for trace in traces], [trace.sample_rate for trace in traces],
+        [trace.engine_info["firing_frequency"] for trace in traces], parameters.get("segment_seconds"),
+        parameters.get("segment_overlap"))
+    for trace, trace_features in zip(traces, features):
+        trace.features = trace_features
+    features_duration = time.time() - features_start
+    feature_extraction_seconds.observe(features_duration, current_opr.get())
+
+    # triage, only engines the rules and the cache cannot answer go to the model
+    pending = []
+    for trace in traces:
+        trace.verdict = knock_classifier.classify_knock(trace.features)
+        if knock_classifier.KNOCK_FAST_PATH and not trace.verdict["ambiguous"] and not narrative:
+            sources["rules"] += 1
+            yield fleet_result(trace, "rules")
+            continue
+        if use_cache:
+            cached, distance = analysis_cache.lookup(analysis_group(trace.engine_info, model, trace.verdict),
+                                                     trace.features)
+            if cached is not None:
+                sources["cache"] += 1
+                yield fleet_result(trace, "cache", cached["response"], cache_distance=distance)
+                continue
+        pending.append(trace)
+
+    semaphore = asyncio.Semaphore(max(1, fleet_analysis.FLEET_LLM_CONCURRENCY))
+
+    async def analyze_group(group):
+        async with semaphore:
+            call_start = time.time()
+            prompts = [(trace.engine_id, create_llm_prompt(trace.features, trace.engine_info, verdict=trace.verdict))
+                       for trace in group]
+            if len(group) == 1:
+                system, prompt = ENGINE_ANALYSIS_SYSTEM_PROMPT, prompts[0][1]
+            else:
+                system = ENGINE_ANALYSIS_SYSTEM_PROMPT + fleet_analysis.FLEET_SYSTEM_SUFFIX
+                prompt = fleet_analysis.fleet_prompt(prompts)
+            try:
+                text = await ollama.complete({
+                    'model': model,
+                    'system': system,
+                    'prompt': prompt,
+                    'options': {
+                        'temperature': temperature,
+                        'top_p': top_p
+                    }
+                })
+                return group, text, None, time.time() - call_start
+            except Exception as e:
+                logger.error(f"Fleet analysis call for {len(group)} engines failed: {e}")
+                return group, "", str(e), time.time() - call_start
+
+    groups = fleet_analysis.prompt_groups(pending, parameters.get("prompt_engines"))
+    tasks = [asyncio.create_task(analyze_group(group)) for group in groups]
+    try:
+        for next_group in asyncio.as_completed(tasks):
+            group, text, error, duration = await next_group
+            if error is not None:
+                for trace in group:
+                    sources["error"] += 1
+                    yield fleet_result(trace, "error", error=error)
+                continue
+            if len(group) == 1:
+                sections = {group[0].engine_id: text}
+            else:
+                sections = fleet_analysis.split_fleet_response(text, [trace.engine_id for trace in group])
+            for trace in group:
+                analysis = sections.get(trace.engine_id)
+                if analysis is not None:
+                    analysis_cache.store(analysis_group(trace.engine_info, model, trace.verdict), trace.features,
+                                         analysis, {"model": model, "temperature": temperature, "top_p": top_p,
+                                                    "response_length": len(analysis), "llm_skipped": False})
+                sources["model"] += 1
+                # without its own section the engine gets the whole answer of its group
+                yield fleet_result(trace, "model", text if analysis is None else analysis,
+                                   shared_response=analysis is None, group_size=len(group),
+                                   model_response_duration=int(duration * 1000000000))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    total_duration = time.time() - start_time
+    metrics.update({
+        "model": model,
+        "num_traces": len(traces),
+        "num_samples": sum(len(trace.vibration) for trace in traces),
+        "feature_stacks": stacks,
+        "sources": sources,
+        "llm_calls": len(groups),
+        "features_duration": int(features_duration * 1000000000),  # Convert to ns
+        "total_duration": int(total_duration * 1000000000),  # Convert to ns
+        "feature_traces_per_second": len(traces) / features_duration if features_duration > 0 else None,
+        "traces_per_second": len(traces) / total_duration if total_duration > 0 else None,
+        # high-water mark of the server process since it started, not of this request
+        "process_max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+
+async def ollama_analyze_fleet(payload: any, websocket: WebSocket):
+    logger.info("Fleet analysis started", extra={"request_id": payload.get("id")})
+    request_id = payload.get("id", "fleet_analysis")
+    try:
+        traces, parse_peak_bytes = await asyncio.to_thread(AllocationPeak.run, load_fleet_traces,
+                                                           payload.get("traces"), payload.get("arrays"))
+        await websocket.send_text(json.dumps({
+            "id": request_id,
+            "part": f"Analyzing {len(traces)} engines...\n\n",
+            "status": 0
+        }))
+
+        # binary messages were decoded on arrival, CSV and JSON samples just now
+        peaks = (payload.get("parse_peak_bytes"), parse_peak_bytes)
+        metrics = {"parse_peak_bytes": max((peak for peak in peaks if peak is not None), default=None)}
+        async for result in analyze_fleet(traces, payload.get("parameters", {}), metrics):
+            headline = "normal operation" if result["severity"] == "none" else f"{result['severity']} knock"
+            if result["source"] == "error":
+                headline = f"analysis failed: {result['error']}"
             await websocket.send_text(json.dumps({
-                "id": payload.get("id", "engine_analysis"),
-                "error": "Timeout waiting for AI response",
-                "status": -1
+                "id": request_id,
+                "part": f"- **Engine {result['engine_id']}**: {headline} ({result['source']})\n",
+                "result": result,
+                "status": 0
             }))
-            
+
+        metrics["input_format"] = "binary" if payload.get("arrays") is not None else "json"
+        metrics["message_size"] = payload.get("message_size", 0)
+        await websocket.send_text(json.dumps({
+            "id": request_id,
+            "status": 1,
+            "metrics": metrics
+        }))
     except Exception as e:
-        logging.error("Exception in engine analysis")
-        logging.error(e)
-        # Send error to client
+        logger.error(f"Error in fleet analysis: {e}")
         try:
             await websocket.send_text(json.dumps({
-                "id": payload.get("id", "engine_analysis"),
+                "id": request_id,
                 "error": str(e),
                 "status": -1
             }))
@@ -0,0 +1,99 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by entry count and optionally by size.
+
+    `sizeof` gives the size of a value in bytes, it is only used when
+    `max_bytes` is set. Values larger than `max_bytes` are not stored, an
+    entry already under their key is removed instead of kept at its old size.
+    With `ttl` set, entries older than that many seconds count as missing.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int = None, sizeof=len, ttl: float = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def items(self) -> list:
+        """Snapshot of the live (key, value) pairs, oldest use first. Does not count as use."""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items() if not self._expired(entry)]
+
+    def fits(self, size: int) -> bool:
+        """Whether a value of `size` bytes can be stored at all."""
+        return self.max_entries > 0 and (self.max_bytes is None or size <= self.max_bytes)
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if not self.fits(size):
+            # the value may be an entry that grew in place, it must not stay counted at its old size
+            with self._lock:
+                if key in self._entries:
+                    self._drop(key)
+                    self.evictions += 1
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, size, expires)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _expired(self, entry) -> bool:
+        return entry[2] is not None and entry[2] <= time.monotonic()
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "ttl": self.ttl,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,171 @@
+import os
+import asyncio
+import logging
+from . import db_manager
+
+logger = logging.getLogger(__name__)
+
+# tokens of chat history sent with each turn, the system prompt and the summary included
+CHAT_CONTEXT_TOKENS = int(os.environ.get("EDGE_LLM_CHAT_CONTEXT_TOKENS", 1536))
+# turns kept in memory and read from the database on the first chat, the window is cut from these
+CHAT_CONTEXT_MAX_TURNS = int(os.environ.get("EDGE_LLM_CHAT_CONTEXT_MAX_TURNS", 64))
+# fold turns that leave the window into a rolling summary written by the model
+CHAT_SUMMARY = os.environ.get("EDGE_LLM_CHAT_SUMMARY", "0").lower() in ("1", "true", "yes")
+CHAT_SUMMARY_TOKENS = int(os.environ.get("EDGE_LLM_CHAT_SUMMARY_TOKENS", 256))
+# once the window is over budget its oldest turns are dropped until it is down to this share of the
+# budget, then it only grows again, so consecutive requests share a prefix Ollama can reuse from its KV cache
+CHAT_CONTEXT_REFILL = float(os.environ.get("EDGE_LLM_CHAT_CONTEXT_REFILL", 0.6))
+
+# rough size of a token in characters for English text and code, and the cost of a message's role markers
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+# the frontend stores a turn with this placeholder until the model has answered
+PENDING_RESPONSE = "..."
+
+SUMMARY_PROMPT = """/no_think - Update the summary of a conversation between a user and an AI assistant.
+Keep the facts, decisions and open questions the assistant may need later. Answer with the summary only, in at most {words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count, about four characters per token, without running a tokenizer."""
+    return -(-len(text or "") // CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+def turn_tokens(chat: dict) -> int:
+    tokens = estimate_tokens(chat.get("human", ""))
+    if chat.get("bot", PENDING_RESPONSE) != PENDING_RESPONSE:
+        tokens += estimate_tokens(chat["bot"])
+    return tokens
+
+
+class ChatContext:
+    """Recent chat turns held in memory, cut down to a token budget for each request.
+
+    Only chats added since the last request, and turns still waiting for their
+    answer, are read from the database. Turns that fall out of the window are
+    dropped, or folded into a rolling summary when summaries are enabled.
+    The window does not slide one turn at a time: its start stays put until
+    the budget is exceeded, then moves forward far enough to leave room for
+    several new turns.
+    """
+
+    def __init__(self, budget: int = CHAT_CONTEXT_TOKENS, max_turns: int = CHAT_CONTEXT_MAX_TURNS,
+                 summary_enabled: bool = CHAT_SUMMARY, summary_tokens: int = CHAT_SUMMARY_TOKENS,
+                 refill: float = CHAT_CONTEXT_REFILL):
+        self.budget = budget
+        self.refill = refill
+        self.max_turns = max_turns
+        self.summary_enabled = summary_enabled
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.turns = []
+        # turns evicted from the window and not folded into the summary yet
+        self.evicted = []
+        self._last_id = None
+        self._removals = None
+        self._summary_lock = asyncio.Lock()
+
+    def reset(self):
+        self.summary = ""
+        self.turns = []
+        self.evicted = []
+        self._last_id = None
+
+    def refresh(self):
+        """Bring the cached turns up to date with the database."""
+        if self._removals != db_manager.db.removals:
+            # chats were cleared since the last load
+            self.reset()
+            self._removals = db_manager.db.removals
+        if self._last_id is None:
+            new = db_manager.get_recent_chats(self.max_turns)
+        else:
+            new = db_manager.get_chats_after(self._last_id)
+            pending = [chat["id"] for chat in self.turns if chat.get("bot") == PENDING_RESPONSE]
+            if pending:
+                answered = {chat["id"]: chat for chat in db_manager.db.get_many(pending)}
+                self.turns = [answered.get(chat["id"], chat) for chat in self.turns]
+        if new:
+            self.turns.extend(new)
+            self._last_id = new[-1]["id"]
+        elif self._last_id is None:
+            self._last_id = 0
+
+        overflow = len(self.turns) - self.max_turns
+        if overflow > 0:
+            self._evict(self.turns[:overflow])
+            self.turns = self.turns[overflow:]
+
+    def record_response(self, chat_id: int, response: str):
+        """Keep the cached turn in step with update_chat_by_id."""
+        for chat in reversed(self.turns):
+            if chat.get("id") == chat_id:
+                chat["bot"] = response
+                break
+
+    def messages(self, system_prompt: str) -> list:
+        """System prompt, summary and the newest turns that fit in the token budget."""
+        self.refresh()
+        system = system_prompt
+        if self.summary:
+            system += f"\n\nSummary of the earlier conversation:\n{self.summary}"
+        system_tokens = estimate_tokens(system)
+        costs = [turn_tokens(chat) for chat in self.turns]
+        used = system_tokens + sum(costs)
+
+        dropped = 0
+        if used > self.budget:
+            # drop from the oldest end down to the refill level, the latest turn is
+            # always sent even when it is over budget on its own
+            target = system_tokens + max(0, self.budget - system_tokens) * self.refill
+            while dropped < len(self.turns) - 1 and used > target:
+                used -= costs[dropped]
+                dropped += 1
+        if dropped:
+            self._evict(self.turns[:dropped])
+            self.turns = self.turns[dropped:]
+        window = self.turns
+        remaining = self.budget - used
+
+        messages = [{"role": "system", "content": system}]
+        for chat in window:
+            messages.append({"role": "user", "content": chat["human"]})
+            if chat.get("bot", PENDING_RESPONSE) != PENDING_RESPONSE:
+                messages.append({"role": "assistant", "content": chat["bot"]})
+        logger.debug(f"Chat context: {len(window)} turns, {self.budget - remaining} of {self.budget} tokens, "
+                     f"summary {'on' if self.summary else 'off'}")
+        return messages
+
+    async def fold_summary(self, summarize):
+        """Fold evicted turns into the rolling summary.
+
+        `summarize(prompt)` returns the model's answer. Meant to run after a
+        reply was sent, so the summary never delays a response.
+        """
+        if not self.summary_enabled or not self.evicted or self._summary_lock.locked():
+            return
+        async with self._summary_lock:
+            turns, self.evicted = self.evicted, []
+            text = "\n".join(f"User: {chat['human']}\nAssistant: {chat.get('bot', '')}" for chat in turns)
+            prompt = SUMMARY_PROMPT.format(words=self.summary_tokens * 3 // 4,
+                                           summary=self.summary or "(none)", turns=text)
+            try:
+                self.summary = (await summarize(prompt)).strip()
+            except Exception as e:
+                # keep the turns for the next attempt
+                self.evicted = turns + self.evicted
+                logger.error(f"Failed to update the chat summary: {e}")
+
+    def _evict(self, turns: list):
+        if self.summary_enabled:
+            self.evicted.extend(chat for chat in turns if chat.get("bot", PENDING_RESPONSE) != PENDING_RESPONSE)
+
+
+chat_context = ChatContext()
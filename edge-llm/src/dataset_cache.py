@@ -0,0 +1,55 @@
+import os
+import hashlib
+from .cache import LRUCache
+
+DATASET_CACHE_ENTRIES = int(os.environ.get("EDGE_LLM_DATASET_CACHE_ENTRIES", 16))
+DATASET_CACHE_BYTES = int(os.environ.get("EDGE_LLM_DATASET_CACHE_MB", 256)) * 1024 * 1024
+# bump when the generator changes its output for the same parameters, so clients drop stale ETags
+DATASET_VERSION = "2"
+
+
+class CachedDataset:
+    """A generated trace with the responses already encoded from it.
+
+    The samples are kept as float64 arrays, the encoded bodies are added by
+    response variant (format, dtype, time column, plot) as they are requested.
+    """
+
+    def __init__(self, key: tuple, params: dict, time, vibration):
+        self.key = key
+        self.params = params
+        self.time = time
+        self.vibration = vibration
+        self.responses = {}
+
+    @property
+    def nbytes(self) -> int:
+        return self.time.nbytes + self.vibration.nbytes + sum(len(body) for body in self.responses.values())
+
+    def etag(self, variant: tuple) -> str:
+        return dataset_etag(self.key, variant)
+
+
+def dataset_key(params: dict) -> tuple:
+    """Cache key of a trace, the normalized generation parameters in a fixed order."""
+    return tuple(params.items())
+
+
+def dataset_etag(key: tuple, variant: tuple) -> str:
+    """Strong ETag of one response variant, generation is deterministic so no hashing of the body is needed."""
+    digest = hashlib.sha1(repr((DATASET_VERSION, key, variant)).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag`, weak validators included."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+dataset_cache = LRUCache(DATASET_CACHE_ENTRIES, DATASET_CACHE_BYTES, sizeof=lambda entry: entry.nbytes)
@@ -1,10 +1,171 @@
 import os
-from tinydb import TinyDB, Query, table
+import json
+import logging
+import sqlite3
+import threading
+from .telemetry import db_seconds
 
-db_path = "/tmp/edge_llm_db.json"
-# initialize a TINY DB instance
-db = TinyDB(db_path)
-print(f"DB location initiated at -> {db_path}")
+logger = logging.getLogger(__name__)
+
+db_path = os.environ.get("EDGE_LLM_DB_PATH", "/tmp/edge_llm_db.sqlite3")
+# TinyDB file used by earlier releases, imported once into an empty database
+legacy_db_path = os.environ.get("EDGE_LLM_LEGACY_DB_PATH", "/tmp/edge_llm_db.json")
+# writes are committed together once this many are pending or the oldest is this old
+DB_COMMIT_BATCH = int(os.environ.get("EDGE_LLM_DB_COMMIT_BATCH", 64))
+DB_COMMIT_INTERVAL = float(os.environ.get("EDGE_LLM_DB_COMMIT_INTERVAL", 0.05))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    type TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_type ON documents (type, id);
+"""
+
+
+class DocumentStore:
+    """JSON documents keyed by id in SQLite, a drop-in for the TinyDB table used before.
+
+    The database runs in WAL mode and documents are indexed by id and type,
+    so writes append to the log instead of rewriting the whole file and
+    lookups by type do not scan the table. All access goes through one
+    connection behind a lock. Writes are committed in batches, reads on the
+    same connection already see them.
+    """
+
+    def __init__(self, path: str, commit_batch: int = DB_COMMIT_BATCH,
+                 commit_interval: float = DB_COMMIT_INTERVAL):
+        self.path = path
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval
+        self._pending = 0
+        self._timer = None
+        # bumped by every remove, lets caches of documents notice deletions
+        self.removals = 0
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level="DEFERRED")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # with WAL, NORMAL only risks the last commits on power loss, never corruption
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def insert(self, document: dict, doc_id: int) -> int:
+        """Insert a new document, raises ValueError when `doc_id` is taken."""
+        with db_seconds.time("insert"), self._lock:
+            try:
+                self._conn.execute("INSERT INTO documents (id, type, data) VALUES (?, ?, ?)",
+                                   (doc_id, document.get("type"), json.dumps(document)))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Document with ID {doc_id} already exists")
+            self._written()
+        return doc_id
+
+    def insert_many(self, documents: dict):
+        """Insert {doc_id: document} in a single transaction, replacing existing ids."""
+        with db_seconds.time("insert_many"), self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (id, type, data) VALUES (?, ?, ?)",
+                ((int(doc_id), document.get("type"), json.dumps(document))
+                 for doc_id, document in documents.items()))
+            self.commit()
+
+    def upsert(self, fields: dict, doc_id: int):
+        """Merge `fields` into the document, or create it from `fields` when missing."""
+        with db_seconds.time("upsert"), self._lock:
+            row = self._conn.execute("SELECT data FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            document = {**json.loads(row[0]), **fields} if row else dict(fields)
+            self._conn.execute("INSERT OR REPLACE INTO documents (id, type, data) VALUES (?, ?, ?)",
+                               (doc_id, document.get("type"), json.dumps(document)))
+            self._written()
+
+    def get(self, doc_id: int):
+        with db_seconds.time("get"), self._lock:
+            row = self._conn.execute("SELECT data FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search_type(self, doc_type: str) -> list:
+        """All documents of a type, oldest id first."""
+        return self._select("type = ? ORDER BY id", (doc_type,))
+
+    def search_type_after(self, doc_type: str, after_id: int) -> list:
+        """Documents of a type with an id above `after_id`, oldest first."""
+        return self._select("type = ? AND id > ? ORDER BY id", (doc_type, after_id))
+
+    def latest_of_type(self, doc_type: str, limit: int) -> list:
+        """The `limit` documents of a type with the highest ids, oldest first."""
+        return self._select("type = ? ORDER BY id DESC LIMIT ?", (doc_type, limit))[::-1]
+
+    def get_many(self, doc_ids) -> list:
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return []
+        return self._select(f"id IN ({','.join('?' * len(doc_ids))}) ORDER BY id", doc_ids)
+
+    def remove_type(self, doc_type: str) -> int:
+        with db_seconds.time("remove"), self._lock:
+            removed = self._conn.execute("DELETE FROM documents WHERE type = ?", (doc_type,)).rowcount
+            self.removals += 1
+            self._written()
+        return removed
+
+    def _select(self, where: str, params) -> list:
+        # one JSON array parsed in a single call is cheaper than a json.loads per row
+        with db_seconds.time("select"):
+            with self._lock:
+                (data,) = self._conn.execute(
+                    "SELECT '[' || COALESCE(group_concat(data, ','), '') || ']' "
+                    f"FROM (SELECT data FROM documents WHERE {where})", params).fetchone()
+            return json.loads(data)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def commit(self):
+        with db_seconds.time("commit"), self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self.commit()
+            self._conn.close()
+
+    def _written(self):
+        self._pending += 1
+        if self._pending >= self.commit_batch or self.commit_interval <= 0:
+            self.commit()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.commit_interval, self.commit)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+def migrate_legacy_db(store: DocumentStore, path: str) -> int:
+    """Import a TinyDB JSON file into an empty store, then rename the file so it is imported once."""
+    if not os.path.exists(path) or store.count():
+        return 0
+    try:
+        with open(path) as f:
+            tables = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Skipping migration of {path}: {e}")
+        return 0
+    documents = tables.get("_default", {})
+    store.insert_many(documents)
+    os.replace(path, path + ".migrated")
+    logger.info(f"Migrated {len(documents)} documents from {path}")
+    return len(documents)
+
+
+# initialize the document store
+db = DocumentStore(db_path)
+migrate_legacy_db(db, legacy_db_path)
+logger.info(f"DB location initiated at -> {db_path}")
 
 
 
@@ -12,38 +173,33 @@ def query_executor(payload: dict):
     try:
         if "add" == payload["opr"] and payload["data"] is not None:
             # returns id
-            return db.insert(table.Document(payload["data"], doc_id=payload["data"]["id"]))
+            return db.insert(payload["data"], doc_id=payload["data"]["id"])
         elif "chats" == payload["opr"] and payload["type"] is not None:
-            print(f"retrieving all chats")
-            data = Query()
-            return db.search(data.type == payload["type"])
+            logger.debug("Retrieving all chats")
+            return db.search_type(payload["type"])
         elif "clear_chats" == payload["opr"] and payload["type"] is not None:
-            print(f"clear all chats")
-            query_builder = Query()
-            results = db.remove(query_builder.type == "chat")
-            print(results)
+            results = db.remove_type("chat")
+            logger.info(f"Cleared {results} chats")
             return "success"
     except Exception as e:
-        print(e)
+        logger.error(f"DB query {payload.get('opr')} failed: {e}")
         return error_response()
 
 
-def get_chat_history():
-    try:
-        data = Query()
-        return db.search(data.type == "chat")
-    except Exception as e:
-        print(e)
-        return error_response()
+def get_recent_chats(limit: int):
+    return db.latest_of_type("chat", limit)
+
+
+def get_chats_after(chat_id: int):
+    return db.search_type_after("chat", chat_id)
 
 
 def update_chat_by_id(id: int, chat_update: dict):
     try:
-        db.upsert(table.Document(
-            {'metrics': chat_update["metrics"], 'bot': chat_update["response"]}, doc_id=id))
-        print(f"chat updated for id : {id}")
+        db.upsert({'metrics': chat_update["metrics"], 'bot': chat_update["response"]}, doc_id=id)
+        logger.debug(f"chat updated for id : {id}")
     except Exception as e:
-        print(e)
+        logger.error(f"Updating chat {id} failed: {e}")
         return error_response()
 
 
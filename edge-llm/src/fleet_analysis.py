@@ -0,0 +1,107 @@
+import os
+import re
+import numpy as np
+from . import vibration_features
+
+# traces accepted in one fleet request
+FLEET_MAX_TRACES = int(os.environ.get("EDGE_LLM_FLEET_MAX_TRACES", 256))
+# model calls of one fleet request running at the same time
+FLEET_LLM_CONCURRENCY = int(os.environ.get("EDGE_LLM_FLEET_LLM_CONCURRENCY", 2))
+# engines that need the model analyzed together in one prompt, 1 for a call per engine
+FLEET_PROMPT_ENGINES = int(os.environ.get("EDGE_LLM_FLEET_PROMPT_ENGINES", 4))
+
+# appended to the engine analysis system prompt for grouped prompts
+FLEET_SYSTEM_SUFFIX = """
+FLEET ANALYSIS: You may be given several engines at once. The data of each engine starts with a line "### Engine <id>". Analyze every engine separately, and start the analysis of each engine with that same line."""
+
+ENGINE_HEADER = re.compile(r"^#+\s*Engine\s+(\S+?)\s*:?\s*$", re.MULTILINE)
+
+
+class FleetTrace:
+    """One engine's trace in a fleet request, with its features once computed."""
+
+    def __init__(self, engine_id: str, params: dict, vibration):
+        self.engine_id = str(engine_id)
+        self.params = params
+        self.vibration = np.asarray(vibration, dtype=np.float64)
+        self.sample_rate = params.get("sampling_freq", 1000)
+        self.engine_info = engine_info_from_params(params)
+        self.features = None
+        self.verdict = None
+
+
+def engine_info_from_params(params: dict) -> dict:
+    """Engine description for the prompt from the simulation parameters of a trace."""
+    rpm = params.get("rpm", 3000)
+    cylinders = params.get("num_cylinders", 4)
+    return {
+        "type": params.get("engine_type", "4-stroke"),
+        "cylinders": cylinders,
+        "rpm": rpm,
+        "firing_frequency": (rpm / 60) * (cylinders / 2),
+    }
+
+
+def compute_features(traces: list, segment_seconds: float = None, overlap: float = None) -> int:
+    """Fill in `features` of every trace, stacking traces of equal length and sample rate.
+
+    Returns the number of stacks, one per distinct (length, sample rate).
+    """
+    features, stacks = stack_features([trace.vibration for trace in traces],
+                                      [trace.sample_rate for trace in traces],
+                                      [trace.engine_info["firing_frequency"] for trace in traces],
+                                      segment_seconds, overlap)
+    for trace, trace_features in zip(traces, features):
+        trace.features = trace_features
+    return stacks
+
+
+def stack_features(vibrations: list, sample_rates: list, firing_freqs: list,
+                   segment_seconds: float = None, overlap: float = None) -> tuple:
+    """trace_features of every trace, and the number of stacks they were computed in.
+
+    Traces of equal length and sample rate are stacked and go through
+    windowed_features_batch in one pass. Takes and returns plain lists, so it
+    can run in a worker process.
+    """
+    groups = {}
+    for index, (vibration, sample_rate) in enumerate(zip(vibrations, sample_rates)):
+        groups.setdefault((len(vibration), sample_rate), []).append(index)
+    features = [None] * len(vibrations)
+    for (_, sample_rate), group in groups.items():
+        stack = np.stack([vibrations[i] for i in group]) if len(group) > 1 else np.asarray(vibrations[group[0]])[np.newaxis]
+        windowed = vibration_features.windowed_features_batch(
+            stack, sample_rate, [firing_freqs[i] for i in group], segment_seconds, overlap)
+        summaries = vibration_features.summarize_windows_batch(windowed)
+        for i, trace_windowed, summary in zip(group, windowed, summaries):
+            features[i] = vibration_features.trace_features(vibrations[i], trace_windowed, summary)
+    return features, len(groups)
+
+
+def prompt_groups(traces: list, size: int = None) -> list:
+    """Split the traces that need the model into groups analyzed by one prompt each."""
+    size = max(1, FLEET_PROMPT_ENGINES if size is None else int(size))
+    return [traces[i:i + size] for i in range(0, len(traces), size)]
+
+
+def fleet_prompt(sections: list) -> str:
+    """Grouped prompt from (engine_id, per-engine prompt) pairs."""
+    parts = [f"### Engine {engine_id}\n{prompt}" for engine_id, prompt in sections]
+    return "\n\n".join(parts) + f"\nAnalyze each of these {len(sections)} engines following the framework.\n"
+
+
+def split_fleet_response(text: str, engine_ids: list) -> dict:
+    """Cut a grouped answer at the "### Engine <id>" lines.
+
+    Returns {engine_id: analysis} for the engines the model answered under
+    their own header, the others are left out.
+    """
+    wanted = set(engine_ids)
+    headers = [match for match in ENGINE_HEADER.finditer(text) if match.group(1) in wanted]
+    sections = {}
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        section = text[match.end():end].strip()
+        if section:
+            sections.setdefault(match.group(1), section)
+    return sections
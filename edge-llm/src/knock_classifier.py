@@ -0,0 +1,102 @@
+import os
+
+# answer clear-cut engineAnalysis requests from the rules alone, without calling the model
+KNOCK_FAST_PATH = os.environ.get("EDGE_LLM_KNOCK_FAST_PATH", "1").lower() not in ("0", "false", "no")
+
+# crest factor bands, the same the model is given in create_llm_prompt
+CREST_NORMAL_MAX = 2.8
+CREST_LIGHT_MAX = 3.5
+CREST_MODERATE_MAX = 4.2
+# a crest factor this close to a band edge lowers the confidence
+CREST_MARGIN = 0.1
+
+# 90th percentile of the per-window knock band excess, see vibration_features.windowed_features.
+# Broadband noise stays around 1, resonant knock lifts it well above.
+EXCESS_NONE_MAX = 1.6
+EXCESS_PRESENT_MIN = 3.0
+# knock this clear in the spectrum is reported even when the crest factor stays normal
+EXCESS_STRONG_MIN = 5.0
+
+SEVERITIES = ("none", "light", "moderate", "heavy")
+
+
+def crest_severity(crest_factor: float) -> str:
+    if crest_factor < CREST_NORMAL_MAX:
+        return "none"
+    if crest_factor < CREST_LIGHT_MAX:
+        return "light"
+    if crest_factor < CREST_MODERATE_MAX:
+        return "moderate"
+    return "heavy"
+
+
+def near_crest_edge(crest_factor: float) -> bool:
+    return any(abs(crest_factor - edge) < CREST_MARGIN
+               for edge in (CREST_NORMAL_MAX, CREST_LIGHT_MAX, CREST_MODERATE_MAX))
+
+
+def classify_knock(features: dict) -> dict:
+    """Rule-based knock verdict from the output of process_vibration_data.
+
+    Combines the crest factor bands with the knock band excess of the
+    windowed spectrum. When the two disagree, or the spectrum is in between,
+    the verdict is marked ambiguous so the caller can ask the model instead.
+    """
+    crest_factor = features["crest_factor"]
+    windows = features.get("windows") or {}
+    excess = windows.get("knock_band_excess", {}).get("p90")
+    by_crest = crest_severity(crest_factor)
+    reasons = [f"crest factor {crest_factor:.2f} is in the {by_crest} knock range"
+               if by_crest != "none" else f"crest factor {crest_factor:.2f} is in the normal range"]
+
+    if excess is None:
+        # without the spectrum a normal crest factor proves nothing, the model gets the trace
+        reasons.append("the knock band cannot be observed at this sample rate" if "knock_band_excess" in windows
+                       else "no windowed spectrum is available")
+        severity, confidence, ambiguous = by_crest, "low", True
+    elif excess < EXCESS_NONE_MAX:
+        reasons.append(f"knock band energy is at the noise floor (excess {excess:.2f})")
+        if by_crest == "none":
+            severity, confidence, ambiguous = "none", "high", False
+        else:
+            # a high crest factor without resonant energy, could be noise spikes
+            severity, confidence, ambiguous = by_crest, "low", True
+    elif excess < EXCESS_PRESENT_MIN:
+        reasons.append(f"knock band energy is slightly above the noise floor (excess {excess:.2f})")
+        severity, confidence, ambiguous = by_crest, "low", True
+    else:
+        reasons.append(f"non-harmonic energy in the knock band is {excess:.1f}x the noise floor")
+        if by_crest != "none":
+            severity, confidence, ambiguous = by_crest, "high", False
+        elif excess >= EXCESS_STRONG_MIN:
+            severity, confidence, ambiguous = "light", "medium", False
+        else:
+            severity, confidence, ambiguous = "light", "low", True
+
+    if not ambiguous and confidence == "high" and near_crest_edge(crest_factor):
+        confidence = "medium"
+        reasons.append("the crest factor is close to a band edge")
+
+    return {
+        "assessment": "normal" if severity == "none" else "knock",
+        "severity": severity,
+        "confidence": confidence,
+        "ambiguous": ambiguous,
+        "crest_factor": crest_factor,
+        "knock_band_excess": excess,
+        "reasons": reasons,
+    }
+
+
+def format_verdict(verdict: dict) -> str:
+    """Markdown summary of a verdict, streamed to the client ahead of any model output."""
+    if verdict["assessment"] == "normal":
+        headline = "Normal engine operation"
+    else:
+        headline = f"{verdict['severity'].capitalize()} knock detected"
+    text = f"**Rule-based assessment**: {headline} (confidence: {verdict['confidence']})\n"
+    for reason in verdict["reasons"]:
+        text += f"- {reason}\n"
+    if verdict["ambiguous"]:
+        text += "\nThe measurements are not conclusive, asking the AI model for a detailed analysis...\n"
+    return text + "\n"
@@ -0,0 +1,169 @@
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# level of every logger without one of its own in EDGE_LLM_LOG_LEVELS
+LOG_LEVEL = os.environ.get("EDGE_LLM_LOG_LEVEL", "INFO").upper()
+# per-module levels as comma separated logger=LEVEL pairs, such as src.api=DEBUG,uvicorn.access=WARNING
+LOG_LEVELS = os.environ.get("EDGE_LLM_LOG_LEVELS", "")
+# json writes one object per line for the Greengrass log files, text is easier to read in a terminal
+LOG_FORMAT = os.environ.get("EDGE_LLM_LOG_FORMAT", "json").lower()
+# records waiting for the writer thread, further records are dropped and counted rather than block the caller
+LOG_QUEUE_SIZE = int(os.environ.get("EDGE_LLM_LOG_QUEUE_SIZE", 10000))
+# records per second passed for each rate_key, such as the per-token events, with a burst of as many
+LOG_RATE = float(os.environ.get("EDGE_LLM_LOG_RATE", 5))
+
+# attributes every LogRecord has, anything else was passed in `extra` and goes into the JSON object
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+# extra={"rate_key": "token"} on a per-token event, the rate limit applies per key
+TOKEN_EVENT = {"rate_key": "token"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger and message, then the fields passed in `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key != "rate_key":
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Passes at most `rate` records per second for each `rate_key`, with a burst of as many.
+
+    Records without a rate_key always pass. The first record let through
+    after some were held back carries their count in `suppressed`.
+    """
+
+    def __init__(self, rate: float = LOG_RATE):
+        super().__init__()
+        self.rate = rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_key", None)
+        if key is None or self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(key, (self.rate, now, 0))
+            tokens = min(self.rate, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread without waiting, a full queue drops the record instead."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # arguments and tracebacks refer to objects that may change or go away before the writer gets to them
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogConfig:
+    """Non-blocking, structured logging for the whole process.
+
+    Loggers hand records to a bounded queue and return, a thread writes
+    them to stdout, which Greengrass captures into the component log. Levels
+    are set per module from EDGE_LLM_LOG_LEVELS on top of EDGE_LLM_LOG_LEVEL,
+    and per-token events are rate limited per key.
+    """
+
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+        self.rate_limit = None
+
+    def configure(self, level: str = LOG_LEVEL, levels: str = LOG_LEVELS, log_format: str = LOG_FORMAT,
+                  queue_size: int = LOG_QUEUE_SIZE, rate: float = LOG_RATE):
+        if self.listener is not None:
+            return
+        writer = logging.StreamHandler(sys.stdout)
+        if log_format == "json":
+            writer.setFormatter(JsonFormatter())
+        else:
+            writer.setFormatter(logging.Formatter("{asctime} - {levelname} - {name} - {message}", style="{",
+                                                  datefmt="%Y-%m-%d %H:%M"))
+        self.handler = DroppingQueueHandler(queue.Queue(queue_size))
+        self.rate_limit = RateLimitFilter(rate)
+        self.handler.addFilter(self.rate_limit)
+        self.listener = QueueListener(self.handler.queue, writer, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.stop)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        # uvicorn writes its own records synchronously to its own handlers, they go through the queue too
+        for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+            logging.getLogger(name).handlers = []
+            logging.getLogger(name).propagate = True
+        for name, module_level in parse_levels(levels).items():
+            logging.getLogger(name).setLevel(module_level)
+
+    def stop(self):
+        """Write out the queued records and stop the writer thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def metrics(self) -> dict:
+        return {
+            "queued": self.handler.queue.qsize() if self.handler else 0,
+            "dropped": self.handler.dropped if self.handler else 0,
+        }
+
+
+def parse_levels(levels: str) -> dict:
+    """{logger name: level} from `name=LEVEL,name=LEVEL`, entries that do not parse are ignored."""
+    result = {}
+    for entry in levels.split(","):
+        name, _, level = entry.partition("=")
+        if name.strip() and isinstance(logging.getLevelName(level.strip().upper()), int):
+            result[name.strip()] = level.strip().upper()
+    return result
+
+
+log_config = LogConfig()
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import logging
+import httpx
+from .telemetry import current_opr, time_to_first_token, tokens_per_second, model_request_seconds
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_BASE_URL = os.environ.get("EDGE_LLM_OLLAMA_URL", "http://localhost:11434")
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("EDGE_LLM_OLLAMA_CONNECT_TIMEOUT", 5))
+# time allowed between two streamed chunks, model loading on a cold device can be slow
+OLLAMA_READ_TIMEOUT = float(os.environ.get("EDGE_LLM_OLLAMA_READ_TIMEOUT", 300))
+OLLAMA_RETRIES = int(os.environ.get("EDGE_LLM_OLLAMA_RETRIES", 2))
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("EDGE_LLM_OLLAMA_MAX_CONNECTIONS", 8))
+# how long a successful /api/tags probe is trusted before asking again
+OLLAMA_READY_TTL = float(os.environ.get("EDGE_LLM_OLLAMA_READY_TTL", 30))
+# how long Ollama keeps a model loaded after a request, its KV cache of the last prompts goes with it
+OLLAMA_KEEP_ALIVE = os.environ.get("EDGE_LLM_OLLAMA_KEEP_ALIVE", "30m")
+
+# counters summed from the final part of every response, per API path
+PROMPT_STATS = ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration")
+
+
+class OllamaError(Exception):
+    """Raised when Ollama is unreachable or reports an error."""
+
+
+class OllamaClient:
+    """Shared async client for the Ollama HTTP API.
+
+    A single httpx.AsyncClient keeps connections to Ollama alive between
+    requests, and streamed NDJSON responses are parsed line by line as they
+    arrive instead of on a worker thread.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+                 read_timeout: float = OLLAMA_READ_TIMEOUT, retries: int = OLLAMA_RETRIES,
+                 max_connections: int = OLLAMA_MAX_CONNECTIONS, ready_ttl: float = OLLAMA_READY_TTL,
+                 keep_alive: str = OLLAMA_KEEP_ALIVE):
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.retries = retries
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections)
+        self.ready_ttl = ready_ttl
+        self.keep_alive = keep_alive
+        self.stats = {}
+        self.models = []
+        self._ready_at = None
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # the transport retries failed connection attempts only, a stream that
+            # already started is never replayed
+            transport = httpx.AsyncHTTPTransport(retries=self.retries, limits=self.limits)
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout,
+                                             transport=transport)
+        return self._client
+
+    async def ensure_ready(self) -> list:
+        """Check that Ollama is serving, reusing the last answer for `ready_ttl` seconds."""
+        if self._ready_at is not None and time.monotonic() - self._ready_at < self.ready_ttl:
+            return self.models
+        try:
+            response = await self._get_client().get("/api/tags")
+        except httpx.HTTPError as e:
+            self._ready_at = None
+            raise OllamaError(f"Failed to connect to Ollama API: {e}")
+        if response.status_code != 200:
+            self._ready_at = None
+            raise OllamaError(f"Ollama API is not responding properly. Status: {response.status_code}")
+        self.models = [model.get("name") for model in response.json().get("models", [])]
+        self._ready_at = time.monotonic()
+        return self.models
+
+    async def stream(self, path: str, body: dict):
+        """POST `body` to `path` and yield each streamed JSON object as it arrives.
+
+        `keep_alive` is added unless the body sets it, so the model and the KV
+        cache of its last prompts stay loaded between requests.
+        """
+        if self.keep_alive and "keep_alive" not in body:
+            body = {**body, "keep_alive": self.keep_alive}
+        labels = (current_opr.get(), body.get("model", ""))
+        start = time.perf_counter()
+        first_token = True
+        try:
+            async with self._get_client().stream("POST", path, json=body) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    raise OllamaError(f"Ollama returned {response.status_code}: {response.text}")
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        part = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Error parsing JSON from Ollama: {e}, line: {line}")
+                        continue
+                    if first_token and (part.get("response") or part.get("message", {}).get("content")):
+                        first_token = False
+                        time_to_first_token.observe(time.perf_counter() - start, *labels)
+                    if part.get("done"):
+                        self._record(path, part)
+                        model_request_seconds.observe(time.perf_counter() - start, *labels)
+                        if part.get("eval_duration"):
+                            tokens_per_second.observe(part.get("eval_count", 0) / part["eval_duration"] * 1e9, *labels)
+                    yield part
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            # force a fresh readiness probe next time
+            self._ready_at = None
+            raise
+
+    async def generate(self, body: dict):
+        async for part in self.stream("/api/generate", body):
+            yield part
+
+    async def chat(self, body: dict):
+        async for part in self.stream("/api/chat", body):
+            yield part
+
+    async def complete(self, body: dict) -> str:
+        """Run a generation to the end and return the whole response text."""
+        parts = []
+        async for part in self.generate(body):
+            if "error" in part:
+                raise OllamaError(part["error"])
+            parts.append(part.get("response", ""))
+        return "".join(parts)
+
+    def metrics(self) -> dict:
+        """Prompt and generation counters per API path, with averages per request."""
+        result = {}
+        for path, stats in self.stats.items():
+            requests = stats["requests"]
+            result[path] = {
+                **stats,
+                "prompt_eval_count_avg": stats["prompt_eval_count"] / requests,
+                "prompt_eval_duration_avg": stats["prompt_eval_duration"] / requests,
+            }
+        return {"keep_alive": self.keep_alive, "paths": result}
+
+    def _record(self, path: str, part: dict):
+        stats = self.stats.setdefault(path, {"requests": 0, **{key: 0 for key in PROMPT_STATS}})
+        stats["requests"] += 1
+        for key in PROMPT_STATS:
+            stats[key] += part.get(key) or 0
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._ready_at = None
+
+
+ollama = OllamaClient()
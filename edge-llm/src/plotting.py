@@ -0,0 +1,85 @@
+import os
+import io
+import numpy as np
+from .cache import LRUCache
+
+PLOT_FIGSIZE = (12, 8)
+PLOT_DPI = 100
+# series are reduced to a min/max pair per pixel column of the figure
+PLOT_BUCKETS = PLOT_FIGSIZE[0] * PLOT_DPI
+PLOT_CACHE_ENTRIES = int(os.environ.get("EDGE_LLM_PLOT_CACHE_ENTRIES", 32))
+
+plot_cache = LRUCache(PLOT_CACHE_ENTRIES)
+
+
+def decimate_minmax(x, y, buckets: int = PLOT_BUCKETS):
+    """Reduce a series to the minimum and maximum of `buckets` consecutive slices.
+
+    Every pixel column of the plot still shows the full range of the samples
+    that fall into it, so spikes like knock bursts survive, while drawing cost
+    depends on the plot width instead of the sample count.
+    """
+    n = len(y)
+    if n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+    x_out = np.empty(2 * len(starts))
+    y_out = np.empty(2 * len(starts))
+    x_out[0::2] = x[starts]
+    x_out[1::2] = x[ends]
+    y_out[0::2] = np.minimum.reduceat(y, starts)
+    y_out[1::2] = np.maximum.reduceat(y, starts)
+    return x_out, y_out
+
+
+def plot_cache_key(params: dict) -> tuple:
+    """Cache key of a plot, the generation parameters without derived values."""
+    return tuple(sorted((k, v) for k, v in params.items() if k != 'knock_count'))
+
+
+def render_plot(time, vibration, params) -> bytes:
+    """Render the three vibration panels to PNG bytes.
+
+    Uses a standalone Figure instead of pyplot so renders can run on worker
+    threads without sharing pyplot's global state. matplotlib is imported
+    on the first render, it is the slowest import of the server.
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=PLOT_FIGSIZE, dpi=PLOT_DPI)
+    FigureCanvasAgg(fig)
+
+    # Plot full dataset
+    ax = fig.add_subplot(3, 1, 1)
+    ax.plot(*decimate_minmax(time, vibration))
+    ax.set_title(f"Engine Vibration ({params['rpm']} RPM) with Developing Knock")
+    ax.set_ylabel('Amplitude')
+    ax.grid(True)
+
+    # Plot early segment (before knock)
+    ax = fig.add_subplot(3, 1, 2)
+    early_end = np.searchsorted(time, params['knock_start_time'])
+    ax.plot(*decimate_minmax(time[:early_end], vibration[:early_end]))
+    ax.set_title('Early Operation (No Knock)')
+    ax.set_ylabel('Amplitude')
+    ax.grid(True)
+
+    # Plot late segment (with severe knock)
+    ax = fig.add_subplot(3, 1, 3)
+    late_start = np.searchsorted(time, params['total_time'] * 0.5, side='right')
+    ax.plot(*decimate_minmax(time[late_start:], vibration[late_start:]))
+    ax.set_title('Late Operation (Knocking)')
+    ax.set_xlabel('Time (seconds)')
+    ax.set_ylabel('Amplitude')
+    ax.grid(True)
+
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
@@ -0,0 +1,335 @@
+import os
+import time
+import asyncio
+import logging
+import importlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+from .telemetry import event_loop_lag_seconds
+
+logger = logging.getLogger(__name__)
+
+# worker processes for CPU-bound signal work, 0 runs it on threads of the server process as before
+PROCESS_WORKERS = int(os.environ.get("EDGE_LLM_PROCESS_WORKERS", min(2, os.cpu_count() or 1)))
+# seconds a call may run before it is given up and the workers are restarted
+PROCESS_TIMEOUT = float(os.environ.get("EDGE_LLM_PROCESS_TIMEOUT", 120))
+# spawn starts workers from a fresh interpreter, forking the running server would copy the locks of its threads
+PROCESS_START_METHOD = os.environ.get("EDGE_LLM_PROCESS_START_METHOD", "spawn")
+# arrays at least this large go through shared memory, smaller ones are cheaper to pickle
+SHARED_ARRAY_MIN_BYTES = 64 * 1024
+SHARED_ARRAY_ALIGN = 64
+# how often the event loop lag is sampled, and how many recent samples the percentiles cover
+LOOP_LAG_INTERVAL = float(os.environ.get("EDGE_LLM_LOOP_LAG_INTERVAL", 0.05))
+LOOP_LAG_SAMPLES = 1200
+# imported by every worker before its first call, names with a dot in front are modules of this package
+WARM_MODULES = ("numpy", "scipy.signal", "scipy.fft", ".vibration_sim", ".vibration_features", ".fleet_analysis",
+                ".plotting")
+
+
+class ProcessTimeoutError(Exception):
+    """Raised when a call to the process pool runs past its timeout."""
+
+
+class SharedArray:
+    """Place of an array in a shared memory block, pickled instead of the array."""
+
+    __slots__ = ("offset", "shape", "dtype")
+
+    def __init__(self, offset: int, shape: tuple, dtype: str):
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+
+    def view(self, block: shared_memory.SharedMemory) -> np.ndarray:
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf, offset=self.offset)
+
+
+def map_values(value, kind, fn):
+    """`value` with fn(item) in place of every item of type `kind`, looking into lists, tuples and dicts."""
+    if isinstance(value, kind):
+        return fn(value)
+    if isinstance(value, dict):
+        return {key: map_values(item, kind, fn) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(map_values(item, kind, fn) for item in value)
+    return value
+
+
+def share_arrays(value):
+    """Copy the large arrays in `value` into one new shared memory block.
+
+    Returns `value` with SharedArray entries in place of those arrays, and
+    the block, None when there was nothing large enough to share.
+    """
+    offsets = {}
+    size = 0
+
+    def collect(array):
+        nonlocal size
+        if array.nbytes >= SHARED_ARRAY_MIN_BYTES and not array.dtype.hasobject and id(array) not in offsets:
+            offsets[id(array)] = size
+            size += -(-array.nbytes // SHARED_ARRAY_ALIGN) * SHARED_ARRAY_ALIGN
+        return array
+
+    # keeps the arrays alive, so their ids stay unique until they are placed
+    arrays = map_values(value, np.ndarray, collect)
+    if not offsets:
+        return value, None
+    block = shared_memory.SharedMemory(create=True, size=size)
+
+    def place(array):
+        if id(array) not in offsets:
+            return array
+        shared = SharedArray(offsets[id(array)], array.shape, array.dtype.str)
+        shared.view(block)[...] = array
+        return shared
+
+    return map_values(arrays, np.ndarray, place), block
+
+
+def collect_arrays(value, name: str):
+    """Copies of the arrays of block `name` in place of the SharedArray entries of `value`, the block is removed.
+
+    Returns the value and the size of the block.
+    """
+    if name is None:
+        return value, 0
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return map_values(value, SharedArray, lambda shared: shared.view(block).copy()), block.size
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _warm_worker():
+    for name in WARM_MODULES:
+        importlib.import_module(name, __package__)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _call(fn, args, kwargs, name):
+    """Worker side of ProcessPool.run, with views on the caller's block and the result in a block of its own."""
+    block = shared_memory.SharedMemory(name=name) if name is not None else None
+    try:
+        if block is not None:
+            args, kwargs = map_values((args, kwargs), SharedArray, lambda shared: shared.view(block))
+        result, out = share_arrays(fn(*args, **kwargs))
+        # small arrays of the result may still be views on the caller's block
+        result = map_values(result, np.ndarray, lambda array: array if array.base is None else array.copy())
+        del args, kwargs
+    finally:
+        if block is not None:
+            block.close()
+    if out is None:
+        return result, None
+    out.close()
+    return result, out.name
+
+
+class ProcessPool:
+    """Runs CPU-bound signal work in worker processes, so it does not hold up the event loop.
+
+    Workers are spawned at startup and import numpy, scipy, matplotlib and
+    the signal modules before their first call. Large arrays in the
+    arguments and in the result move through one shared memory block each
+    way instead of being pickled through the pipe, the caller takes one copy
+    out of the result block. A call running past its timeout cannot be
+    stopped inside its worker, so the workers are restarted, and calls that
+    were running alongside it are retried once. With no workers, calls run
+    on a thread of the server process.
+    """
+
+    def __init__(self, workers: int = PROCESS_WORKERS, timeout: float = PROCESS_TIMEOUT,
+                 start_method: str = PROCESS_START_METHOD):
+        self.workers = workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._executor = None
+        self._generation = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "running": 0,
+            "busy_time": 0.0,
+            "shared_bytes": 0,
+        }
+
+    def start(self):
+        if self._executor is not None or self.workers < 1:
+            return
+        try:
+            context = multiprocessing.get_context(self.start_method)
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_warm_worker)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Process pool unavailable, running signal work on threads: {e}")
+            self.workers = 0
+            return
+        logger.info(f"Process pool started with {self.workers} {self.start_method} workers")
+
+    async def warm(self):
+        """Start every worker and wait until it has imported its modules."""
+        self.start()
+        if self._executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*(loop.run_in_executor(self._executor, _ready) for _ in range(self.workers)))
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"Process pool workers failed to start, running signal work on threads: {e}")
+            self.close()
+            self.workers = 0
+
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        """fn(*args, **kwargs) in a worker process, `fn` must be a module-level function.
+
+        Raises ProcessTimeoutError when the call takes longer than `timeout`,
+        the pool's timeout by default.
+        """
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        if self._executor is None:
+            try:
+                # the thread cannot be stopped either, it is only no longer waited for
+                return await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                raise ProcessTimeoutError(f"{fn.__name__} did not finish within {timeout:g} s")
+        # copies in and out of shared memory run on a thread, numpy releases the GIL for them
+        (args, kwargs), block = await asyncio.to_thread(share_arrays, (args, kwargs))
+        stats = self._stats
+        stats["submitted"] += 1
+        stats["running"] += 1
+        start = time.monotonic()
+        try:
+            if block is not None:
+                stats["shared_bytes"] += block.size
+            for attempt in range(2):
+                generation = self._generation
+                try:
+                    future = self._executor.submit(_call, fn, args, kwargs, block.name if block is not None else None)
+                    result, name = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+                except asyncio.TimeoutError:
+                    stats["timeouts"] += 1
+                    # a call still waiting for a worker is just dropped, a running one takes its worker down
+                    if not future.cancel():
+                        self._restart(generation)
+                    raise ProcessTimeoutError(f"{fn.__name__} did not finish within {timeout:g} s")
+                except BrokenProcessPool:
+                    # a worker died, or the timeout of another call restarted the pool under this one
+                    self._restart(generation)
+                    if attempt:
+                        raise
+                    continue
+                result, size = await asyncio.to_thread(collect_arrays, result, name)
+                stats["shared_bytes"] += size
+                stats["completed"] += 1
+                return result
+        except ProcessTimeoutError:
+            raise
+        except Exception:
+            stats["failed"] += 1
+            raise
+        finally:
+            stats["running"] -= 1
+            stats["busy_time"] += time.monotonic() - start
+            if block is not None:
+                block.close()
+                block.unlink()
+
+    def _restart(self, generation: int):
+        """Replace the workers, unless a call that failed alongside already did."""
+        if generation != self._generation or self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        self._generation += 1
+        self._stats["restarts"] += 1
+        logger.warning("Restarting the process pool workers")
+        # a running call cannot be cancelled, its worker is terminated
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def metrics(self) -> dict:
+        stats = self._stats
+        return {
+            "workers": self.workers,
+            "start_method": self.start_method if self.workers else "thread",
+            "timeout": self.timeout,
+            **stats,
+            "busy_time_avg": stats["busy_time"] / stats["submitted"] if stats["submitted"] else 0.0,
+        }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep.
+
+    The lag is how long any callback waits behind work that holds the loop,
+    a token stream on a WebSocket stalls for as long. Compare it with the
+    process pool on and off (EDGE_LLM_PROCESS_WORKERS=0).
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, samples: int = LOOP_LAG_SAMPLES):
+        self.interval = interval
+        self.lags = deque(maxlen=samples)
+        self.count = 0
+        self.total = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - start - self.interval))
+
+    def record(self, lag: float):
+        self.lags.append(lag)
+        self.count += 1
+        self.total += lag
+        self.max_lag = max(self.max_lag, lag)
+        event_loop_lag_seconds.observe(lag)
+
+    def metrics(self) -> dict:
+        recent = np.array(self.lags) if self.lags else np.zeros(1)
+        return {
+            "interval": self.interval,
+            "samples": self.count,
+            "lag_avg": self.total / self.count if self.count else 0.0,
+            "lag_max": self.max_lag,
+            # over the last LOOP_LAG_SAMPLES samples
+            "recent_lag_p50": float(np.percentile(recent, 50)),
+            "recent_lag_p99": float(np.percentile(recent, 99)),
+            "recent_lag_max": float(recent.max()),
+        }
+
+
+process_pool = ProcessPool()
+loop_lag = LoopLagMonitor()
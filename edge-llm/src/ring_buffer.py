@@ -0,0 +1,180 @@
+import os
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# header of a ring, int64 slots ahead of the samples
+HEADER_SLOTS = 8
+MAGIC = 0x45444745524E4731  # "EDGERNG1"
+SLOT_MAGIC, SLOT_CAPACITY, SLOT_CHANNELS, SLOT_ITEMSIZE, SLOT_WRITTEN, SLOT_RESERVED = range(6)
+DTYPES = {4: np.float32, 8: np.float64}
+
+
+class RingBuffer:
+    """Fixed-capacity ring of multi-channel samples for a single producer and any number of readers.
+
+    Every sample is stored twice, at its slot and one capacity further, so any
+    window of up to `capacity` samples is a contiguous slice and readers get
+    it as a view without copying. The producer writes the samples before it
+    advances the `written` counter, so a reader never sees a sample before it
+    is complete, and no lock is taken on either side. Before writing it
+    reserves the positions it is about to overwrite, so a reader that copied
+    a view can tell with `intact` whether the copy is consistent.
+
+    The ring lives in process memory, in a named shared memory block
+    (`shm_name`) or in a memory-mapped file (`path`), and other processes
+    can attach to the latter two with `RingBuffer.attach`.
+    """
+
+    def __init__(self, capacity: int, channels: int = 1, dtype=np.float64, shm_name: str = None,
+                 path: str = None, _attach: bool = False):
+        self.shm = None
+        self.mmap = None
+        if _attach:
+            buffer = self._open(shm_name, path, None)
+            header = np.ndarray(HEADER_SLOTS, dtype=np.int64, buffer=buffer)
+            if header[SLOT_MAGIC] != MAGIC:
+                raise ValueError("Not a ring buffer")
+            capacity, channels = int(header[SLOT_CAPACITY]), int(header[SLOT_CHANNELS])
+            dtype = DTYPES[int(header[SLOT_ITEMSIZE])]
+        else:
+            if capacity < 1 or channels < 1:
+                raise ValueError("capacity and channels must be positive")
+            nbytes = HEADER_SLOTS * 8 + channels * 2 * capacity * np.dtype(dtype).itemsize
+            buffer = self._open(shm_name, path, nbytes)
+        self.capacity = capacity
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self._header = np.ndarray(HEADER_SLOTS, dtype=np.int64, buffer=buffer)
+        self._data = np.ndarray((channels, 2 * capacity), dtype=self.dtype, buffer=buffer,
+                                offset=HEADER_SLOTS * 8)
+        if not _attach:
+            self._header[:] = 0
+            self._header[SLOT_CAPACITY] = capacity
+            self._header[SLOT_CHANNELS] = channels
+            self._header[SLOT_ITEMSIZE] = self.dtype.itemsize
+            self._header[SLOT_MAGIC] = MAGIC
+
+    @classmethod
+    def attach(cls, shm_name: str = None, path: str = None) -> "RingBuffer":
+        """Open a ring another process created, by shared memory name or file path."""
+        if (shm_name is None) == (path is None):
+            raise ValueError("Give either shm_name or path")
+        return cls(0, 0, shm_name=shm_name, path=path, _attach=True)
+
+    def _open(self, shm_name, path, nbytes):
+        """Backing memory of the ring, created with `nbytes` or opened when it is None."""
+        if shm_name is not None:
+            if nbytes is None:
+                # attaching must not register the block with the resource tracker,
+                # which would unlink it when this process exits
+                try:
+                    self.shm = shared_memory.SharedMemory(name=shm_name, track=False)
+                except TypeError:
+                    # before Python 3.13 it always registers
+                    self.shm = shared_memory.SharedMemory(name=shm_name)
+                    resource_tracker.unregister(self.shm._name, "shared_memory")
+            else:
+                self.shm = shared_memory.SharedMemory(name=shm_name, create=True, size=nbytes)
+            return self.shm.buf
+        if path is not None:
+            if nbytes is None:
+                self.mmap = np.memmap(path, dtype=np.uint8, mode="r+")
+            else:
+                self.mmap = np.memmap(path, dtype=np.uint8, mode="w+", shape=(nbytes,))
+            return self.mmap
+        return bytearray(nbytes)
+
+    @property
+    def written(self) -> int:
+        """Samples written per channel since the ring was created."""
+        return int(self._header[SLOT_WRITTEN])
+
+    @property
+    def size(self) -> int:
+        return min(self.written, self.capacity)
+
+    def write(self, samples):
+        """Append samples, shaped (channels, n), or (n,) for a single channel. Producer side only."""
+        samples = np.asarray(samples, dtype=self.dtype)
+        if samples.ndim == 1:
+            samples = samples[np.newaxis]
+        if samples.shape[0] != self.channels:
+            raise ValueError(f"Expected {self.channels} channels, got {samples.shape[0]}")
+        written = self.written
+        count = samples.shape[1]
+        if count > self.capacity:
+            samples = samples[:, -self.capacity:]
+            written += count - self.capacity
+            count = self.capacity
+        self._header[SLOT_RESERVED] = written + count
+        start = written % self.capacity
+        # the slot and its mirror one capacity on, split where either runs past the end
+        first = min(count, self.capacity - start)
+        self._data[:, start:start + first] = samples[:, :first]
+        self._data[:, start + self.capacity:start + self.capacity + first] = samples[:, :first]
+        if first < count:
+            rest = count - first
+            self._data[:, :rest] = samples[:, first:]
+            self._data[:, self.capacity:self.capacity + rest] = samples[:, first:]
+        # publish only once the samples are in place
+        self._header[SLOT_WRITTEN] = written + count
+
+    def window(self, count: int = None, end: int = None):
+        """View of `count` samples per channel ending at position `end`, the newest by default.
+
+        Returns (view, start) with the view shaped (channels, count). No data
+        is copied, `intact(start)` tells whether the view was overwritten.
+        """
+        written = self.written
+        end = written if end is None else min(end, written)
+        count = min(end, self.capacity) if count is None else count
+        start = end - count
+        if count < 0 or count > self.capacity or start < max(0, written - self.capacity):
+            raise ValueError("Window is no longer or not yet in the ring")
+        offset = start % self.capacity
+        return self._data[:, offset:offset + count], start
+
+    def since(self, position: int, max_count: int = None):
+        """Samples written after `position`, for a reader following the stream.
+
+        Returns (view, next_position, dropped) where `dropped` counts samples
+        overwritten before the reader got to them.
+        """
+        written = self.written
+        oldest = max(0, written - self.capacity)
+        dropped = max(0, oldest - position)
+        position = max(position, oldest)
+        end = written if max_count is None else min(written, position + max_count)
+        view, _ = self.window(end - position, end)
+        return view, end, dropped
+
+    def intact(self, start: int) -> bool:
+        """Whether the samples from position `start` on are still in the ring and not being overwritten."""
+        return start >= int(self._header[SLOT_RESERVED]) - self.capacity
+
+    def close(self):
+        # views handed out keep the memory alive, shared memory can only close once they are gone
+        self._header = None
+        self._data = None
+        if self.shm is not None:
+            try:
+                self.shm.close()
+            except BufferError:
+                pass
+        if self.mmap is not None:
+            self.mmap.flush()
+            self.mmap = None
+
+    def unlink(self):
+        """Remove the shared memory block or file, the creator calls this once everyone closed it."""
+        if self.shm is not None:
+            # a reader forked from this process shares its resource tracker and
+            # unregistered the block when it attached, register it again first
+            resource_tracker.register(self.shm._name, "shared_memory")
+            self.shm.unlink()
+
+
+def shared_ring_name(prefix: str, key: str) -> str:
+    """Shared memory name for a ring, limited to characters every platform accepts."""
+    safe = "".join(c if c.isalnum() else "_" for c in str(key))
+    return f"{prefix}_{os.getpid()}_{safe}"[:60]
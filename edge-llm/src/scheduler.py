@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from .telemetry import current_opr, job_queue_wait_seconds, job_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is rejected because a queue limit was reached."""
+
+
+class Job:
+    def __init__(self, opr: str, connection: "ConnectionJobs", coro_factory):
+        self.opr = opr
+        self.connection = connection
+        self.coro_factory = coro_factory
+        self.enqueued_at = time.monotonic()
+        self.state = "queued"
+        self.task = None
+
+
+class ConnectionJobs:
+    """Queued and running jobs that belong to a single WebSocket connection."""
+
+    def __init__(self, max_outstanding: int):
+        self.max_outstanding = max_outstanding
+        self.jobs = set()
+
+
+class JobScheduler:
+    """Runs WebSocket jobs on the event loop with a fixed number of workers per opr.
+
+    Every opr gets its own queue and worker pool. Queued jobs are bounded both
+    globally and per connection, so a busy gateway rejects new work instead of
+    growing without limit.
+    """
+
+    def __init__(self, concurrency: dict, max_queue: int, max_connection_queue: int):
+        self.concurrency = dict(concurrency)
+        self.max_queue = max_queue
+        self.max_connection_queue = max_connection_queue
+        self._queues = {}
+        self._workers = []
+        self._queued = 0
+        self._stats = {opr: self._empty_stats() for opr in self.concurrency}
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            "queued": 0,
+            "running": 0,
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "cancelled": 0,
+            "wait_count": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def start(self):
+        if self._workers:
+            return
+        for opr, workers in self.concurrency.items():
+            queue = asyncio.Queue()
+            self._queues[opr] = queue
+            for _ in range(max(1, int(workers))):
+                self._workers.append(asyncio.create_task(self._worker(opr, queue)))
+        logger.info(f"Job scheduler started with concurrency {self.concurrency}")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = {}
+
+    def connection(self) -> ConnectionJobs:
+        return ConnectionJobs(self.max_connection_queue)
+
+    def submit(self, opr: str, connection: ConnectionJobs, coro_factory) -> Job:
+        """Queue `coro_factory()` to run on a worker for `opr`.
+
+        Raises KeyError for an unknown opr and QueueFullError when either the
+        global queue or the connection's own limit is exhausted.
+        """
+        if opr not in self.concurrency:
+            raise KeyError(opr)
+        if not self._workers:
+            self.start()
+        stats = self._stats[opr]
+        if self._queued >= self.max_queue:
+            stats["rejected"] += 1
+            raise QueueFullError(f"Server is busy ({self._queued} jobs queued), please retry shortly")
+        if len(connection.jobs) >= connection.max_outstanding:
+            stats["rejected"] += 1
+            raise QueueFullError(
+                f"Too many requests in flight on this connection (limit {connection.max_outstanding})")
+
+        job = Job(opr, connection, coro_factory)
+        connection.jobs.add(job)
+        self._queued += 1
+        stats["queued"] += 1
+        stats["submitted"] += 1
+        self._queues[opr].put_nowait(job)
+        return job
+
+    def cancel_connection(self, connection: ConnectionJobs):
+        """Drop the connection's queued jobs and cancel the ones already running."""
+        for job in list(connection.jobs):
+            if job.state == "queued":
+                self._dequeue(job)
+                job.state = "cancelled"
+                self._stats[job.opr]["cancelled"] += 1
+                connection.jobs.discard(job)
+            elif job.state == "running" and job.task is not None:
+                job.task.cancel()
+
+    def metrics(self) -> dict:
+        oprs = {}
+        for opr, stats in self._stats.items():
+            oprs[opr] = {
+                "workers": self.concurrency[opr],
+                "queue_depth": stats["queued"],
+                "running": stats["running"],
+                "submitted": stats["submitted"],
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "rejected": stats["rejected"],
+                "cancelled": stats["cancelled"],
+                "wait_time_avg": stats["wait_time_total"] / stats["wait_count"] if stats["wait_count"] else 0.0,
+                "wait_time_max": stats["wait_time_max"],
+            }
+        return {
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "max_connection_queue": self.max_connection_queue,
+            "oprs": oprs,
+        }
+
+    def _dequeue(self, job: Job):
+        self._queued -= 1
+        self._stats[job.opr]["queued"] -= 1
+
+    async def _worker(self, opr: str, queue: asyncio.Queue):
+        stats = self._stats[opr]
+        # copied into every job task, so what the job measures is labelled with its opr
+        current_opr.set(opr)
+        while True:
+            job = await queue.get()
+            if job.state != "queued":
+                # cancelled while waiting, counters were already adjusted
+                continue
+            self._dequeue(job)
+            wait = time.monotonic() - job.enqueued_at
+            stats["wait_count"] += 1
+            stats["wait_time_total"] += wait
+            stats["wait_time_max"] = max(stats["wait_time_max"], wait)
+            job_queue_wait_seconds.observe(wait, opr)
+
+            job.state = "running"
+            stats["running"] += 1
+            started = time.monotonic()
+            job.task = asyncio.ensure_future(job.coro_factory())
+            try:
+                # asyncio.wait does not raise when the job itself is cancelled,
+                # only when this worker is, which keeps the two cases apart
+                await asyncio.wait({job.task})
+            finally:
+                if not job.task.done():
+                    job.task.cancel()
+                stats["running"] -= 1
+                job_duration_seconds.observe(time.monotonic() - started, opr)
+                job.state = "done"
+                job.connection.jobs.discard(job)
+
+            if job.task.cancelled():
+                stats["cancelled"] += 1
+            elif job.task.exception() is not None:
+                stats["failed"] += 1
+                logger.error(f"Job {opr} failed: {job.task.exception()}")
+            else:
+                stats["completed"] += 1
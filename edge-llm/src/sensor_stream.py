@@ -0,0 +1,242 @@
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+from . import vibration_features
+from . import knock_classifier
+from .ring_buffer import RingBuffer, shared_ring_name
+from .fleet_analysis import engine_info_from_params
+
+# length of the sliding window the stream features and alerts are computed over
+STREAM_WINDOW_SECONDS = float(os.environ.get("EDGE_LLM_STREAM_WINDOW_SECONDS", 2.0))
+# seconds of stream time before an alert may be cleared or lowered again, escalations are sent at once
+STREAM_ALERT_COOLDOWN = float(os.environ.get("EDGE_LLM_STREAM_ALERT_COOLDOWN", 10.0))
+STREAM_MAX_ENGINES = int(os.environ.get("EDGE_LLM_STREAM_MAX_ENGINES", 64))
+# queue an engine analysis of the window with every knock alert, a stream message can override it
+STREAM_ANALYZE_ON_ALERT = os.environ.get("EDGE_LLM_STREAM_ANALYZE_ON_ALERT", "0").lower() in ("1", "true", "yes")
+# keep each engine's sample window in named shared memory, other processes can attach to it by the name in /api/streams
+STREAM_SHARED_MEMORY = os.environ.get("EDGE_LLM_STREAM_SHM", "0").lower() in ("1", "true", "yes")
+# alerts kept per engine for /api/streams
+STREAM_ALERT_HISTORY = 20
+
+
+class EngineStream:
+    """Sliding-window features of one engine's sample stream.
+
+    Samples are taken in hops of the feature segment step. Each complete hop
+    adds its sum of squares and peak to a block queue, and the segment ending
+    at it goes through windowed_features, so the work per sample is the same
+    however long the stream runs. RMS and crest factor over the window come
+    from the blocks, the spectral features from the segments in the window.
+    The samples of the window are kept in a RingBuffer, readers take views of
+    it without copying.
+    """
+
+    def __init__(self, engine_id: str, params: dict, window_seconds: float = STREAM_WINDOW_SECONDS,
+                 segment_seconds: float = None, overlap: float = None, shared_memory: bool = STREAM_SHARED_MEMORY):
+        self.engine_id = engine_id
+        self.params = params
+        self.engine_info = engine_info_from_params(params)
+        self.sample_rate = float(params.get("sampling_freq", 1000))
+        self.segment_seconds = segment_seconds
+        self.overlap = overlap
+        window = max(2, int(round(window_seconds * self.sample_rate)))
+        self.nperseg, self.step = vibration_features.segment_layout(window, self.sample_rate, segment_seconds, overlap)
+        self.window = max(window, self.nperseg)
+        self.ring = RingBuffer(self.window, shm_name=shared_ring_name("edge_llm", engine_id) if shared_memory else None)
+        self._pending = np.empty(0)
+        self.block_sumsq = deque(maxlen=max(1, self.window // self.step))
+        self.block_peak = deque(maxlen=self.block_sumsq.maxlen)
+        self.segments = {name: deque(maxlen=max(1, (self.window - self.nperseg) // self.step + 1))
+                         for name in vibration_features.WINDOW_FEATURES}
+        self.samples_seen = 0
+        self.state = "none"
+        self.last_alert_time = None
+        self.alerts = deque(maxlen=STREAM_ALERT_HISTORY)
+        self.alert_count = 0
+        self.last_features = None
+        self.updated_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def stream_time(self) -> float:
+        return self.samples_seen / self.sample_rate
+
+    @property
+    def ready(self) -> bool:
+        """Whether a full window of segments has been seen."""
+        first = self.segments[vibration_features.WINDOW_FEATURES[0]]
+        return len(first) == first.maxlen
+
+    def ingest(self, samples) -> list:
+        """Add samples and return the alerts they raised."""
+        with self.lock:
+            samples = np.asarray(samples, dtype=np.float64).ravel()
+            data = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+            hops = len(data) // self.step
+            self._pending = data[hops * self.step:].copy()
+            self.updated_at = time.time()
+            if not hops:
+                return []
+            blocks = data[:hops * self.step]
+
+            by_block = blocks.reshape(hops, self.step)
+            self.block_sumsq.extend(np.einsum("ij,ij->i", by_block, by_block).tolist())
+            self.block_peak.extend(np.abs(by_block).max(axis=1).tolist())
+
+            # segments ending at each new hop, the overlap comes from the ring
+            history, _ = self.ring.window(min(self.ring.size, self.nperseg - self.step))
+            segment_input = np.concatenate([history[0], blocks])
+            self.ring.write(blocks)
+            self.samples_seen += len(blocks)
+            if len(segment_input) >= self.nperseg:
+                windowed = vibration_features.windowed_features(
+                    segment_input, self.sample_rate, self.engine_info["firing_frequency"],
+                    self.segment_seconds, self.overlap)
+                for name in vibration_features.WINDOW_FEATURES:
+                    self.segments[name].extend(windowed[name].tolist())
+
+            if not self.ready:
+                return []
+            self.last_features = self.features()
+            return self._update_alert(knock_classifier.classify_knock(self.last_features))
+
+    def latest(self, seconds: float = None):
+        """View of the newest samples of the window, `seconds` long or all of them, and its start position."""
+        count = self.ring.size if seconds is None else min(self.ring.size, int(round(seconds * self.sample_rate)))
+        view, start = self.ring.window(count)
+        return view[0], start
+
+    def close(self):
+        self.ring.close()
+        self.ring.unlink()
+
+    def features(self) -> dict:
+        """Features of the current window in the layout of process_vibration_data, without the spectrum peaks."""
+        power = sum(self.block_sumsq) / (len(self.block_sumsq) * self.step)
+        rms = float(np.sqrt(power))
+        peak = float(max(self.block_peak))
+        count = len(self.segments[vibration_features.WINDOW_FEATURES[0]])
+        windowed = {name: np.array(values) for name, values in self.segments.items()}
+        # the newest segment ends at the current stream time
+        last_start = self.stream_time - self.nperseg / self.sample_rate
+        windowed["window_start"] = last_start - np.arange(count)[::-1] * self.step / self.sample_rate
+        windowed["segment_seconds"] = self.nperseg / self.sample_rate
+        windowed["overlap"] = 1 - self.step / self.nperseg
+        return {
+            "rms_amplitude": rms,
+            "crest_factor": peak / rms if rms > 0 else 0.0,
+            "max_amplitude": peak,
+            "windows": vibration_features.summarize_windows(windowed),
+        }
+
+    def _update_alert(self, verdict: dict) -> list:
+        # the classifier's ambiguous zone is the dead band, the state only moves on clear verdicts
+        if verdict["ambiguous"] or verdict["severity"] == self.state:
+            return []
+        severities = knock_classifier.SEVERITIES
+        rising = severities.index(verdict["severity"]) > severities.index(self.state)
+        if not rising and self.last_alert_time is not None and \
+                self.stream_time - self.last_alert_time < STREAM_ALERT_COOLDOWN:
+            return []
+        if self.state == "none":
+            kind = "knock"
+        elif verdict["severity"] == "none":
+            kind = "cleared"
+        else:
+            kind = "escalated" if rising else "lowered"
+        self.alert_count += 1
+        alert = {
+            "engine_id": self.engine_id,
+            "sequence": self.alert_count,
+            "type": kind,
+            "severity": verdict["severity"],
+            "previous": self.state,
+            "confidence": verdict["confidence"],
+            "reasons": verdict["reasons"],
+            "crest_factor": self.last_features["crest_factor"],
+            "rms_amplitude": self.last_features["rms_amplitude"],
+            "knock_band_excess": verdict["knock_band_excess"],
+            "stream_time": self.stream_time,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.state = verdict["severity"]
+        self.last_alert_time = self.stream_time
+        self.alerts.append(alert)
+        return [alert]
+
+    def status(self) -> dict:
+        features = self.last_features or {}
+        windows = features.get("windows") or {}
+        return {
+            "engine_id": self.engine_id,
+            "params": self.params,
+            "samples_seen": self.samples_seen,
+            "stream_time": self.stream_time,
+            "window_seconds": self.window / self.sample_rate,
+            "shared_memory": self.ring.shm.name if self.ring.shm is not None else None,
+            "ready": self.ready,
+            "state": self.state,
+            "rms_amplitude": features.get("rms_amplitude"),
+            "crest_factor": features.get("crest_factor"),
+            "knock_band_excess_p90": windows.get("knock_band_excess", {}).get("p90"),
+            "alerts": list(self.alerts),
+            "updated_at": self.updated_at,
+        }
+
+
+class StreamRegistry:
+    """Streams by engine id, a stream restarts when its sample rate or engine changes."""
+
+    def __init__(self, max_engines: int = STREAM_MAX_ENGINES):
+        self.max_engines = max_engines
+        self.streams = {}
+        self._lock = threading.Lock()
+
+    def stream(self, engine_id: str, params: dict = None) -> EngineStream:
+        engine_id = str(engine_id)
+        with self._lock:
+            stream = self.streams.get(engine_id)
+            if stream is not None and (params is None or _same_engine(stream.params, params)):
+                return stream
+            if params is None:
+                raise ValueError(f"params are needed to start the stream of engine {engine_id}")
+            if stream is None and len(self.streams) >= self.max_engines:
+                raise ValueError(f"At most {self.max_engines} engines can stream at once")
+            if stream is not None:
+                stream.close()
+            stream = EngineStream(engine_id, params)
+            self.streams[engine_id] = stream
+            return stream
+
+    def ingest(self, engine_id: str, params: dict, samples) -> tuple:
+        """Feed samples to an engine's stream, returns the stream and the alerts raised."""
+        stream = self.stream(engine_id, params)
+        return stream, stream.ingest(samples)
+
+    def remove(self, engine_id: str):
+        with self._lock:
+            stream = self.streams.pop(str(engine_id), None)
+        if stream is not None:
+            stream.close()
+
+    def close(self):
+        """Release the rings of every stream, their shared memory included."""
+        with self._lock:
+            streams, self.streams = list(self.streams.values()), {}
+        for stream in streams:
+            stream.close()
+
+    def status(self) -> dict:
+        with self._lock:
+            streams = list(self.streams.values())
+        return {"max_engines": self.max_engines, "engines": [stream.status() for stream in streams]}
+
+
+def _same_engine(current: dict, params: dict) -> bool:
+    return all(current.get(key) == params[key] for key in ("sampling_freq", "rpm", "num_cylinders", "engine_type")
+               if key in params)
+
+
+sensor_streams = StreamRegistry()
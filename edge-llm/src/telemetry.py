@@ -0,0 +1,256 @@
+import os
+import time
+import bisect
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+
+# record latency histograms, 0 turns every observation into a no-op
+METRICS_ENABLED = os.environ.get("EDGE_LLM_METRICS", "1").lower() in ("1", "true", "yes")
+# upper bounds in seconds of the latency histogram buckets, +Inf is implied
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# event loop lag is expected to stay in the low milliseconds
+LAG_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+# generation speed of a small model on an edge device
+RATE_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200)
+
+# opr of the WebSocket job the running task works for, requests outside a job are labelled http
+current_opr = contextvars.ContextVar("edge_llm_opr", default="http")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class Histogram:
+    """Bucketed observations per label set, exposed in the Prometheus histogram layout.
+
+    observe() is a bisect and three additions under a lock, so it is cheap
+    enough for every request and can be called from threads. Bucket counts
+    are kept per bucket and summed into cumulative counts only on export.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(float(bound) for bound in buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # bucket counts with +Inf last, then the sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the seconds the block takes, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def snapshot(self) -> dict:
+        """Count, sum and cumulative bucket counts of every label set."""
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        result = {}
+        for labels, values in series.items():
+            cumulative = []
+            total = 0
+            for count in values[:-1]:
+                total += count
+                cumulative.append(total)
+            result[labels] = {"count": total, "sum": values[-1], "buckets": cumulative}
+        return result
+
+    def exposition(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, series in sorted(self.snapshot().items()):
+            for bound, count in zip(bounds, series["buckets"]):
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_number(series['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {series['count']}")
+        return lines
+
+
+class AllocationPeak:
+    """Peak bytes allocated while a block runs, from tracemalloc, in `bytes` afterwards.
+
+    Meant for one step of a request, such as parsing its samples. tracemalloc
+    only runs while at least one block is open, since it slows down every
+    allocation. It counts the Python and numpy allocators, not pyarrow's
+    memory pool. The peak is process wide and best effort: allocations of
+    other threads during the block count too, and blocks that overlap share
+    one peak that each of them would reset, so every block that overlapped
+    another leaves `bytes` at None rather than report a wrong figure.
+    `bytes` also stays None with EDGE_LLM_METRICS=0.
+    """
+
+    # blocks open right now, entering while any is open marks them all as overlapped
+    _open = set()
+    # tracing started by a block, not by -X tracemalloc, is stopped when the last block closes
+    _started = False
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.bytes = None
+        self._start = 0
+        self._overlapped = False
+
+    @staticmethod
+    def run(fn, *args):
+        """Call fn(*args) in a block, returns its result and the peak bytes, for asyncio.to_thread."""
+        with AllocationPeak() as peak:
+            result = fn(*args)
+        return result, peak.bytes
+
+    def __enter__(self):
+        if METRICS_ENABLED:
+            with AllocationPeak._lock:
+                if not AllocationPeak._open and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    AllocationPeak._started = True
+                if AllocationPeak._open:
+                    self._overlapped = True
+                    for block in AllocationPeak._open:
+                        block._overlapped = True
+                else:
+                    tracemalloc.reset_peak()
+                    self._start = tracemalloc.get_traced_memory()[0]
+                AllocationPeak._open.add(self)
+        return self
+
+    def __exit__(self, *exc):
+        if METRICS_ENABLED:
+            with AllocationPeak._lock:
+                if not self._overlapped:
+                    self.bytes = max(tracemalloc.get_traced_memory()[1] - self._start, 0)
+                AllocationPeak._open.discard(self)
+                if not AllocationPeak._open and AllocationPeak._started:
+                    tracemalloc.stop()
+                    AllocationPeak._started = False
+        return False
+
+
+class Gauge:
+    """A value read when the metrics are exported, `collect` returns {label values: value}."""
+
+    def __init__(self, name: str, help: str, labels: tuple, collect):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+
+    def exposition(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    """The histograms and gauges served on /metrics."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, labels: tuple, collect) -> Gauge:
+        self.metrics[name] = Gauge(name, help, labels, collect)
+        return self.metrics[name]
+
+    def exposition(self) -> str:
+        """Every metric in the Prometheus text format, version 0.0.4."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.exposition())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request from its start to the last byte of the response.
+
+    Requests are labelled by the path of the route that handled them, so
+    path parameters do not create a series each, with `other` for requests
+    no route matched, such as static files.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            # routing fills in the matched route on the scope it was given
+            route = getattr(scope.get("route"), "path", None)
+            handler = scope.get("root_path", "") + route if route is not None else "other"
+            http_request_seconds.observe(time.perf_counter() - start, handler, scope["method"], str(status))
+
+
+registry = Registry()
+
+time_to_first_token = registry.histogram(
+    "edge_llm_time_to_first_token_seconds", "Seconds from sending a request to Ollama to its first token",
+    ("opr", "model"))
+tokens_per_second = registry.histogram(
+    "edge_llm_tokens_per_second", "Generation speed of a model answer as reported by Ollama",
+    ("opr", "model"), RATE_BUCKETS)
+model_request_seconds = registry.histogram(
+    "edge_llm_model_request_seconds", "Seconds from sending a request to Ollama to its last token", ("opr", "model"))
+job_queue_wait_seconds = registry.histogram(
+    "edge_llm_job_queue_wait_seconds", "Seconds a WebSocket job waited for a worker", ("opr",))
+job_duration_seconds = registry.histogram(
+    "edge_llm_job_duration_seconds", "Seconds a WebSocket job ran", ("opr",))
+feature_extraction_seconds = registry.histogram(
+    "edge_llm_feature_extraction_seconds", "Seconds to extract the windowed features of a trace or fleet", ("opr",))
+trace_generation_seconds = registry.histogram(
+    "edge_llm_trace_generation_seconds", "Seconds to generate a vibration trace that was not cached")
+plot_render_seconds = registry.histogram(
+    "edge_llm_plot_render_seconds", "Seconds to render a vibration plot that was not cached")
+db_seconds = registry.histogram(
+    "edge_llm_db_seconds", "Seconds a database operation took, waiting for the connection lock included",
+    ("operation",))
+http_request_seconds = registry.histogram(
+    "edge_llm_http_request_seconds", "Seconds from the start of an HTTP request to the end of its response",
+    ("handler", "method", "status"))
+event_loop_lag_seconds = registry.histogram(
+    "edge_llm_event_loop_lag_seconds", "How late the event loop woke up from a short sleep", (), LAG_BUCKETS)
@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# streamed model text waits at most this many milliseconds before it is sent, 0 sends every token
+TOKEN_FLUSH_MS = float(os.environ.get("EDGE_LLM_TOKEN_FLUSH_MS", 30))
+# pending text is sent at once when it reaches this many characters
+TOKEN_FLUSH_BYTES = int(os.environ.get("EDGE_LLM_TOKEN_FLUSH_BYTES", 256))
+
+
+class TokenStreamStats:
+    """Frame and byte counters over every token stream since startup."""
+
+    def __init__(self):
+        self.streams = 0
+        self.active = 0
+        self.tokens = 0
+        self.frames = 0
+        self.bytes = 0
+        self.per_token_bytes = 0
+
+    def metrics(self) -> dict:
+        return {
+            "flush_ms": TOKEN_FLUSH_MS,
+            "flush_bytes": TOKEN_FLUSH_BYTES,
+            "streams": self.streams,
+            "active": self.active,
+            "tokens": self.tokens,
+            "frames": self.frames,
+            "bytes": self.bytes,
+            # what one delta frame per token would have sent
+            "per_token_frames": self.tokens,
+            "per_token_bytes": self.per_token_bytes,
+            "frames_per_token": self.frames / self.tokens if self.tokens else 0.0,
+        }
+
+
+class TokenStream:
+    """Sends the text a model streams to a WebSocket in coalesced delta frames.
+
+    Tokens collect until TOKEN_FLUSH_BYTES of text are pending or the oldest
+    has waited TOKEN_FLUSH_MS, then go out as one frame whose `part` holds
+    only the new text, with `fields` (id, status) alongside. A timer flushes
+    text the model stalls on. Other frames of the job go through send(), so
+    they stay in order behind the text. The counters compare the frames and
+    bytes sent with one frame per token.
+    """
+
+    def __init__(self, websocket, fields: dict, flush_ms: float = TOKEN_FLUSH_MS,
+                 flush_bytes: int = TOKEN_FLUSH_BYTES):
+        self.websocket = websocket
+        self.fields = fields
+        self.flush_interval = flush_ms / 1000
+        self.flush_bytes = flush_bytes
+        self.pending = []
+        self.pending_size = 0
+        self.started_at = time.monotonic()
+        self.tokens = 0
+        self.frames = 0
+        self.bytes = 0
+        self.per_token_bytes = 0
+        # a frame per token would repeat the fields every time
+        self._frame_overhead = len(json.dumps({**fields, "part": ""}))
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._timer_task = None
+        self._closed = False
+        token_streams.streams += 1
+        token_streams.active += 1
+
+    async def write(self, text: str):
+        """Queue the next piece of model text."""
+        if not text:
+            return
+        self.tokens += 1
+        token_streams.tokens += 1
+        # about the size of a frame of its own, ignoring JSON escapes
+        self.per_token_bytes += self._frame_overhead + len(text)
+        token_streams.per_token_bytes += self._frame_overhead + len(text)
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.flush_bytes or self.flush_interval <= 0:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._timer_task = asyncio.ensure_future(self._flush_on_timer())
+
+    async def _flush_on_timer(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            # the next write or send runs into the same error and reports it
+            logger.debug(f"Token stream flush failed: {e}")
+
+    async def flush(self):
+        """Send the pending text as one frame."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if self.pending:
+                text = "".join(self.pending)
+                self.pending = []
+                self.pending_size = 0
+                await self._send({**self.fields, "part": text})
+
+    async def send(self, message: dict):
+        """Send a frame of its own, after the text written before it."""
+        await self.flush()
+        async with self._lock:
+            await self._send(message)
+
+    async def _send(self, message: dict):
+        frame = json.dumps(message)
+        await self.websocket.send_text(frame)
+        self.frames += 1
+        self.bytes += len(frame)
+        token_streams.frames += 1
+        token_streams.bytes += len(frame)
+
+    def close(self):
+        """Stop the flush timer, text still pending is dropped."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._closed:
+            self._closed = True
+            token_streams.active -= 1
+
+    def metrics(self) -> dict:
+        duration = time.monotonic() - self.started_at
+        return {
+            "tokens": self.tokens,
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "per_token_frames": self.tokens,
+            "per_token_bytes": self.per_token_bytes,
+            "frames_per_second": self.frames / duration if duration > 0 else 0.0,
+            "duration": duration,
+        }
+
+
+token_streams = TokenStreamStats()
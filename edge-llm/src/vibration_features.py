@@ -0,0 +1,270 @@
+import os
+import warnings
+import numpy as np
+
+# length and overlap of the analysis windows, per-window features are computed on each
+FEATURE_SEGMENT_SECONDS = float(os.environ.get("EDGE_LLM_FEATURE_SEGMENT_SECONDS", 0.5))
+FEATURE_OVERLAP = float(os.environ.get("EDGE_LLM_FEATURE_OVERLAP", 0.5))
+# windows transformed per batch, bounds the working memory to this many segments
+FEATURE_BATCH_WINDOWS = 256
+KNOCK_BAND = (400.0, 800.0)
+# bins below this are left out of the reference band, they hold the offset and load modulation
+REFERENCE_LOW_CUTOFF = 20.0
+# half width of a harmonic line in frequency bins, the Hann main lobe is two bins wide each side
+HARMONIC_BINS = 2
+# harmonics of the firing frequency that are masked at least, the firing impulses reach the 8th
+HARMONIC_ORDERS = 16
+# rows of the per-window timeline included in the LLM prompt
+TIMELINE_ROWS = 8
+
+WINDOW_FEATURES = ("rms", "crest_factor", "knock_band_ratio", "knock_nonharmonic_ratio", "harmonic_ratio",
+                   "knock_band_excess")
+
+
+def segment_layout(num_samples: int, sample_rate: float, segment_seconds: float = None, overlap: float = None):
+    """Samples per segment and hop between segments for a trace of `num_samples`."""
+    segment_seconds = FEATURE_SEGMENT_SECONDS if segment_seconds is None else float(segment_seconds)
+    overlap = FEATURE_OVERLAP if overlap is None else float(overlap)
+    if segment_seconds <= 0:
+        raise ValueError("segment_seconds must be positive")
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    nperseg = max(2, min(num_samples, int(round(segment_seconds * sample_rate))))
+    step = max(1, int(round(nperseg * (1 - overlap))))
+    return nperseg, step
+
+
+def band_masks(freqs, sample_rate: float, firing_freq: float = None, knock_band=KNOCK_BAND):
+    """Boolean masks of the knock band and of the bins around each firing frequency harmonic.
+
+    Harmonics above the Nyquist frequency are folded back to where they alias,
+    an undersampled trace shows them there.
+    """
+    knock = (freqs >= knock_band[0]) & (freqs <= knock_band[1])
+    harmonic = np.zeros(len(freqs), dtype=bool)
+    if firing_freq and firing_freq > 0 and len(freqs) > 1:
+        resolution = freqs[1] - freqs[0]
+        nyquist = sample_rate / 2
+        orders = np.arange(1, max(int(nyquist // firing_freq), HARMONIC_ORDERS) + 1)
+        folded = np.abs((orders * firing_freq + nyquist) % sample_rate - nyquist)
+        centers = np.rint(folded / resolution).astype(int)
+        for offset in range(-HARMONIC_BINS, HARMONIC_BINS + 1):
+            bins = centers + offset
+            harmonic[bins[(bins > 0) & (bins < len(freqs))]] = True
+    return knock, harmonic
+
+
+def windowed_features(vibration, sample_rate: float, firing_freq: float = None,
+                      segment_seconds: float = None, overlap: float = None):
+    """Per-window features and the Welch average spectrum of a trace.
+
+    Segments are strided views on `vibration` and are transformed
+    FEATURE_BATCH_WINDOWS at a time, so memory stays bounded by the batch
+    rather than the trace length. Spectra use the |rfft| / nperseg scaling of
+    a Hann-windowed transform, so a tone has the same magnitude whatever the
+    segment length. Returns a dict of arrays, one value per window, plus
+    `freqs` and `magnitude` of the averaged spectrum.
+    """
+    vibration = np.asarray(vibration, dtype=np.float64)
+    return windowed_features_batch(vibration[np.newaxis], sample_rate, [firing_freq],
+                                   segment_seconds, overlap)[0]
+
+
+def windowed_features_batch(traces, sample_rate: float, firing_freqs=None,
+                            segment_seconds: float = None, overlap: float = None) -> list:
+    """windowed_features of equal-length traces, one per row of a 2-D array.
+
+    The windows of several traces go through one rfft call, up to
+    FEATURE_BATCH_WINDOWS at a time, and the band masks of each trace's
+    firing frequency are applied as a matrix product. Returns one dict per
+    trace, as windowed_features does.
+    """
+    traces = np.asarray(traces, dtype=np.float64)
+    if traces.ndim != 2:
+        raise ValueError("traces must be a 2-D array, one trace per row")
+    num_traces, num_samples = traces.shape
+    if num_samples < 2:
+        raise ValueError("At least two vibration samples are needed")
+    if firing_freqs is None:
+        firing_freqs = [None] * num_traces
+    nperseg, step = segment_layout(num_samples, sample_rate, segment_seconds, overlap)
+    windows = np.lib.stride_tricks.sliding_window_view(traces, nperseg, axis=1)[:, ::step]
+    count = windows.shape[1]
+
+    freqs = np.fft.rfftfreq(nperseg, 1 / sample_rate)
+    masks = {}
+    for firing_freq in set(firing_freqs):
+        masks[firing_freq] = band_masks(freqs, sample_rate, firing_freq)
+    knock_mask = masks[firing_freqs[0]][0]
+    harmonic_mask = np.array([masks[firing_freq][1] for firing_freq in firing_freqs])
+    knock_nonharmonic_mask = knock_mask & ~harmonic_mask
+    # non-harmonic bins outside the knock band, broadband noise shows up here as much as in the band
+    reference_mask = ~knock_mask & ~harmonic_mask & (freqs >= REFERENCE_LOW_CUTOFF)
+    # masks as float columns, so the band sums of a batch are one matrix product per trace
+    harmonic_weights = harmonic_mask[:, :, np.newaxis].astype(np.float64)
+    nonharmonic_weights = knock_nonharmonic_mask[:, :, np.newaxis].astype(np.float64)
+    reference_weights = reference_mask[:, :, np.newaxis].astype(np.float64)
+    nonharmonic_bins = knock_nonharmonic_mask.sum(axis=1)
+    reference_bins = reference_mask.sum(axis=1)
+    # scipy.signal takes about a second to import, the server loads it on first use or in the warm-up
+    from scipy import signal
+    taper = signal.get_window("hann", nperseg)
+
+    features = {name: np.empty((num_traces, count)) for name in WINDOW_FEATURES}
+    power_sum = np.zeros((num_traces, len(freqs)))
+    traces_per_batch = max(1, FEATURE_BATCH_WINDOWS // count)
+    for first in range(0, num_traces, traces_per_batch):
+        rows = slice(first, min(first + traces_per_batch, num_traces))
+        for start in range(0, count, FEATURE_BATCH_WINDOWS):
+            part = slice(start, min(start + FEATURE_BATCH_WINDOWS, count))
+            batch = windows[rows, part]
+            shape = batch.shape[:2]
+            batch = batch.reshape(-1, nperseg)
+
+            rms = np.sqrt(np.einsum("ij,ij->i", batch, batch) / nperseg)
+            peak = np.abs(batch).max(axis=1)
+            features["rms"][rows, part] = rms.reshape(shape)
+            features["crest_factor"][rows, part] = np.divide(
+                peak, rms, out=np.zeros_like(rms), where=rms > 0).reshape(shape)
+
+            spectrum = np.fft.rfft(batch * taper, axis=1)
+            power = ((spectrum.real ** 2 + spectrum.imag ** 2) / nperseg ** 2).reshape(*shape, len(freqs))
+            power_sum[rows] += power.sum(axis=1)
+
+            # ratios leave out the DC bin, it only reflects the offset of the window
+            total = power[:, :, 1:].sum(axis=2)
+            total[total == 0] = np.inf
+            harmonic = np.matmul(power, harmonic_weights[rows])[:, :, 0]
+            nonharmonic = np.matmul(power, nonharmonic_weights[rows])[:, :, 0]
+            features["knock_band_ratio"][rows, part] = power[:, :, knock_mask].sum(axis=2) / total
+            features["knock_nonharmonic_ratio"][rows, part] = nonharmonic / total
+            features["harmonic_ratio"][rows, part] = harmonic / total
+
+            # power per bin of the non-harmonic knock band over that of the reference bins,
+            # about 1 for white noise and well above for resonant knock
+            reference = np.matmul(power, reference_weights[rows])[:, :, 0]
+            in_band_bins = nonharmonic_bins[rows, np.newaxis]
+            ref_bins = reference_bins[rows, np.newaxis]
+            # NaN when the sample rate leaves no bins in the band or the reference, the band is not observed
+            observable = (in_band_bins > 0) & (ref_bins > 0)
+            usable = observable & (reference > 0)
+            features["knock_band_excess"][rows, part] = np.divide(
+                nonharmonic * ref_bins, reference * in_band_bins,
+                out=np.broadcast_to(np.where(observable, 0.0, np.nan), nonharmonic.shape).copy(), where=usable)
+
+    window_start = np.arange(count) * step / sample_rate
+    magnitude = np.sqrt(power_sum / max(count, 1))
+    results = []
+    for i in range(num_traces):
+        result = {name: features[name][i] for name in WINDOW_FEATURES}
+        result["window_start"] = window_start
+        result["segment_seconds"] = nperseg / sample_rate
+        result["overlap"] = 1 - step / nperseg
+        result["freqs"] = freqs
+        result["magnitude"] = magnitude[i]
+        results.append(result)
+    return results
+
+
+def trace_features(vibration, windowed: dict, windows: dict = None) -> dict:
+    """Whole-trace features for the analysis prompt, from the trace and its windowed_features.
+
+    `windows` is the summarize_windows output when it was already computed.
+    """
+    from scipy import signal
+    vibration = np.asarray(vibration, dtype=np.float64)
+    fft_freq = windowed["freqs"]
+    fft_magnitude = windowed["magnitude"]
+    
+    # Find peaks in frequency domain
+    peaks, _ = signal.find_peaks(fft_magnitude, height=0.05)
+    peak_freqs = fft_freq[peaks]
+    peak_magnitudes = fft_magnitude[peaks]
+    
+    # Calculate some key features
+    rms = np.sqrt(np.mean(np.square(vibration)))
+    max_amplitude = np.max(np.abs(vibration))
+    crest_factor = max_amplitude / rms
+    
+    # Find the dominant frequencies
+    sorted_indices = np.argsort(peak_magnitudes)[::-1]
+    dominant_freqs = peak_freqs[sorted_indices[:5]]
+    dominant_mags = peak_magnitudes[sorted_indices[:5]]
+    
+    return {
+        "rms_amplitude": float(rms),
+        "crest_factor": float(crest_factor),
+        "dominant_frequencies": [float(f) for f in dominant_freqs],
+        "dominant_magnitudes": [float(m) for m in dominant_mags],
+        "total_energy": float(np.sum(fft_magnitude * fft_magnitude)),
+        "max_amplitude": float(max_amplitude),
+        # per-window statistics and timeline
+        "windows": summarize_windows(windowed) if windows is None else windows
+    }
+
+
+def analyze_trace(vibration, sample_rate: float, firing_freq: float = None,
+                  segment_seconds: float = None, overlap: float = None):
+    """trace_features of a trace and its averaged spectrum as (freqs, magnitude), in one call for a worker process."""
+    # Welch average over Hann-windowed segments, tones keep the magnitude of a full-length FFT
+    windowed = windowed_features(vibration, sample_rate, firing_freq, segment_seconds, overlap)
+    return trace_features(vibration, windowed), (windowed["freqs"], windowed["magnitude"])
+
+
+def summarize_windows(windowed: dict, rows: int = TIMELINE_ROWS) -> dict:
+    """Condense per-window features into statistics and a short timeline for the prompt."""
+    return summarize_windows_batch([windowed], rows)[0]
+
+
+def summarize_windows_batch(windowed: list, rows: int = TIMELINE_ROWS) -> list:
+    """summarize_windows of traces with the same window layout, each statistic computed for all at once."""
+    first = windowed[0]
+    count = len(first["window_start"])
+    summaries = [{
+        "count": count,
+        "segment_seconds": float(first["segment_seconds"]),
+        "overlap": float(first["overlap"]),
+    } for _ in windowed]
+    if count == 0:
+        for summary in summaries:
+            summary["timeline"] = []
+        return summaries
+
+    # mean of each feature over consecutive groups of windows
+    groups = np.array_split(np.arange(count), min(rows, count))
+    bounds = np.array([group[0] for group in groups])
+    sizes = np.array([len(group) for group in groups])
+    timelines = [[{"start": float(first["window_start"][start])} for start in bounds] for _ in windowed]
+    for name in WINDOW_FEATURES:
+        values = np.stack([trace[name] for trace in windowed])
+        if np.isnan(values).any():
+            stats, group_means = _nan_statistics(values, bounds)
+        else:
+            stats = zip(values.mean(axis=1).tolist(), values.min(axis=1).tolist(), values.max(axis=1).tolist(),
+                        np.percentile(values, 90, axis=1).tolist())
+            group_means = (np.add.reduceat(values, bounds, axis=1) / sizes).tolist()
+        for summary, timeline, (mean, low, high, p90), means in zip(summaries, timelines, stats, group_means):
+            summary[name] = {"mean": mean, "min": low, "max": high, "p90": p90}
+            for row, value in zip(timeline, means):
+                row[name] = value
+    for summary, timeline in zip(summaries, timelines):
+        summary["timeline"] = timeline
+    return summaries
+
+
+def _nan_statistics(values, bounds) -> tuple:
+    """The statistics of summarize_windows_batch over the windows that are not NaN, None where none are."""
+    finite = ~np.isnan(values)
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        # all-NaN rows are expected, they become None
+        warnings.simplefilter("ignore", RuntimeWarning)
+        stats = [np.nanmean(values, axis=1), np.nanmin(values, axis=1), np.nanmax(values, axis=1),
+                 np.nanpercentile(values, 90, axis=1)]
+        group_means = (np.add.reduceat(np.where(finite, values, 0.0), bounds, axis=1)
+                       / np.add.reduceat(finite, bounds, axis=1))
+    return (zip(*(_none_for_nan(stat) for stat in stats)),
+            [_none_for_nan(means) for means in group_means])
+
+
+def _none_for_nan(values) -> list:
+    return [None if value != value else value for value in values.tolist()]
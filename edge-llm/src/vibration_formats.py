@@ -0,0 +1,153 @@
+import json
+import struct
+import numpy as np
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# response formats of /api/engine-vibration, "records" is the original list of dicts
+FORMATS = ("records", "columnar", "binary", "arrow")
+STREAM_FORMATS = ("ndjson", "binary")
+ACCEPT_FORMATS = {
+    BINARY_MEDIA_TYPE: "binary",
+    ARROW_MEDIA_TYPE: "arrow",
+    NDJSON_MEDIA_TYPE: "ndjson",
+}
+DTYPES = {"float32": "<f4", "float64": "<f8"}
+
+
+def negotiate_format(output_format, accept: str, stream: bool = False):
+    """Pick the response format from the `format` query parameter or the Accept header."""
+    if output_format:
+        return output_format
+    for media_type in (accept or "").split(","):
+        found = ACCEPT_FORMATS.get(media_type.split(";")[0].strip())
+        if found and (found in STREAM_FORMATS if stream else found in FORMATS):
+            return found
+    return STREAM_FORMATS[0] if stream else FORMATS[0]
+
+
+def time_axis(params: dict) -> dict:
+    """Describe the sample times so clients can rebuild them when `time` is left out.
+
+    time[i] = i * time_step, the last sample falls exactly on total_time.
+    """
+    num_samples = int(params["total_time"] * params["sampling_freq"])
+    time_step = params["total_time"] / (num_samples - 1) if num_samples > 1 else 0.0
+    return {"num_samples": num_samples, "time_step": time_step}
+
+
+def pack_frame(payload: bytes) -> bytes:
+    """Prefix `payload` with its length as a little-endian uint32."""
+    return struct.pack("<I", len(payload)) + payload
+
+
+def records_json(params: dict, time, vibration, plot: str = None) -> bytes:
+    """Encode a trace as {"data": [{"time": ..., "vibration": ...}, ...], "params": ...}."""
+    body = {
+        "data": [{"time": t, "vibration": v} for t, v in zip(time.tolist(), vibration.tolist())],
+        "params": params,
+    }
+    if plot is not None:
+        body["plot"] = plot
+    return json.dumps(body).encode("utf-8")
+
+
+def columnar_json(params: dict, time, vibration, include_time: bool = True) -> bytes:
+    """Encode a trace as {"params": ..., "time": [...], "vibration": [...]}."""
+    body = {"params": params, **time_axis(params)}
+    if include_time:
+        body["time"] = time.tolist()
+    body["vibration"] = vibration.tolist()
+    return json.dumps(body).encode("utf-8")
+
+
+def ndjson_stream(params: dict, chunks, include_time: bool = True):
+    """Encode a chunked trace as NDJSON.
+
+    The first line is {"params": ...}, every following line holds one chunk
+    as {"time": [...], "vibration": [...]}.
+    """
+    yield json.dumps({"params": params, **time_axis(params)}) + "\n"
+    for time, vibration in chunks:
+        line = {"time": time.tolist()} if include_time else {}
+        line["vibration"] = vibration.tolist()
+        yield json.dumps(line) + "\n"
+
+
+def binary_stream(params: dict, chunks, dtype: str = "<f8", include_time: bool = True):
+    """Encode a chunked trace as length-prefixed binary frames.
+
+    The first frame is a UTF-8 JSON header with the params, dtype and column
+    order. Every following frame holds one chunk: all values of the first
+    column, then all values of the second. A one-shot response is the same
+    with a single chunk.
+    """
+    columns = ["time", "vibration"] if include_time else ["vibration"]
+    header = {"params": params, "dtype": dtype, "columns": columns, **time_axis(params)}
+    yield pack_frame(json.dumps(header).encode("utf-8"))
+    for time, vibration in chunks:
+        payload = vibration.astype(dtype).tobytes()
+        if include_time:
+            payload = time.astype(dtype).tobytes() + payload
+        yield pack_frame(payload)
+
+
+def arrow_ipc(params: dict, time, vibration, dtype: str = "<f8", include_time: bool = True) -> bytes:
+    """Encode a trace as an Arrow IPC stream with the params in the schema metadata.
+
+    pyarrow is optional, an ImportError is raised when it is not installed.
+    """
+    import pyarrow as pa
+
+    columns = {"time": time.astype(dtype)} if include_time else {}
+    columns["vibration"] = vibration.astype(dtype)
+    table = pa.table(columns, metadata={"params": json.dumps(params), **{
+        key: str(value) for key, value in time_axis(params).items()}})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def unpack_frames(data: bytes) -> list:
+    """Split length-prefixed frames into memoryviews of `data`, without copying."""
+    view = memoryview(data)
+    frames = []
+    pos = 0
+    while pos < len(view):
+        if pos + 4 > len(view):
+            raise ValueError("Truncated binary frame header")
+        (length,) = struct.unpack_from("<I", view, pos)
+        pos += 4
+        if pos + length > len(view):
+            raise ValueError("Truncated binary frame")
+        frames.append(view[pos:pos + length])
+        pos += length
+    return frames
+
+
+def decode_binary_message(data: bytes):
+    """Decode frames laid out like binary_stream into the header and one array per column.
+
+    The header is any JSON object with `dtype` and `columns` added, so a
+    WebSocket message can carry its opr and parameters next to the samples.
+    A single data frame is decoded with np.frombuffer as views on `data`.
+    """
+    frames = unpack_frames(data)
+    if not frames:
+        raise ValueError("Empty binary message")
+    header = json.loads(bytes(frames[0]))
+    if not isinstance(header, dict):
+        raise ValueError("Binary message header must be a JSON object")
+    dtype = header.get("dtype", DTYPES["float64"])
+    if dtype not in DTYPES.values():
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    columns = header.get("columns", ["time", "vibration"])
+    chunks = [np.frombuffer(frame, dtype=dtype).reshape(len(columns), -1) for frame in frames[1:]]
+    if not chunks:
+        raise ValueError("Binary message has no data frames")
+    values = chunks[0] if len(chunks) == 1 else np.concatenate(chunks, axis=1)
+    return header, dict(zip(columns, values))
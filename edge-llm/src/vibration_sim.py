@@ -0,0 +1,478 @@
+import numpy as np
+
+# knock events handled per vectorized block in add_knock_bursts
+KNOCK_EVENT_BLOCK = 4096
+# samples per chunk when /api/engine-vibration streams its response
+DEFAULT_CHUNK_SIZE = 65536
+# generation parameters and their defaults, the type of each default is the parameter type
+VIBRATION_PARAM_DEFAULTS = {
+    'total_time': 10.0,
+    'sampling_freq': 1000,
+    'rpm': 3000,
+    'num_cylinders': 4,
+    'knock_start_time': 3.0,
+    'knock_probability_start': 0.2,
+    'knock_probability_end': 0.9,
+    'knock_intensity_start': 1.0,
+    'knock_intensity_end': 4.0,
+    'knock_resonant_freq': 400,
+    'knock_damping': 0.05,
+    'noise_level': 0.1,
+    'random_seed': 42,
+}
+# samples synthesized per block by simulate_vibration, bounds the size of its temporaries
+SIM_BLOCK = 65536
+# amplitudes of harmonics 1 to 4 of the firing frequency
+FIRING_HARMONICS = (0.5, 0.3, 0.15, 0.05)
+# peak of the sin**8 firing impulse of each cylinder
+FIRING_IMPULSE = 0.4
+# 128 * sin(x)**8 as a sum of k: c * cos(k x)
+SIN8_COSINES = {0: 35, 2: -56, 4: 28, 6: -8, 8: 1}
+
+def normalize_vibration_params(**kwargs) -> dict:
+    """Fill in defaults and cast every generation parameter to its type.
+
+    Raises ValueError for values that describe no trace, so callers reject
+    them before any samples are generated.
+    """
+    params = {}
+    for name, default in VIBRATION_PARAM_DEFAULTS.items():
+        value = kwargs.get(name)
+        params[name] = type(default)(default if value is None else value)
+    if params['sampling_freq'] <= 0:
+        raise ValueError("sampling_freq must be positive")
+    if not (np.isfinite(params['total_time']) and params['total_time'] >= 0):
+        raise ValueError("total_time must be a finite number, not negative")
+    if params['rpm'] <= 0:
+        raise ValueError("rpm must be positive")
+    if params['num_cylinders'] < 1:
+        raise ValueError("num_cylinders must be at least 1")
+    return params
+
+
+def generate_vibration_arrays(
+    # Time parameters
+    total_time: float = 10.0,          # Total time in seconds
+    sampling_freq: int = 1000,         # Sampling frequency in Hz
+    
+    # Engine parameters
+    rpm: int = 3000,                   # Engine RPM
+    num_cylinders: int = 4,            # Number of cylinders
+    
+    # Knock parameters
+    knock_start_time: float = 3.0,     # Time when knocking begins (seconds)
+    knock_probability_start: float = 0.2,  # Initial probability of knock per cycle
+    knock_probability_end: float = 0.9,    # Final probability of knock per cycle
+    knock_intensity_start: float = 1.0,    # Initial knock intensity multiplier
+    knock_intensity_end: float = 4.0,      # Final knock intensity multiplier
+    knock_resonant_freq: int = 400,      # Knock resonant frequency (Hz)
+    knock_damping: float = 0.05,        # Knock damping factor
+    
+    # Noise parameters
+    noise_level: float = 0.1,          # Background noise level
+    
+    # Random seed for reproducibility
+    random_seed: int = 42,
+    
+    # Evaluate the signal term by term and every knock burst on its own time slice, bit for bit with older releases
+    exact_knock: bool = False
+):
+    """Generate synthetic engine vibration data with developing knock, as time and vibration arrays."""
+    # Set random seed for reproducibility
+    np.random.seed(random_seed)
+    
+    # Ensure all parameters are the correct type
+    total_time = float(total_time)
+    sampling_freq = int(sampling_freq)
+    rpm = int(rpm)
+    num_cylinders = int(num_cylinders)
+    knock_start_time = float(knock_start_time)
+    knock_probability_start = float(knock_probability_start)
+    knock_probability_end = float(knock_probability_end)
+    knock_intensity_start = float(knock_intensity_start)
+    knock_intensity_end = float(knock_intensity_end)
+    knock_resonant_freq = int(knock_resonant_freq)
+    knock_damping = float(knock_damping)
+    noise_level = float(noise_level)
+    random_seed = int(random_seed)
+    
+    # Calculate time points
+    num_samples = int(total_time * sampling_freq)
+    time = np.linspace(0, total_time, num_samples)
+    
+    # Calculate engine cycle parameters
+    cycle_freq = rpm / 60 / 2  # Engine cycle frequency (Hz) for 4-stroke
+    firing_interval = 1.0 / (cycle_freq * num_cylinders)  # Time between firing events
+    
+    # Create base vibration signal (normal engine operation)
+    if exact_knock:
+        vibration = generate_base_vibration(time, rpm, num_cylinders, noise_level)
+    else:
+        vibration = simulate_vibration(time, rpm, num_cylinders, noise_level)[0]
+    
+    # Add developing knock to the signal
+    vibration, knock_events = add_knock_to_signal(
+        vibration, time, cycle_freq, num_cylinders,
+        knock_start_time, knock_probability_start, knock_probability_end,
+        knock_intensity_start, knock_intensity_end,
+        knock_resonant_freq, knock_damping, sampling_freq,
+        exact=exact_knock
+    )
+    
+    # Create a dictionary with parameters used
+    params = {
+        'total_time': total_time,
+        'sampling_freq': sampling_freq,
+        'rpm': rpm,
+        'num_cylinders': num_cylinders,
+        'knock_start_time': knock_start_time,
+        'knock_probability_start': knock_probability_start,
+        'knock_probability_end': knock_probability_end,
+        'knock_intensity_start': knock_intensity_start,
+        'knock_intensity_end': knock_intensity_end,
+        'knock_resonant_freq': knock_resonant_freq,
+        'knock_damping': knock_damping,
+        'noise_level': noise_level,
+        'random_seed': random_seed,
+        'knock_count': len(knock_events)
+    }
+    
+    return time, vibration, params
+
+
+def generate_base_vibration(time, rpm, num_cylinders, noise_level, rng=np.random):
+    """Generate base engine vibration without knocking."""
+    # Engine cycle frequency (Hz)
+    cycle_freq = rpm / 60 / 2
+    # Firing frequency (Hz)
+    firing_freq = cycle_freq * num_cylinders
+    
+    # Create fundamental vibration component
+    vibration = np.sin(2 * np.pi * firing_freq * time) * 0.5
+    
+    # Add harmonics
+    vibration += np.sin(2 * np.pi * 2 * firing_freq * time) * 0.3
+    vibration += np.sin(2 * np.pi * 3 * firing_freq * time) * 0.15
+    vibration += np.sin(2 * np.pi * 4 * firing_freq * time) * 0.05
+    
+    # Add firing impulses
+    for i in range(num_cylinders):
+        phase = 2 * np.pi * i / num_cylinders
+        impulse = 0.4 * np.sin(2 * np.pi * firing_freq * time + phase) ** 8
+        vibration += impulse
+    
+    # Add noise to the signal
+    vibration += rng.normal(0, noise_level, len(time))
+    
+    # Add a slower rpm variation to simulate load changes
+    vibration *= 1 + 0.1 * np.sin(2 * np.pi * 0.2 * time)
+    
+    return vibration
+
+
+def harmonic_coefficients(num_cylinders, phases, gains):
+    """Sine and cosine coefficients of harmonics 0 to 8 of the firing phase, one row per channel.
+
+    Summed over cylinders spaced 2*pi/n apart, cos(k (x + 2*pi*i/n)) cancels
+    unless n divides k, so the firing impulses of all cylinders reduce to the
+    few cosines of sin(x)**8 with k a multiple of n. A channel phase p turns
+    harmonic k by k*p, its gain scales the whole row.
+    """
+    sin_coef = np.zeros(9)
+    cos_coef = np.zeros(9)
+    sin_coef[1:len(FIRING_HARMONICS) + 1] = FIRING_HARMONICS
+    for k, c in SIN8_COSINES.items():
+        if k % num_cylinders == 0:
+            cos_coef[k] += FIRING_IMPULSE * num_cylinders * c / 128
+    
+    turn = np.outer(phases, np.arange(9))
+    gains = np.asarray(gains, dtype=float)[:, None]
+    return (gains * (sin_coef * np.cos(turn) - cos_coef * np.sin(turn)),
+            gains * (sin_coef * np.sin(turn) + cos_coef * np.cos(turn)))
+
+
+def synthesize_harmonics(phase, sin_coef, cos_coef, out):
+    """Write the harmonic series of `phase` for every channel into `out`, shaped (channels, len(phase)).
+
+    Only sin and cos of the phase itself are evaluated, higher harmonics
+    follow from the recurrence x(k+1) = 2 cos(phase) x(k) - x(k-1) in the
+    dtype of `out`. Every sample is computed on its own, so splitting the
+    phase into blocks does not change the result.
+    """
+    sin_k = np.sin(phase).astype(out.dtype, copy=False)
+    cos_k = np.cos(phase).astype(out.dtype, copy=False)
+    two_cos = 2 * cos_k
+    sin_prev = np.zeros_like(sin_k)
+    cos_prev = np.ones_like(cos_k)
+    
+    used = np.flatnonzero(np.any(sin_coef != 0, axis=0) | np.any(cos_coef != 0, axis=0))
+    out[...] = cos_coef[:, :1]
+    for k in range(1, used.max() + 1 if len(used) else 1):
+        if np.any(sin_coef[:, k]):
+            out += sin_coef[:, k, None].astype(out.dtype) * sin_k
+        if np.any(cos_coef[:, k]):
+            out += cos_coef[:, k, None].astype(out.dtype) * cos_k
+        sin_prev, sin_k = sin_k, two_cos * sin_k - sin_prev
+        cos_prev, cos_k = cos_k, two_cos * cos_k - cos_prev
+    return out
+
+
+def simulate_vibration(time, rpm, num_cylinders, noise_level, phases=(0.0,), gains=None,
+                       dtype=np.float64, rng=np.random, block=SIM_BLOCK):
+    """Base engine vibration without knocking on one or more sensor channels, shaped (channels, len(time)).
+
+    The signal of generate_base_vibration, built from one phase array per
+    block instead of a sin call per harmonic and cylinder. `phases` are the
+    channel offsets in radians of the firing cycle and `gains` scale the
+    engine vibration of each channel, noise is drawn per channel and block,
+    so a single channel draws what generate_base_vibration does. float32
+    halves the output and the working set.
+    """
+    phases = np.atleast_1d(np.asarray(phases, dtype=float))
+    gains = np.ones(len(phases)) if gains is None else np.broadcast_to(np.asarray(gains, dtype=float), phases.shape)
+    firing_freq = rpm / 60 / 2 * num_cylinders
+    sin_coef, cos_coef = harmonic_coefficients(num_cylinders, phases, gains)
+    
+    vibration = np.empty((len(phases), len(time)), dtype=dtype)
+    for first in range(0, len(time), block):
+        t = time[first:first + block]
+        out = vibration[:, first:first + block]
+        synthesize_harmonics(2 * np.pi * firing_freq * t, sin_coef, cos_coef, out)
+        for channel in out:
+            channel += rng.normal(0, noise_level, len(t))
+        # Add a slower rpm variation to simulate load changes
+        out *= (1 + 0.1 * np.sin(2 * np.pi * 0.2 * t)).astype(dtype, copy=False)
+    return vibration
+
+
+def generate_channel_arrays(channels: int = 4, phases=None, gains=None, knock_gains=None,
+                            dtype=np.float32, **kwargs):
+    """Engine vibration with developing knock on `channels` sensors, as time and (channels, samples) arrays.
+
+    Takes the generation parameters of generate_vibration_arrays. Channels
+    default to phases spread over one firing interval, such as one sensor
+    per cylinder bank, and unit gains. Every channel sees the same knock
+    events, scaled by its entry of `knock_gains`.
+    """
+    params = normalize_vibration_params(**kwargs)
+    np.random.seed(params['random_seed'])
+    phases = 2 * np.pi * np.arange(channels) / channels if phases is None else phases
+    gains = np.ones(channels) if gains is None else gains
+    knock_gains = np.broadcast_to(np.asarray(gains if knock_gains is None else knock_gains, dtype=float), (channels,))
+    
+    num_samples = int(params['total_time'] * params['sampling_freq'])
+    time = np.linspace(0, params['total_time'], num_samples)
+    cycle_freq = params['rpm'] / 60 / 2
+    vibration = simulate_vibration(
+        time, params['rpm'], params['num_cylinders'], params['noise_level'],
+        phases=phases, gains=gains, dtype=dtype)
+    
+    fire_times, knock_intensity = np.empty(0), np.empty(0)
+    if num_samples and params['knock_start_time'] <= time[-1]:
+        fire_times, knock_intensity = draw_knock_events(
+            time[-1], cycle_freq, params['num_cylinders'],
+            params['knock_start_time'], params['knock_probability_start'], params['knock_probability_end'],
+            params['knock_intensity_start'], params['knock_intensity_end'])
+    idx_start = np.searchsorted(time, fire_times)
+    sample_step = time[1] - time[0] if num_samples > 1 else 0.0
+    for channel, knock_gain in zip(vibration, knock_gains):
+        add_knock_bursts(
+            channel, time, 0, idx_start, time[idx_start], knock_intensity * knock_gain,
+            params['knock_resonant_freq'], params['knock_damping'], params['sampling_freq'], sample_step)
+    
+    params['channels'] = channels
+    params['knock_count'] = len(fire_times)
+    return time, vibration, params
+
+
+def draw_knock_events(
+    total_time, cycle_freq, num_cylinders,
+    knock_start_time, knock_prob_start, knock_prob_end,
+    intensity_start, intensity_end, rng=np.random
+):
+    """Decide which combustion events knock, returns their firing times and intensities.
+
+    One draw is taken per firing event from `knock_start_time` onwards, in
+    firing order, all in a single call.
+    """
+    # Calculate firing frequency
+    firing_freq = cycle_freq * num_cylinders
+    firing_interval = 1.0 / firing_freq
+    
+    # Calculate combustion events (when each cylinder fires) from knock start onwards
+    firing_times = np.arange(0, total_time, firing_interval)
+    firing_times = firing_times[firing_times >= knock_start_time]
+    if len(firing_times) == 0:
+        return firing_times, np.empty(0)
+    
+    # Knock probability and intensity grow with time progression
+    time_progress = np.clip((firing_times - knock_start_time) / (total_time - knock_start_time), 0, 1)
+    knock_probability = knock_prob_start + time_progress * (knock_prob_end - knock_prob_start)
+    
+    # Determine which combustion cycles knock
+    knocks = rng.random_sample(len(firing_times)) <= knock_probability
+    knock_intensity = intensity_start + time_progress[knocks] * (intensity_end - intensity_start)
+    return firing_times[knocks], knock_intensity
+
+
+def add_knock_bursts(
+    vibration, time, first_index, idx_start, start_times, knock_intensity,
+    knock_freq, knock_damping, sampling_freq, sample_step, exact=False
+):
+    """Add the damped-sine burst of each knock event to a window of the signal.
+
+    `vibration` and `time` hold the samples from `first_index` onwards while
+    `idx_start` are absolute sample indices, so a burst that began in an
+    earlier window carries on where it left off. Bursts are added with one
+    scatter-add of a precomputed kernel; with `exact` each burst is evaluated
+    on its own time slice and added in event order instead.
+    """
+    window_end = first_index + len(vibration)
+    
+    # Calculate how many samples to affect with knock (about 10ms knock duration)
+    knock_duration_samples = int(0.010 * sampling_freq)
+    offsets = np.arange(knock_duration_samples)
+    if not exact:
+        # Damped sine shared by every burst, only the intensity differs
+        knock_time = offsets * sample_step
+        kernel = np.exp(-knock_damping * knock_time * 1000) * np.sin(2 * np.pi * knock_freq * knock_time)
+    
+    # Work through the events in blocks to bound the size of the burst matrix
+    for block in range(0, len(idx_start), KNOCK_EVENT_BLOCK):
+        starts = idx_start[block:block + KNOCK_EVENT_BLOCK, None]
+        intensity = knock_intensity[block:block + KNOCK_EVENT_BLOCK, None]
+        idx = starts + offsets
+        valid = (idx >= first_index) & (idx < window_end)
+        local_idx = idx[valid] - first_index
+        if len(local_idx) == 0:
+            continue
+        if exact:
+            start_time = np.broadcast_to(start_times[block:block + KNOCK_EVENT_BLOCK, None], idx.shape)[valid]
+            knock_time = time[local_idx] - start_time
+            knock_signal = np.broadcast_to(intensity, idx.shape)[valid] * np.exp(-knock_damping * knock_time * 1000) * np.sin(2 * np.pi * knock_freq * knock_time)
+            # unbuffered add in event order, matching overlapping bursts added one at a time
+            np.add.at(vibration, local_idx, knock_signal)
+        else:
+            knock_signal = (intensity * kernel)[valid]
+            lo = local_idx.min()
+            hi = local_idx.max() + 1
+            vibration[lo:hi] += np.bincount(local_idx - lo, weights=knock_signal, minlength=hi - lo)
+    
+    return vibration
+
+
+def add_knock_to_signal(
+    vibration, time, cycle_freq, num_cylinders,
+    knock_start_time, knock_prob_start, knock_prob_end,
+    intensity_start, intensity_end,
+    knock_freq, knock_damping, sampling_freq,
+    exact=False, rng=np.random
+):
+    """Add engine knock to vibration signal with increasing probability and intensity.
+
+    Knock decisions are drawn in the same order as one draw per firing event,
+    so a given seed knocks on the same cycles. With `exact` the result is bit
+    for bit the one of the per-event loop this replaced.
+    """
+    # No knocking in this dataset
+    if len(time) == 0 or knock_start_time > time[-1]:
+        return vibration, []
+    
+    fire_times, knock_intensity = draw_knock_events(
+        time[-1], cycle_freq, num_cylinders,
+        knock_start_time, knock_prob_start, knock_prob_end,
+        intensity_start, intensity_end, rng=rng
+    )
+    
+    # First sample at or after each knocking firing event
+    idx_start = np.searchsorted(time, fire_times)
+    sample_step = time[1] - time[0] if len(time) > 1 else 0.0
+    add_knock_bursts(
+        vibration, time, 0, idx_start, time[idx_start], knock_intensity,
+        knock_freq, knock_damping, sampling_freq, sample_step, exact=exact
+    )
+    
+    # Record knock events
+    knock_events = list(zip(fire_times.tolist(), knock_intensity.tolist()))
+    
+    return vibration, knock_events
+
+
+def sample_times(start, stop, num_samples, total_time):
+    """Times of samples `start` to `stop` - 1 of np.linspace(0, total_time, num_samples)."""
+    step = total_time / (num_samples - 1) if num_samples > 1 else 0.0
+    # same arithmetic as np.linspace so chunks line up exactly with the one-shot time array
+    time = np.arange(start, stop, dtype=float) * step
+    if stop == num_samples and stop > max(start, 1):
+        time[-1] = total_time
+    return time
+
+
+def stream_engine_vibration_data(chunk_size: int = DEFAULT_CHUNK_SIZE, exact_knock: bool = False, **kwargs):
+    """Generate the trace of generate_engine_vibration_data in chunks of `chunk_size` samples.
+
+    Returns the parameters dictionary and a generator of (time, vibration)
+    arrays. Noise and knock decisions come from private random states seeded
+    like the one-shot path, and bursts and phase carry over chunk boundaries,
+    so the concatenated chunks equal its output. Only one chunk and the list
+    of knock events are held in memory at a time.
+    """
+    params = normalize_vibration_params(**kwargs)
+    total_time = params['total_time']
+    sampling_freq = params['sampling_freq']
+    num_samples = int(total_time * sampling_freq)
+    sample_step = total_time / (num_samples - 1) if num_samples > 1 else 0.0
+    cycle_freq = params['rpm'] / 60 / 2
+    
+    noise_rng = np.random.RandomState(params['random_seed'])
+    knock_rng = np.random.RandomState(params['random_seed'])
+    # the one-shot path draws the noise of every sample before the first knock decision
+    for first in range(0, num_samples, chunk_size):
+        knock_rng.normal(0, 1, min(chunk_size, num_samples - first))
+    
+    last_time = sample_times(num_samples - 1, num_samples, num_samples, total_time)[0] if num_samples else 0.0
+    if num_samples and params['knock_start_time'] <= last_time:
+        fire_times, knock_intensity = draw_knock_events(
+            last_time, cycle_freq, params['num_cylinders'],
+            params['knock_start_time'], params['knock_probability_start'], params['knock_probability_end'],
+            params['knock_intensity_start'], params['knock_intensity_end'], rng=knock_rng
+        )
+    else:
+        fire_times, knock_intensity = np.empty(0), np.empty(0)
+    params['knock_count'] = len(fire_times)
+    
+    def chunks():
+        knock_duration_samples = int(0.010 * sampling_freq)
+        next_event = 0
+        # bursts still ringing at the end of the previous chunk
+        active_starts = np.empty(0, dtype=np.int64)
+        active_times = np.empty(0)
+        active_intensity = np.empty(0)
+        for first in range(0, num_samples, chunk_size):
+            stop = min(first + chunk_size, num_samples)
+            time = sample_times(first, stop, num_samples, total_time)
+            if exact_knock:
+                vibration = generate_base_vibration(
+                    time, params['rpm'], params['num_cylinders'], params['noise_level'], rng=noise_rng)
+            else:
+                vibration = simulate_vibration(
+                    time, params['rpm'], params['num_cylinders'], params['noise_level'], rng=noise_rng)[0]
+            
+            # knock events firing within this chunk
+            last_event = np.searchsorted(fire_times, time[-1], side='right')
+            new_starts = first + np.searchsorted(time, fire_times[next_event:last_event])
+            starts = np.concatenate([active_starts, new_starts])
+            start_times = np.concatenate([active_times, time[new_starts - first]])
+            intensity = np.concatenate([active_intensity, knock_intensity[next_event:last_event]])
+            next_event = last_event
+            
+            add_knock_bursts(
+                vibration, time, first, starts, start_times, intensity,
+                params['knock_resonant_freq'], params['knock_damping'], sampling_freq,
+                sample_step, exact=exact_knock
+            )
+            ringing = starts + knock_duration_samples > stop
+            active_starts, active_times, active_intensity = starts[ringing], start_times[ringing], intensity[ringing]
+            yield time, vibration
+    
+    return params, chunks()
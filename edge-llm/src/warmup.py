@@ -0,0 +1,71 @@
+import os
+import time
+import asyncio
+import logging
+import importlib
+
+logger = logging.getLogger(__name__)
+
+# load the heavy libraries and start the worker processes once the server is up, 0 loads them on first use
+WARMUP_ENABLED = os.environ.get("EDGE_LLM_WARMUP", "1").lower() in ("1", "true", "yes")
+# libraries left out of the server's import graph, the first request of each kind would wait for them
+WARMUP_IMPORTS = ("scipy.signal", "scipy.fft", "pandas", "matplotlib.figure", "matplotlib.backends.backend_agg")
+
+
+class Warmup:
+    """Start-up work that runs in the background after the port is bound.
+
+    Steps run one after another. The server is ready once none is pending,
+    a failed step is logged and only means its work happens on first use.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.steps = {}
+        self._task = None
+
+    def start(self, steps: dict):
+        """Run `steps`, a dict of name to coroutine function, in the background."""
+        for name in steps:
+            self.steps[name] = {"state": "pending", "duration": None}
+        self._task = asyncio.create_task(self._run(steps))
+
+    async def _run(self, steps: dict):
+        for name, step in steps.items():
+            state = self.steps[name]
+            state["state"] = "running"
+            start = time.monotonic()
+            try:
+                await step()
+                state["state"] = "done"
+            except Exception as e:
+                logger.warning(f"Warm-up step {name} failed, its work happens on first use: {e}")
+                state["state"] = "failed"
+                state["error"] = str(e)
+            state["duration"] = time.monotonic() - start
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return all(state["state"] in ("done", "failed") for state in self.steps.values())
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime": time.monotonic() - self.started_at,
+            "steps": self.steps,
+        }
+
+
+async def import_modules(names=WARMUP_IMPORTS):
+    """Import `names` on a thread, one at a time so the event loop gets the GIL in between."""
+    for name in names:
+        await asyncio.to_thread(importlib.import_module, name)
+
+
+warmup = Warmup()
@@ -63,7 +63,7 @@ export const ChatContainer = () => {
                 webSocket.ws.onmessage = ({ data }) => {
                     const response = JSON.parse(data)
                     if (response.status === 0) {
-                        setTextResponse(response.part)
+                        setTextResponse((text) => text + response.part)
                     } else if (response.status === 1) {
                         setPending(false)
                         refetch()